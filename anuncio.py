@@ -1,16 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog, Menu
 import os
-import pygame
-from pygame import mixer
 import json
+import queue
 from datetime import datetime
 import time
-import shutil
-from PIL import Image, ImageTk
-import random
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+import threading
+from assets import load_scaled_image, solid_icon
+from core import PlayerCore
+from media_list import VirtualMediaList
+from model import Playlist, parse_minutes
+from transfer import (TransferProgress, export_to_folder, export_to_zip, import_from_zip,
+                      import_record, read_export_folder)
+
+TRANSFER_PHASES = {
+    "hash": "Analisando",
+    "copy": "Copiando",
+    "zip": "Compactando",
+    "extract": "Extraindo"
+}
+HEARTBEAT_MS = 100
+SEARCH_LIMIT = 500
+NEXT_ANNOUNCEMENTS = 20
 
 class PlayerInterface:
     def __init__(self, root):
@@ -23,115 +34,119 @@ class PlayerInterface:
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
         
-        try:
-            mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        except pygame.error as e:
-            messagebox.showerror("Erro de Áudio", f"Não foi possível inicializar o áudio: {str(e)}")
-            raise SystemExit
-        
-        self.playlist_file = "playlists.json"
-        self.playlists = self.load_playlists()
+        self.startup_marks = {}
+        self.core = PlayerCore()
+        self.settings = self.core.settings
+        self.playlists = self.core.playlists
         self.current_playlist = None
         self.current_media_index = None
         
+        # Os eventos chegam das threads do núcleo; a GUI só os consome no loop do Tk
+        self.core_events = queue.Queue()
+        self.core.add_listener(lambda *event: self.core_events.put(event))
+        # self.playlists é o mesmo dicionário do núcleo: recargas externas o alteram aqui
+        self.core.set_owner(lambda call: self.core_events.put(("call", call)))
+        
         self.create_icons()
         self.create_widgets()
-        self.check_schedules()
+        # O áudio só é aberto depois que a janela aparece
+        self.root.bind("<Map>", self.on_first_map)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def on_first_map(self, event):
+        if event.widget is not self.root or "window" in self.startup_marks:
+            return
+        self.startup_marks["window"] = time.perf_counter()
+        self.root.after(0, self.start_core)
+
+    def start_core(self):
+        import pygame
+        try:
+            self.core.open_audio()
+        except pygame.error as e:
+            messagebox.showerror("Erro de Áudio", f"Não foi possível inicializar o áudio: {str(e)}")
+            self.core.shutdown()
+            self.root.destroy()
+            raise SystemExit
+        self.core.start()
+        # A janela de busca abre com o índice pronto; ele é montado em segundo plano
+        self.core.prepare_search()
+        self.process_core_events()
+        # Sem métricas nem monitor de travamentos o batimento nem é agendado
+        self.stall_monitor = self.core.create_stall_monitor("tk")
+        self.loop_lag = self.core.metrics.histogram("ui_loop_lag_seconds",
+                                                    "Atraso do loop do Tk sobre o agendado")
+        self.next_beat = None
+        if self.stall_monitor is not None or self.core.metrics.enabled:
+            self.heartbeat()
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        if self.next_beat is not None:
+            self.loop_lag.observe(max(0.0, now - self.next_beat))
+        if self.stall_monitor is not None:
+            self.stall_monitor.beat()
+        self.next_beat = now + HEARTBEAT_MS / 1000
+        self.root.after(HEARTBEAT_MS, self.heartbeat)
+
     def create_icons(self):
         self.gear_icon = self.create_text_icon("⚙", '#FF9800')
         self.on_icon = self.create_text_icon("ON", '#4CAF50')
         self.off_icon = self.create_text_icon("OFF", '#F44336')
 
     def create_text_icon(self, text, bg_color):
-        img = Image.new('RGB', (24, 24), bg_color)
-        return ImageTk.PhotoImage(img)
+        return solid_icon(bg_color, (24, 24))
 
-    def load_playlists(self):
-        if os.path.exists(self.playlist_file):
-            try:
-                with open(self.playlist_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
-    def save_playlists(self):
-        with open(self.playlist_file, 'w') as f:
-            json.dump(self.playlists, f, indent=4)
-
-    def get_spotify_session(self):
-        try:
-            sessions = AudioUtilities.GetAllSessions()
-            for session in sessions:
-                if session.Process and session.Process.name().lower() == "spotify.exe":
-                    volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                    return volume
-            return None
-        except Exception as e:
-            print(f"Erro ao acessar sessão do Spotify: {e}")
-            return None
+    def stop_playback(self):
+        self.core.stop_playback()
 
-    def set_spotify_volume(self, volume_level):
-        spotify_session = self.get_spotify_session()
-        if spotify_session:
+    def process_core_events(self):
+        changed = set()
+        while True:
             try:
-                spotify_session.SetMasterVolume(volume_level, None)
-                return True
-            except Exception as e:
-                print(f"Erro ao ajustar volume do Spotify: {e}")
-        return False
-
-    def gradually_increase_spotify_volume(self, target_volume=0.8, steps=10, interval=0.5):
-        spotify_session = self.get_spotify_session()
-        if not spotify_session:
-            return
-        
-        current_volume = 0.1
-        step_size = (target_volume - current_volume) / steps
-        
-        for _ in range(steps):
-            current_volume += step_size
-            self.set_spotify_volume(current_volume)
-            time.sleep(interval)
-
-    def check_schedules(self):
-        now = datetime.now().strftime("%H:%M")
-        
-        for playlist_name, playlist_data in self.playlists.items():
-            if not playlist_data.get("active", True):
-                continue
-                
-            if playlist_data["time"] == now:
-                self.play_playlist(playlist_name)
-            
-            for media in playlist_data["files"]:
-                if isinstance(media, dict) and media["time"] == now:
-                    self.play_media(media["path"], media.get("repeats", 1))
-        
-        self.root.after(60000, self.check_schedules)
-
-    def play_playlist(self, playlist_name):
-        for media in self.playlists[playlist_name]["files"]:
-            path = media["path"] if isinstance(media, dict) else media
-            repeats = media.get("repeats", 1) if isinstance(media, dict) else 1
-            self.play_media(path, repeats)
-
-    def play_media(self, path, repeats=1):
-        try:
-            mixer.music.load(path)
-            self.set_spotify_volume(0.1)
-            
-            for _ in range(repeats):
-                mixer.music.play()
-                while mixer.music.get_busy():
-                    time.sleep(0.1)
-            
-            if not mixer.music.get_busy():
-                self.gradually_increase_spotify_volume()
-        except Exception as e:
-            print(f"Erro ao reproduzir {path}: {e}")
+                event = self.core_events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "call":
+                event[1]()
+            elif event[0] == "ingest":
+                changed.add(event[1]["path"])
+            elif event[0] == "media":
+                changed.update(event[1])
+            elif event[0] == "missing":
+                self.update_playlist_display()
+            elif event[0] == "reload":
+                self.apply_reload(event[1])
+            elif event[0] == "playback":
+                kind, item = event[1], event[2]
+                if kind == "start":
+                    self.status_label.config(text=f"Tocando: {os.path.basename(item.path)}")
+                else:
+                    self.status_label.config(text="")
+        if changed and self.current_playlist in self.playlists:
+            for idx, media in enumerate(self.playlists[self.current_playlist].files):
+                if media.path in changed:
+                    self.refresh_media_row(idx)
+        self.root.after(100, self.process_core_events)
+
+    def apply_reload(self, changes):
+        # playlists.json mudou por fora: a árvore aplica só as diferenças e a lista de mídias
+        # é refeita apenas se a playlist aberta mudou; a reprodução segue sem interrupção
+        self.update_playlist_display()
+        if self.current_playlist in changes["removed"]:
+            self.current_playlist = None
+            self.current_media_index = None
+            self.media_list.clear()
+        elif self.current_playlist in changes["changed"] + changes["added"]:
+            if (self.current_media_index or 0) >= len(self.playlists[self.current_playlist].files):
+                self.current_media_index = None
+            self.media_list.set_items(self.media_row(media)
+                                      for media in self.playlists[self.current_playlist].files)
+        if changes["conflicts"]:
+            messagebox.showwarning("Conflito",
+                                   "As playlists abaixo foram alteradas aqui e no arquivo ao mesmo "
+                                   "tempo; a versão do arquivo foi mantida e a local foi salva "
+                                   "à parte:\n" + "\n".join(changes["conflicts"]))
 
     def create_widgets(self):
         main_frame = tk.Frame(self.root, bg='#222222')
@@ -142,10 +157,9 @@ class PlayerInterface:
         
         # Load and display logo
         try:
-            logo_img = Image.open("logo/logo.png")
             # Resize logo to fit header (adjust size as needed)
-            logo_img = logo_img.resize((150, 50), Image.LANCZOS)
-            self.logo_photo = ImageTk.PhotoImage(logo_img)
+            self.logo_photo = load_scaled_image("logo/logo.png", (150, 50),
+                                                self.settings["asset_cache_dir"])
             logo_label = tk.Label(header_frame, image=self.logo_photo, bg='#222222')
             logo_label.pack(side=tk.LEFT)
         except Exception as e:
@@ -198,7 +212,10 @@ class PlayerInterface:
         
         self.playlist_tree.bind('<<TreeviewSelect>>', self.show_media)
         self.playlist_tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.playlist_tree.bind('<Button-1>', self.on_tree_click)
         
+        self.tree_items = {}
+        self.tree_status = {}
         self.update_playlist_display()
         
         self.media_frame = tk.Frame(content_frame, bg='#222222')
@@ -206,13 +223,10 @@ class PlayerInterface:
         
         self.media_canvas = tk.Canvas(self.media_frame, bg='#222222', highlightthickness=0)
         scrollbar = ttk.Scrollbar(self.media_frame, orient="vertical", command=self.media_canvas.yview)
-        self.media_container = tk.Frame(self.media_canvas, bg='#222222')
-        
-        self.media_container.bind("<Configure>", lambda e: self.media_canvas.configure(
-            scrollregion=self.media_canvas.bbox("all")))
-        
-        self.media_canvas.create_window((0, 0), window=self.media_container, anchor="nw")
-        self.media_canvas.configure(yscrollcommand=scrollbar.set)
+        self.media_list = VirtualMediaList(self.media_canvas, scrollbar,
+                                           on_config=self.config_media,
+                                           on_select=self.select_media,
+                                           on_mousewheel=self.on_mousewheel)
         
         self.media_canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -221,7 +235,6 @@ class PlayerInterface:
         self.media_frame.grid_columnconfigure(0, weight=1)
         
         self.media_canvas.bind("<MouseWheel>", self.on_mousewheel)
-        self.media_container.bind("<MouseWheel>", self.on_mousewheel)
         
         control_frame = tk.Frame(main_frame, bg='#222222')
         control_frame.pack(fill=tk.X, pady=(10, 0))
@@ -249,6 +262,14 @@ class PlayerInterface:
         self.play_btn = tk.Button(control_frame, text="Tocar Agora", 
                                 command=self.play_selected_media, **btn_style)
         self.play_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.stop_btn = tk.Button(control_frame, text="Parar", 
+                                command=self.stop_playback, **btn_style)
+        self.stop_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = tk.Label(control_frame, text="", bg='#222222', fg='white',
+                                   font=('Arial', 10), anchor='e')
+        self.status_label.pack(side=tk.RIGHT, padx=5)
 
     def show_main_menu(self):
         menu = Menu(self.root, tearoff=0, bg='#333333', fg='white')
@@ -260,14 +281,23 @@ class PlayerInterface:
         playlist_menu.add_command(label="Duplicar Playlist", command=self.duplicate_current_playlist)
         playlist_menu.add_separator()
         playlist_menu.add_command(label="Exportar Playlist", command=self.export_playlist)
+        playlist_menu.add_command(label="Exportar Playlist (zip)", command=self.export_playlist_zip)
         playlist_menu.add_command(label="Importar Playlist", command=self.import_playlist)
+        playlist_menu.add_command(label="Importar Playlist (zip)", command=self.import_playlist_zip)
+        playlist_menu.add_separator()
+        playlist_menu.add_command(label="Publicar na Pasta Central", command=self.publish_playlists)
+        if self.settings["sync_dir"]:
+            playlist_menu.add_command(label="Sincronizar Agora", command=self.sync_now)
         
         config_menu = Menu(menu, tearoff=0, bg='#333333', fg='white')
         config_menu.add_command(label="Ligar/Desligar Playlist", command=self.toggle_current_playlist)
         
         menu.add_cascade(label="Playlist", menu=playlist_menu)
         menu.add_cascade(label="Configurações", menu=config_menu)
-        menu.add_command(label="Salvar Tudo", command=self.save_playlists)
+        menu.add_command(label="Buscar Mídias", command=self.show_search)
+        menu.add_command(label="Plano de Hoje", command=self.show_todays_plan)
+        menu.add_command(label="Próximos Anúncios", command=self.show_next_announcements)
+        menu.add_command(label="Salvar Tudo", command=self.core.save_playlists)
         
         try:
             menu.tk_popup(self.menu_btn.winfo_rootx(), 
@@ -275,6 +305,136 @@ class PlayerInterface:
         finally:
             menu.grab_release()
 
+    def show_todays_plan(self):
+        plan_window = tk.Toplevel(self.root)
+        plan_window.title("Plano de Hoje")
+        plan_window.geometry("420x400")
+        plan_window.configure(bg='#222222')
+        
+        listbox = tk.Listbox(plan_window, bg='#333333', fg='white', borderwidth=0,
+                             font=('Consolas', 10))
+        scrollbar = ttk.Scrollbar(plan_window, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side="left", fill="both", expand=True, padx=(10, 0), pady=10)
+        scrollbar.pack(side="right", fill="y", pady=10)
+        
+        now = datetime.now()
+        plan = self.core.todays_plan()
+        for fire_at, playlist_name, path in plan:
+            listbox.insert(tk.END, f"{fire_at.strftime('%H:%M')}  {playlist_name}  {os.path.basename(path)}")
+            if fire_at < now:
+                listbox.itemconfig(tk.END, fg='#888888')
+            elif not self.core.media_index.exists(path):
+                listbox.itemconfig(tk.END, fg='#F44336')
+        if not plan:
+            listbox.insert(tk.END, "Nenhum anúncio agendado para hoje")
+
+    def show_next_announcements(self):
+        window = tk.Toplevel(self.root)
+        window.title("Próximos Anúncios")
+        window.geometry("460x400")
+        window.configure(bg='#222222')
+        
+        listbox = tk.Listbox(window, bg='#333333', fg='white', borderwidth=0,
+                             font=('Consolas', 10))
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side="left", fill="both", expand=True, padx=(10, 0), pady=10)
+        scrollbar.pack(side="right", fill="y", pady=10)
+        
+        upcoming = self.core.next_announcements(NEXT_ANNOUNCEMENTS)
+        for fire_at, playlist_name, path in upcoming:
+            listbox.insert(tk.END, f"{fire_at.strftime('%d/%m %H:%M')}  {playlist_name}  "
+                                   f"{os.path.basename(path)}")
+            if not self.core.media_index.exists(path):
+                listbox.itemconfig(tk.END, fg='#F44336')
+        if not upcoming:
+            listbox.insert(tk.END, "Nenhum anúncio agendado")
+
+    def show_search(self):
+        window = tk.Toplevel(self.root)
+        window.title("Buscar Mídias")
+        window.geometry("600x450")
+        window.configure(bg='#222222')
+        
+        query = tk.StringVar()
+        start = tk.StringVar()
+        end = tk.StringVar()
+        only_active = tk.BooleanVar()
+        entry_style = {'bg': '#333333', 'fg': 'white', 'insertbackground': 'white',
+                       'borderwidth': 0, 'font': ('Arial', 11)}
+        label_style = {'bg': '#222222', 'fg': 'white', 'font': ('Arial', 10)}
+        
+        filters = tk.Frame(window, bg='#222222')
+        filters.pack(fill=tk.X, padx=10, pady=(10, 0))
+        entry = tk.Entry(filters, textvariable=query, **entry_style)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Label(filters, text="das", **label_style).pack(side=tk.LEFT, padx=(10, 2))
+        tk.Entry(filters, textvariable=start, width=6, **entry_style).pack(side=tk.LEFT)
+        tk.Label(filters, text="às", **label_style).pack(side=tk.LEFT, padx=2)
+        tk.Entry(filters, textvariable=end, width=6, **entry_style).pack(side=tk.LEFT)
+        tk.Checkbutton(filters, text="Só ativas", variable=only_active, selectcolor='#333333',
+                       activebackground='#222222', activeforeground='white',
+                       **label_style).pack(side=tk.LEFT, padx=(10, 0))
+        
+        count_label = tk.Label(window, text="", anchor='w', **label_style)
+        count_label.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 10))
+        listbox = tk.Listbox(window, bg='#333333', fg='white', borderwidth=0,
+                             font=('Consolas', 10))
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side="left", fill="both", expand=True, padx=(10, 0), pady=10)
+        scrollbar.pack(side="right", fill="y", pady=10)
+        
+        results = []
+        pending = {}
+        
+        def run_search():
+            pending.pop("job", None)
+            if not window.winfo_exists():
+                return
+            # Horário incompleto ("09:") ainda não filtra
+            found = self.core.search_media(query.get(), parse_minutes(start.get()),
+                                           parse_minutes(end.get()),
+                                           True if only_active.get() else None, SEARCH_LIMIT)
+            if found is None:
+                # Índice ainda em construção: tenta de novo em seguida
+                count_label.config(text="Preparando o índice de busca...")
+                pending["job"] = window.after(300, run_search)
+                return
+            results[:] = found
+            listbox.delete(0, tk.END)
+            for playlist_name, _, media in found:
+                listbox.insert(tk.END, f"{media.time or '--:--'}  {playlist_name}  "
+                                       f"{os.path.basename(media.path)}")
+            text = f"{len(found)} mídia(s) em {len({name for name, _, _ in found})} playlist(s)"
+            if len(found) == SEARCH_LIMIT:
+                text += " (limite atingido; refine a busca)"
+            count_label.config(text=text)
+        
+        def schedule_search(*args):
+            # Espera a digitação parar um instante antes de consultar
+            if "job" in pending:
+                window.after_cancel(pending["job"])
+            pending["job"] = window.after(100, run_search)
+        
+        def open_result(event):
+            selection = listbox.curselection()
+            if not selection:
+                return
+            item = self.tree_items.get(results[selection[0]][0])
+            if item is not None:
+                self.playlist_tree.selection_set(item)
+                self.playlist_tree.focus(item)
+                self.playlist_tree.see(item)
+                self.show_media()
+        
+        for variable in (query, start, end, only_active):
+            variable.trace_add("write", schedule_search)
+        listbox.bind('<Double-Button-1>', open_result)
+        entry.focus_set()
+        run_search()
+
     def toggle_current_playlist(self):
         if not self.current_playlist:
             messagebox.showwarning("Aviso", "Nenhuma playlist selecionada!")
@@ -307,36 +467,76 @@ class PlayerInterface:
 
     def toggle_playlist_status(self, playlist_name):
         if playlist_name in self.playlists:
-            self.playlists[playlist_name]["active"] = not self.playlists[playlist_name].get("active", True)
+            self.core.toggle_playlist_status(playlist_name)
             self.update_playlist_display()
-            self.save_playlists()
 
     def rename_playlist(self, old_name):
         new_name = simpledialog.askstring("Renomear Playlist", "Novo nome:", initialvalue=old_name)
         if new_name and new_name != old_name:
-            self.playlists[new_name] = self.playlists.pop(old_name)
+            if not self.core.rename_playlist(old_name, new_name):
+                messagebox.showwarning("Aviso", "Já existe uma playlist com esse nome!")
+                return
             self.current_playlist = new_name
+            self.rename_tree_item(old_name, new_name)
             self.update_playlist_display()
-            self.save_playlists()
 
     def delete_playlist(self, name):
         if messagebox.askyesno("Confirmar", f"Tem certeza que deseja excluir a playlist '{name}'?"):
-            del self.playlists[name]
+            self.core.delete_playlist(name)
             self.update_playlist_display()
-            self.save_playlists()
             if self.current_playlist == name:
                 self.current_playlist = None
-                for widget in self.media_container.winfo_children():
-                    widget.destroy()
+                self.media_list.clear()
 
     def duplicate_playlist(self, name):
         new_name = simpledialog.askstring("Duplicar Playlist", "Nome da nova playlist:", 
                                         initialvalue=f"{name}_copia")
-        if new_name and new_name not in self.playlists:
-            import copy
-            self.playlists[new_name] = copy.deepcopy(self.playlists[name])
+        if new_name and self.core.duplicate_playlist(name, new_name):
             self.update_playlist_display()
-            self.save_playlists()
+
+    def run_transfer(self, title, task, on_done):
+        progress = TransferProgress()
+        result = {}
+        
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        window.geometry("350x100")
+        window.configure(bg='#222222')
+        window.transient(self.root)
+        
+        status = tk.Label(window, text="", bg='#222222', fg='white', font=('Arial', 10))
+        status.pack(pady=(15, 5))
+        bar = ttk.Progressbar(window, orient="horizontal", length=300, maximum=100)
+        bar.pack(pady=5)
+        
+        def worker():
+            try:
+                result["value"] = task(progress)
+            except Exception as e:
+                result["error"] = e
+        
+        thread = threading.Thread(target=worker, name="transfer", daemon=True)
+        thread.start()
+        
+        def poll():
+            phase, done, total, files_done, files_total = progress.snapshot()
+            bar['value'] = 100 * done / total if total else 0
+            phase_label = TRANSFER_PHASES.get(phase, phase)
+            status.config(text=f"{phase_label}: {files_done}/{files_total} arquivos")
+            if thread.is_alive():
+                self.root.after(100, poll)
+                return
+            window.destroy()
+            on_done(result.get("value"), result.get("error"), progress)
+        
+        poll()
+
+    def transfer_errors_text(self, progress):
+        if not progress.errors:
+            return ""
+        for path, message in progress.errors:
+            print(f"Erro ao copiar {path}: {message}")
+        return f"\n\n{len(progress.errors)} arquivo(s) com erro (veja o console)."
 
     def export_playlist(self):
         if not self.current_playlist:
@@ -346,162 +546,175 @@ class PlayerInterface:
         folder_path = filedialog.askdirectory(title="Selecione a pasta para exportar")
         if not folder_path:
             return
-            
-        export_data = {
-            "playlist": self.playlists[self.current_playlist],
-            "metadata": {
-                "export_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "playlist_name": self.current_playlist
-            }
-        }
         
-        export_folder = os.path.join(folder_path, f"export_{self.current_playlist}")
-        os.makedirs(export_folder, exist_ok=True)
+        playlist_name = self.current_playlist
+        playlist_data = self.playlists[playlist_name].to_record()
+        digests = self.core.known_digests(media["path"] for media in playlist_data["files"])
         
-        exported_files = []
-        for media in export_data["playlist"]["files"]:
-            if isinstance(media, dict):
-                src_path = media["path"]
-            else:
-                src_path = media
-                
-            if not os.path.exists(src_path):
-                continue
-                
-            filename = os.path.basename(src_path)
-            dst_path = os.path.join(export_folder, filename)
-            
-            try:
-                shutil.copy2(src_path, dst_path)
-                exported_files.append({
-                    "path": filename,
-                    "time": media.get("time", "00:00") if isinstance(media, dict) else "00:00",
-                    "repeats": media.get("repeats", 1) if isinstance(media, dict) else 1
-                })
-            except Exception as e:
-                print(f"Erro ao copiar {src_path}: {e}")
+        def task(progress):
+            return export_to_folder(playlist_name, playlist_data, folder_path, progress,
+                                    workers=self.settings["transfer_workers"],
+                                    resume=self.settings["export_resume"],
+                                    stat=self.core.media_index.stat, digests=digests)
+        
+        def done(result, error, progress):
+            if error:
+                messagebox.showerror("Erro", f"Falha ao exportar a playlist:\n{error}")
+                return
+            export_folder, exported_files = result
+            if not exported_files:
+                messagebox.showwarning("Aviso", "Nenhum arquivo foi exportado!"
+                                       + self.transfer_errors_text(progress))
+                return
+            messagebox.showinfo("Sucesso", f"Playlist exportada para:\n{export_folder}"
+                                + self.transfer_errors_text(progress))
         
-        if not exported_files:
-            messagebox.showwarning("Aviso", "Nenhum arquivo foi exportado!")
-            shutil.rmtree(export_folder)
+        self.run_transfer("Exportando Playlist", task, done)
+
+    def publish_playlists(self):
+        folder_path = filedialog.askdirectory(title="Selecione a pasta central")
+        if not folder_path:
+            return
+        
+        def task(progress):
+            return self.core.publish_playlists(folder_path, progress)
+        
+        def done(result, error, progress):
+            if error:
+                messagebox.showerror("Erro", f"Falha ao publicar as playlists:\n{error}")
+                return
+            messagebox.showinfo("Sucesso", f"{len(result)} playlist(s) publicada(s) em:\n{folder_path}"
+                                + self.transfer_errors_text(progress))
+        
+        self.run_transfer("Publicando Playlists", task, done)
+
+    def sync_now(self):
+        def done(result, error, progress):
+            if error:
+                messagebox.showerror("Erro", f"Falha ao sincronizar:\n{error}")
+                return
+            if not result or not any(result.values()):
+                messagebox.showinfo("Sincronização", "As playlists já estão atualizadas."
+                                    + self.transfer_errors_text(progress))
+        
+        self.run_transfer("Sincronizando", self.core.sync_now, done)
+
+    def export_playlist_zip(self):
+        if not self.current_playlist:
+            messagebox.showwarning("Aviso", "Nenhuma playlist selecionada!")
+            return
+        
+        zip_path = filedialog.asksaveasfilename(title="Salvar playlist como", defaultextension=".zip",
+                                                initialfile=f"export_{self.current_playlist}.zip",
+                                                filetypes=[("Arquivo zip", "*.zip")])
+        if not zip_path:
             return
-            
-        export_data["playlist"]["files"] = exported_files
         
-        config_path = os.path.join(export_folder, "playlist_config.json")
-        with open(config_path, 'w') as f:
-            json.dump(export_data, f, indent=4)
+        playlist_name = self.current_playlist
+        playlist_data = self.playlists[playlist_name].to_record()
+        digests = self.core.known_digests(media["path"] for media in playlist_data["files"])
+        
+        def task(progress):
+            return export_to_zip(playlist_name, playlist_data, zip_path, progress,
+                                 workers=self.settings["transfer_workers"],
+                                 stat=self.core.media_index.stat, digests=digests)
+        
+        def done(exported_files, error, progress):
+            if error:
+                messagebox.showerror("Erro", f"Falha ao exportar a playlist:\n{error}")
+            elif not exported_files:
+                messagebox.showwarning("Aviso", "Nenhum arquivo foi exportado!"
+                                       + self.transfer_errors_text(progress))
+            else:
+                messagebox.showinfo("Sucesso", f"Playlist exportada para:\n{zip_path}"
+                                    + self.transfer_errors_text(progress))
         
-        messagebox.showinfo("Sucesso", f"Playlist exportada para:\n{export_folder}")
+        self.run_transfer("Exportando Playlist", task, done)
 
     def import_playlist(self):
         folder_path = filedialog.askdirectory(title="Selecione a pasta com a playlist exportada")
         if not folder_path:
             return
-            
-        config_path = os.path.join(folder_path, "playlist_config.json")
-        if not os.path.exists(config_path):
-            messagebox.showerror("Erro", "Arquivo de configuração não encontrado!")
+        
+        workers = self.settings["transfer_workers"]
+        # refresh_path: stat real, que já fica no índice para as mídias importadas
+        stat = self.core.media_index.refresh_path
+        self.run_transfer("Importando Playlist",
+                          lambda progress: read_export_folder(folder_path, workers, stat),
+                          self.finish_import)
+
+    def import_playlist_zip(self):
+        zip_path = filedialog.askopenfilename(title="Selecione a playlist exportada",
+                                              filetypes=[("Arquivo zip", "*.zip")])
+        if not zip_path:
             return
-            
-        try:
-            with open(config_path, 'r') as f:
-                import_data = json.load(f)
-        except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível ler o arquivo de configuração:\n{e}")
+        
+        library_dir = self.settings["library_dir"]
+        stat = self.core.media_index.refresh_path
+        self.run_transfer("Importando Playlist",
+                          lambda progress: import_from_zip(zip_path, library_dir, progress, stat),
+                          self.finish_import)
+
+    def finish_import(self, result, error, progress):
+        if isinstance(error, json.JSONDecodeError):
+            messagebox.showerror("Erro", f"Não foi possível ler o arquivo de configuração:\n{error}")
             return
-            
-        if "playlist" not in import_data or "files" not in import_data["playlist"]:
-            messagebox.showerror("Erro", "Formato de arquivo inválido!")
+        if isinstance(error, (FileNotFoundError, ValueError)):
+            messagebox.showerror("Erro", str(error))
+            return
+        if error:
+            messagebox.showerror("Erro", f"Falha ao importar a playlist:\n{error}")
             return
-            
-        playlist_name = import_data.get("metadata", {}).get("playlist_name", 
-                  f"importada_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-        
-        base_name = playlist_name
-        counter = 1
-        while playlist_name in self.playlists:
-            playlist_name = f"{base_name}_{counter}"
-            counter += 1
-            
-        imported_files = []
-        for media in import_data["playlist"]["files"]:
-            if isinstance(media, dict):
-                filename = media["path"]
-                file_path = os.path.join(folder_path, filename)
-                
-                if os.path.exists(file_path):
-                    imported_files.append({
-                        "path": file_path,
-                        "time": media.get("time", "00:00"),
-                        "repeats": media.get("repeats", 1)
-                    })
-            else:
-                file_path = os.path.join(folder_path, media)
-                if os.path.exists(file_path):
-                    imported_files.append(file_path)
         
+        import_data, imported_files = result
         if not imported_files:
             messagebox.showwarning("Aviso", "Nenhum arquivo válido encontrado na importação!")
             return
             
-        self.playlists[playlist_name] = {
-            "files": imported_files,
-            "time": import_data["playlist"].get("time", "00:00"),
-            "repeats": import_data["playlist"].get("repeats", 1),
-            "active": True
-        }
+        playlist_name = import_data.get("metadata", {}).get("playlist_name", 
+                  f"importada_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
         
+        playlist_name = self.core.add_playlist(
+            playlist_name, Playlist.from_record(import_record(import_data, imported_files)))
         self.update_playlist_display()
-        self.save_playlists()
         
-        items = self.playlist_tree.get_children()
-        for item in items:
-            if self.playlist_tree.item(item, 'text') == playlist_name:
-                self.playlist_tree.selection_set(item)
-                self.playlist_tree.focus(item)
-                self.show_media()
-                break
+        item = self.tree_items.get(playlist_name)
+        if item is not None:
+            self.playlist_tree.selection_set(item)
+            self.playlist_tree.focus(item)
+            self.show_media()
 
     def show_media(self, event=None):
-        for widget in self.media_container.winfo_children():
-            widget.destroy()
-        
         selection = self.playlist_tree.selection()
         if not selection:
+            self.media_list.clear()
             return
             
         playlist_name = self.playlist_tree.item(selection[0], 'text')
         self.current_playlist = playlist_name
         
-        for idx, media in enumerate(self.playlists[playlist_name]["files"]):
-            media_frame = tk.Frame(self.media_container, bg='#333333')
-            media_frame.pack(fill=tk.X, pady=2, padx=2)
-            
-            if isinstance(media, dict):
-                path = media["path"]
-                media_time = media.get("time", "00:00")
-                repeats = media.get("repeats", 1)
-            else:
-                path = media
-                media_time = "00:00"
-                repeats = 1
-                
-            file_name = os.path.basename(path)
-            
-            tk.Label(media_frame, text=file_name, bg='#333333', fg='white',
-                    font=('Arial', 10), anchor='w', width=40).pack(side=tk.LEFT, padx=5)
-            
-            tk.Label(media_frame, text=f"{media_time} | Repetir: {repeats}", 
-                    bg='#333333', fg='white', font=('Arial', 8)).pack(side=tk.LEFT, padx=5)
-            
-            tk.Button(media_frame, text="⚙", bg='#4CAF50', fg='white',
-                    font=('Arial', 10), bd=0, width=2, height=1,
-                    command=lambda i=idx: self.config_media(i)).pack(side=tk.RIGHT, padx=5)
-            
-            tk.Button(media_frame, text="►", bg='#2196F3', fg='white',
-                    font=('Arial', 10), bd=0, width=2, height=1,
-                    command=lambda i=idx: self.select_media(i)).pack(side=tk.RIGHT, padx=2)
+        with self.core.metrics.time("ui_show_media_seconds", "Tempo para exibir as mídias"):
+            self.media_list.set_items(self.media_row(media)
+                                      for media in self.playlists[playlist_name].files)
+
+    def media_row(self, media):
+        path = media.path
+        detail = f"{media.time or '--:--'} | Repetir: {media.repeats}"
+        if media.rule is not None:
+            detail += " | Recorrente"
+        info = self.core.ingestor.info.get(path)
+        if not self.core.media_index.exists(path):
+            detail += " | AUSENTE"
+        elif info and not info.get("ok"):
+            detail += " | ERRO"
+        elif info and "duration" in info:
+            minutes, seconds = divmod(int(round(info["duration"])), 60)
+            detail += f" | {minutes}:{seconds:02d}"
+        return os.path.basename(path), detail
+
+    def refresh_media_row(self, media_index):
+        media = self.playlists[self.current_playlist].files[media_index]
+        self.media_list.update_row(media_index, self.media_row(media))
 
     def select_media(self, media_index):
         self.current_media_index = media_index
@@ -522,32 +735,20 @@ class PlayerInterface:
         if repeats is None:
             return
             
-        media = self.playlists[self.current_playlist]["files"][self.current_media_index]
-        path = media["path"] if isinstance(media, dict) else media
-        self.play_media(path, repeats)
-        
-        if isinstance(media, dict):
-            self.playlists[self.current_playlist]["files"][self.current_media_index]["repeats"] = repeats
-        else:
-            self.playlists[self.current_playlist]["files"][self.current_media_index] = {
-                "path": path,
-                "time": "00:00",
-                "repeats": repeats
-            }
-        
-        self.show_media()
-        self.save_playlists()
+        self.core.queue_media(self.current_playlist, self.current_media_index, repeats,
+                              self.settings["manual_priority"], source="manual")
+        self.core.set_media_repeats(self.current_playlist, self.current_media_index, repeats)
+        self.refresh_media_row(self.current_media_index)
 
     def config_media(self, media_index):
         if not self.current_playlist:
             return
             
-        media = self.playlists[self.current_playlist]["files"][media_index]
-        is_dict = isinstance(media, dict)
+        media = self.playlists[self.current_playlist].files[media_index]
         
         config_window = tk.Toplevel(self.root)
         config_window.title("Configurar Mídia")
-        config_window.geometry("300x200")
+        config_window.geometry("300x260")
         config_window.configure(bg='#222222')
         
         frame = tk.Frame(config_window, bg='#222222')
@@ -556,18 +757,17 @@ class PlayerInterface:
         tk.Label(frame, text="Horário (HH:MM):", bg='#222222', fg='white').pack()
         time_entry = tk.Entry(frame, bg='#333333', fg='white', insertbackground='white')
         time_entry.pack(pady=5)
-        if is_dict:
-            time_entry.insert(0, media.get("time", "00:00"))
-        else:
-            time_entry.insert(0, "00:00")
+        time_entry.insert(0, media.time or "00:00")
         
         tk.Label(frame, text="Repetições:", bg='#222222', fg='white').pack()
         repeat_entry = tk.Entry(frame, bg='#333333', fg='white', insertbackground='white')
         repeat_entry.pack(pady=5)
-        if is_dict:
-            repeat_entry.insert(0, str(media.get("repeats", 1)))
-        else:
-            repeat_entry.insert(0, "1")
+        repeat_entry.insert(0, str(media.repeats))
+        
+        tk.Label(frame, text="Prioridade:", bg='#222222', fg='white').pack()
+        priority_entry = tk.Entry(frame, bg='#333333', fg='white', insertbackground='white')
+        priority_entry.pack(pady=5)
+        priority_entry.insert(0, str(media.priority or 0))
         
         def save_config():
             time_str = time_entry.get()
@@ -586,16 +786,15 @@ class PlayerInterface:
             except ValueError:
                 messagebox.showerror("Erro", "Repetições deve ser um número inteiro positivo!")
                 return
-                
-            path = media["path"] if is_dict else media
-            self.playlists[self.current_playlist]["files"][media_index] = {
-                "path": path,
-                "time": time_str,
-                "repeats": repeats
-            }
             
-            self.show_media()
-            self.save_playlists()
+            try:
+                priority = int(priority_entry.get())
+            except ValueError:
+                messagebox.showerror("Erro", "Prioridade deve ser um número inteiro!")
+                return
+                
+            self.core.configure_media(self.current_playlist, media_index, time_str, repeats, priority)
+            self.refresh_media_row(media_index)
             config_window.destroy()
         
         tk.Button(frame, text="Salvar", command=save_config, 
@@ -604,9 +803,8 @@ class PlayerInterface:
     def create_playlist(self):
         name = simpledialog.askstring("Nova Playlist", "Nome da playlist:")
         if name:
-            self.playlists[name] = {"files": [], "time": "00:00", "repeats": 1, "active": True}
+            self.core.create_playlist(name)
             self.update_playlist_display()
-            self.save_playlists()
 
     def add_media(self):
         if not self.current_playlist:
@@ -619,32 +817,56 @@ class PlayerInterface:
         )
         
         if files:
-            for file_path in files:
-                self.playlists[self.current_playlist]["files"].append({
-                    "path": file_path,
-                    "time": "00:00",
-                    "repeats": 1
-                })
-            
-            self.show_media()
-            self.save_playlists()
+            self.core.add_media(self.current_playlist, files)
+            new_media = self.playlists[self.current_playlist].files[-len(files):]
+            self.media_list.append_rows(self.media_row(media) for media in new_media)
 
     def update_playlist_display(self):
-        for item in self.playlist_tree.get_children():
-            self.playlist_tree.delete(item)
+        # Aplica só as diferenças entre self.playlists e a árvore, sem recriar os itens
+        for name in [name for name in self.tree_items if name not in self.playlists]:
+            self.playlist_tree.delete(self.tree_items.pop(name))
+            self.tree_status.pop(name, None)
         
         for name, data in self.playlists.items():
-            status = "ON" if data.get("active", True) else "OFF"
-            status_icon = self.on_icon if data.get("active", True) else self.off_icon
-            
-            item = self.playlist_tree.insert("", "end", text=name, values=(status), image=status_icon)
+            status = "ON" if data.active else "OFF"
+            if name in self.core.missing_scheduled:
+                # Alguma mídia agendada desta playlist não foi encontrada
+                status += " ⚠"
+            status_icon = self.on_icon if data.active else self.off_icon
             
-            self.playlist_tree.tag_bind(item, '<Button-1>', 
-                                      lambda e, n=name: self.toggle_playlist_status(n) if self.playlist_tree.identify_column(e.x) == '#2' else None)
+            item = self.tree_items.get(name)
+            if item is None:
+                self.tree_items[name] = self.playlist_tree.insert("", "end", text=name, values=(status,),
+                                                                  image=status_icon)
+            elif self.tree_status.get(name) != status:
+                self.playlist_tree.item(item, values=(status,), image=status_icon)
+            self.tree_status[name] = status
+        
+        order = list(self.tree_items)
+        if order != list(self.playlists):
+            for position, name in enumerate(self.playlists):
+                self.playlist_tree.move(self.tree_items[name], "", position)
+            self.tree_items = {name: self.tree_items[name] for name in self.playlists}
+
+    def rename_tree_item(self, old_name, new_name):
+        item = self.tree_items.get(old_name)
+        if item is None:
+            return
+        # Mantém a posição do item no mapa, que espelha a ordem atual da árvore
+        self.tree_items = {new_name if name == old_name else name: iid
+                           for name, iid in self.tree_items.items()}
+        self.tree_status[new_name] = self.tree_status.pop(old_name, None)
+        self.playlist_tree.item(item, text=new_name)
+
+    def on_tree_click(self, event):
+        if self.playlist_tree.identify_column(event.x) != '#1':
+            return
+        item = self.playlist_tree.identify_row(event.y)
+        if item:
+            self.toggle_playlist_status(self.playlist_tree.item(item, 'text'))
 
     def on_closing(self):
-        self.save_playlists()
-        self.set_spotify_volume(0.8)
+        self.core.shutdown()
         self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import argparse
+import os
+import signal
+import threading
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Agendador e player de anúncios sem interface gráfica")
+    parser.add_argument("--settings", default="player_settings.json",
+                        help="arquivo de configurações (padrão: player_settings.json)")
+    parser.add_argument("--playlists", default="playlists.json",
+                        help="arquivo de playlists (padrão: playlists.json)")
+    parser.add_argument("--dummy-audio", action="store_true",
+                        help="usa o driver de áudio \"dummy\" do SDL (sem placa de som)")
+    parser.add_argument("--plan", action="store_true",
+                        help="mostra os anúncios agendados para hoje e sai")
+    parser.add_argument("--publish", metavar="PASTA",
+                        help="publica as playlists na pasta central de sincronização e sai")
+    return parser.parse_args()
+
+
+def print_event(event, *args):
+    if event == "playback":
+        kind, item, message = args
+        if kind == "start":
+            print(f"Tocando: {os.path.basename(item.path)}", flush=True)
+        elif kind == "finish":
+            print(f"Concluído: {os.path.basename(item.path)}", flush=True)
+
+
+def main():
+    args = parse_args()
+    if args.dummy_audio:
+        # Precisa estar definido antes do pygame inicializar o mixer
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    if args.plan:
+        from core import PlayerCore
+        # Só leitura: consultar o plano não pode regravar o arquivo de quem está tocando
+        core = PlayerCore(settings_file=args.settings, playlist_file=args.playlists,
+                          read_only=True)
+        for fire_at, playlist_name, path in core.todays_plan():
+            print(f"{fire_at.strftime('%H:%M')}  {playlist_name}  {os.path.basename(path)}")
+        core.shutdown(save=False)
+        return 0
+
+    if args.publish:
+        from core import PlayerCore
+        from transfer import TransferProgress
+        core = PlayerCore(settings_file=args.settings, playlist_file=args.playlists)
+        progress = TransferProgress()
+        published = core.publish_playlists(args.publish, progress)
+        for path, message in progress.errors:
+            print(f"Erro ao copiar {path}: {message}")
+        print(f"{len(published)} playlist(s) publicada(s) em {args.publish} "
+              f"({progress.files_total} arquivo(s) copiado(s))")
+        # Os IDs novos já foram gravados playlist a playlist; não regrava o resto
+        core.shutdown(save=False)
+        return 1 if progress.errors else 0
+
+    import pygame
+    from core import PlayerCore
+
+    core = PlayerCore(settings_file=args.settings, playlist_file=args.playlists)
+    try:
+        core.open_audio()
+    except pygame.error as e:
+        print(f"Não foi possível inicializar o áudio: {e}")
+        core.shutdown()
+        return 1
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+    core.add_listener(print_event)
+    core.start()
+    print(f"{len(core.playlists)} playlist(s) carregada(s); aguardando horários", flush=True)
+    while not stopping.wait(1):
+        pass
+    print("Encerrando...", flush=True)
+    core.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,39 @@
+import glob
+import os
+import tkinter as tk
+
+
+def scaled_image_path(src_path, size, cache_dir="cache"):
+    # A cópia redimensionada leva o mtime do original no nome: trocar o logo invalida o cache
+    width, height = size
+    name = os.path.splitext(os.path.basename(src_path))[0]
+    prefix = os.path.join(cache_dir, f"{name}_{width}x{height}_")
+    cached = f"{prefix}{os.stat(src_path).st_mtime_ns}.png"
+    if os.path.exists(cached):
+        return cached
+
+    from PIL import Image
+    os.makedirs(cache_dir, exist_ok=True)
+    part_path = f"{cached}.part"
+    with Image.open(src_path) as img:
+        img.resize(size, Image.LANCZOS).save(part_path, "PNG")
+    os.replace(part_path, cached)
+    for stale in glob.glob(f"{glob.escape(prefix)}*.png"):
+        if stale != cached:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return cached
+
+
+def load_scaled_image(src_path, size, cache_dir="cache"):
+    # O Tk lê PNG direto; o PIL só é carregado quando o cache precisa ser refeito
+    return tk.PhotoImage(file=scaled_image_path(src_path, size, cache_dir))
+
+
+def solid_icon(color, size=(24, 24)):
+    width, height = size
+    image = tk.PhotoImage(width=width, height=height)
+    image.put(color, to=(0, 0, width, height))
+    return image
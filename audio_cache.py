@@ -0,0 +1,117 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from pygame import mixer
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def sound_nbytes(sound):
+    init = mixer.get_init()
+    if not init:
+        return 0
+    frequency, size, channels = init
+    return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+
+class AudioCache:
+    def __init__(self, budget_bytes=256 * 1024 * 1024, signature=file_signature):
+        self.budget_bytes = budget_bytes
+        # Com o MediaIndex do core, a assinatura vem do stat em cache em vez de um os.stat por get
+        self.signature = signature
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_lock = threading.Lock()
+        self._prefetcher = None
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._entries
+
+    def get(self, path):
+        signature = self.signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or signature is None or entry[1] != signature:
+                if entry is not None:
+                    self._drop(path)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+
+    def load(self, path):
+        sound = self.get(path)
+        if sound is not None:
+            return sound
+        signature = self.signature(path)
+        if signature is None:
+            raise FileNotFoundError(path)
+        sound = mixer.Sound(path)
+        self._store(path, sound, signature)
+        return sound
+
+    def invalidate(self, path):
+        with self._lock:
+            self._drop(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def prefetch(self, paths):
+        with self._prefetch_lock:
+            for path in paths:
+                self._prefetch_queue.put(path)
+            if self._prefetcher is None:
+                self._prefetcher = threading.Thread(target=self._prefetch_loop,
+                                                    name="audio-prefetch", daemon=True)
+                self._prefetcher.start()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._prefetch_lock:
+                try:
+                    path = self._prefetch_queue.get_nowait()
+                except queue.Empty:
+                    self._prefetcher = None
+                    return
+            signature = self.signature(path)
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[1] == signature:
+                    continue
+            try:
+                self.load(path)
+            except Exception as e:
+                print(f"Erro ao pré-carregar {path}: {e}")
+
+    def _store(self, path, sound, signature):
+        nbytes = sound_nbytes(sound)
+        if nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            self._drop(path)
+            while self._entries and self.used_bytes + nbytes > self.budget_bytes:
+                self._drop(next(iter(self._entries)))
+            self._entries[path] = (sound, signature, nbytes)
+            self.used_bytes += nbytes
+
+    def _drop(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.used_bytes -= entry[2]
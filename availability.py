@@ -0,0 +1,203 @@
+import os
+import threading
+from collections import namedtuple
+
+MediaStat = namedtuple("MediaStat", "exists size mtime")
+MISSING = MediaStat(False, None, None)
+
+
+def stat_path(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return MISSING
+    return MediaStat(True, st.st_size, st.st_mtime_ns)
+
+
+def folder_of(path):
+    # Mesma forma para os caminhos das playlists e os que chegam do watchdog ("C:/x" e "c:\\x")
+    return os.path.normcase(os.path.abspath(os.path.dirname(path)))
+
+
+class MediaIndex:
+    # Cache de os.stat por caminho compartilhado por agendador, ingestão, cache de áudio e
+    # exportação. Uma thread revalida tudo a cada `interval` segundos e, com o watchdog instalado,
+    # também logo depois de uma mudança numa pasta acompanhada.
+
+    def __init__(self, interval=60, on_change=None, watch=True):
+        self.interval = interval
+        self.on_change = on_change
+        self.watch = watch
+        self._stats = {}
+        # Caminhos acompanhados por grupo (uma playlist) e quantos grupos usam cada caminho/pasta
+        self._groups = {}
+        self._tracked = {}
+        self._folders = {}
+        self._dirty_dirs = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._observer = None
+        self._handler = None
+        self._watches = {}
+        self._thread = threading.Thread(target=self._run, name="media-index", daemon=True)
+
+    # Consultas
+
+    def stat(self, path):
+        st = self._stats.get(path)
+        if st is None:
+            st = stat_path(path)
+            with self._lock:
+                self._stats[path] = st
+        return st
+
+    def exists(self, path):
+        return self.stat(path).exists
+
+    def signature(self, path):
+        # Um arquivo dado como ausente é conferido de novo: pode ter voltado antes da varredura
+        st = self.stat(path)
+        if not st.exists:
+            st = self.refresh_path(path)
+        return (st.mtime, st.size) if st.exists else None
+
+    def missing(self, paths):
+        return [path for path in paths if not self.exists(path)]
+
+    # Atualização
+
+    def track(self, group, paths):
+        # Troca só os caminhos de um grupo: editar uma playlist não percorre a biblioteca toda
+        paths = set(paths)
+        with self._lock:
+            old = self._groups.pop(group, set())
+            if paths:
+                self._groups[group] = paths
+            added = [path for path in paths - old if self._ref(path, 1) == 1]
+            # Mídias que saíram das playlists deixam o cache; consultas avulsas continuam nele
+            removed = [path for path in old - paths if self._ref(path, -1) == 0]
+            for path in removed:
+                self._stats.pop(path, None)
+        for path in added:
+            self.stat(path)
+        if self._observer is not None and (added or removed):
+            self._update_watches()
+
+    def untrack(self, group):
+        self.track(group, ())
+
+    def _ref(self, path, delta):
+        count = self._tracked.get(path, 0) + delta
+        folder = folder_of(path)
+        folder_count = self._folders.get(folder, 0) + delta
+        if count:
+            self._tracked[path] = count
+        else:
+            del self._tracked[path]
+        if folder_count:
+            self._folders[folder] = folder_count
+        else:
+            del self._folders[folder]
+        return count
+
+    def refresh_path(self, path):
+        st = stat_path(path)
+        with self._lock:
+            self._stats[path] = st
+        return st
+
+    def invalidate(self, path):
+        with self._lock:
+            self._stats.pop(path, None)
+
+    def rescan(self, paths=None):
+        if paths is None:
+            with self._lock:
+                paths = list(self._tracked.keys() | self._stats.keys())
+        changed = []
+        for path in paths:
+            old = self._stats.get(path)
+            st = self.refresh_path(path)
+            if old is not None and old != st:
+                changed.append(path)
+        if changed and self.on_change is not None:
+            try:
+                self.on_change(changed)
+            except Exception as e:
+                print(f"Erro ao tratar mudança de mídias: {e}")
+        return changed
+
+    # Thread de varredura
+
+    def start(self):
+        if self.watch:
+            self._start_observer()
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+            self._observer = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            with self._lock:
+                dirty, self._dirty_dirs = self._dirty_dirs, set()
+                paths = list(self._tracked.keys() | self._stats.keys())
+            if woken and dirty:
+                # Notificação do sistema de arquivos: revalida só as pastas que mudaram
+                self.rescan([path for path in paths if folder_of(path) in dirty])
+                continue
+            self.rescan(paths)
+            if self._observer is not None:
+                # Tenta de novo as pastas que não existiam na última vez
+                self._update_watches()
+
+    def _mark_dirty(self, *paths):
+        with self._lock:
+            self._dirty_dirs.update(folder_of(path) for path in paths if path)
+        self._wake.set()
+
+    def _start_observer(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return
+        index = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                index._mark_dirty(event.src_path, getattr(event, "dest_path", None))
+
+        self._handler = Handler()
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.start()
+        self._update_watches()
+
+    def _update_watches(self):
+        with self._lock:
+            folders = set(self._folders)
+        for folder in set(self._watches) - folders:
+            try:
+                self._observer.unschedule(self._watches.pop(folder))
+            except KeyError:
+                pass
+        for folder in folders - set(self._watches):
+            try:
+                self._watches[folder] = self._observer.schedule(self._handler, folder,
+                                                                recursive=False)
+            except OSError:
+                # Pasta inexistente (pendrive removido, etc.): fica só com a varredura periódica
+                pass
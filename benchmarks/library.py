@@ -0,0 +1,69 @@
+import os
+import random
+import wave
+
+from model import Media, Playlist
+from recurrence import Rule
+
+
+def parse_size(spec):
+    # "10000x500" -> 10000 mídias distribuídas em 500 playlists
+    media_count, _, playlist_count = spec.partition("x")
+    return int(media_count), int(playlist_count or 1)
+
+
+def synthetic_paths(count):
+    # Caminhos no formato das lojas; os arquivos não precisam existir para agendador e persistência
+    return [f"C:/Users/loja/Music/anuncios/campanha_{i // 50:03d}/clip_{i:06d}.mp3"
+            for i in range(count)]
+
+
+def generate_library(media_count, playlist_count, paths=None, seed=0, scheduled_ratio=0.3,
+                     rule_ratio=0.1):
+    rng = random.Random(seed)
+    paths = paths or synthetic_paths(min(media_count, 5000))
+    playlists = {}
+    for p in range(playlist_count):
+        # Distribui as mídias por igual; as primeiras playlists ficam com a sobra
+        count = media_count // playlist_count + (1 if p < media_count % playlist_count else 0)
+        files = []
+        for _ in range(count):
+            minutes = rng.randrange(24 * 60) if rng.random() < scheduled_ratio else None
+            files.append(Media(paths[rng.randrange(len(paths))], minutes=minutes,
+                               repeats=rng.randint(1, 3)))
+        rule = None
+        if rng.random() < rule_ratio:
+            rule = Rule(days=rng.randrange(1, 128), every=rng.choice((15, 30, 60)),
+                        until=rng.randrange(12 * 60, 22 * 60))
+        playlists[f"playlist_{p:05d}"] = Playlist(files, minutes=rng.randrange(24 * 60),
+                                                  active=rng.random() < 0.9, rule=rule)
+    return playlists
+
+
+def write_audio_files(folder, count, seconds=0.5, frequency=44100):
+    # WAVs de silêncio: o mixer (inclusive o driver "dummy") carrega sem decodificador extra
+    os.makedirs(folder, exist_ok=True)
+    frames = b"\0\0\0\0" * int(seconds * frequency)
+    paths = []
+    for i in range(count):
+        path = os.path.abspath(os.path.join(folder, f"clip_{i:04d}.wav"))
+        with wave.open(path, 'wb') as out:
+            out.setnchannels(2)
+            out.setsampwidth(2)
+            out.setframerate(frequency)
+            out.writeframes(frames)
+        paths.append(path)
+    return paths
+
+
+def write_blob_files(folder, count, size_bytes, seed=0):
+    # Conteúdo aleatório (não comprime): exportação e importação pagam a cópia inteira
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.abspath(os.path.join(folder, f"blob_{i:04d}.mp3"))
+        with open(path, 'wb') as f:
+            f.write(rng.randbytes(size_bytes))
+        paths.append(path)
+    return paths
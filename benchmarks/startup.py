@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_FILE = "startup_result.json"
+BENCH_SETTINGS = {"ducking_backend": "null", "ingest_workers": 1}
+
+
+def child(mode):
+    # Roda num processo novo para medir importações a frio; t0 é tomado antes de importar qualquer módulo do app
+    t0 = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    result = {}
+    if mode == "daemon":
+        from core import PlayerCore
+        core = PlayerCore()
+        core.open_audio()
+        core.start()
+        core.armed.wait(30)
+        result["armed"] = core.armed_at - t0
+        core.shutdown()
+    else:
+        import tkinter as tk
+        from anuncio import PlayerInterface
+        root = tk.Tk()
+        app = PlayerInterface(root)
+        deadline = time.perf_counter() + 30
+        while not app.core.armed.is_set() and time.perf_counter() < deadline:
+            root.update()
+            time.sleep(0.005)
+        result["window"] = app.startup_marks["window"] - t0
+        result["armed"] = app.core.armed_at - t0
+        app.on_closing()
+    # Vai para um arquivo: avisos das threads do app podem se misturar à saída padrão
+    with open(RESULT_FILE, 'w') as f:
+        json.dump(result, f)
+
+
+def prepare_workdir(workdir):
+    for name in ("playlists.json", "playlists.db"):
+        src = os.path.join(ROOT, name)
+        if os.path.exists(src):
+            shutil.copy2(src, workdir)
+    shutil.copytree(os.path.join(ROOT, "logo"), os.path.join(workdir, "logo"))
+    settings = dict(BENCH_SETTINGS)
+    src = os.path.join(ROOT, "player_settings.json")
+    if os.path.exists(src):
+        with open(src, 'r') as f:
+            settings = dict(json.load(f), **BENCH_SETTINGS)
+    with open(os.path.join(workdir, "player_settings.json"), 'w') as f:
+        json.dump(settings, f)
+
+
+def run(mode, runs):
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy")
+    samples = []
+    # O mesmo diretório para todas as rodadas: a primeira é a frio (sem cache de imagens), as outras não
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_workdir(workdir)
+        for _ in range(runs):
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode],
+                                  cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.PIPE, text=True)
+            if proc.returncode != 0:
+                print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode)
+                return None
+            with open(os.path.join(workdir, RESULT_FILE), 'r') as f:
+                samples.append(json.load(f))
+    return samples
+
+
+def report(mode, samples):
+    print(f"[{mode}] {len(samples)} rodada(s)")
+    for key, label in (("window", "primeira janela"), ("armed", "agendador armado")):
+        values = [sample[key] * 1000 for sample in samples if key in sample]
+        if not values:
+            continue
+        warm = values[1:] or values
+        print(f"  {label:18s} frio {values[0]:8.1f} ms | mediana {statistics.median(warm):8.1f} ms"
+              f" | máx {max(warm):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do player")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=("gui", "daemon", "all"), default="all")
+    parser.add_argument("--child", choices=("gui", "daemon"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+    for mode in (("daemon", "gui") if args.mode == "all" else (args.mode,)):
+        samples = run(mode, args.runs)
+        if samples is None:
+            print(f"[{mode}] não foi possível executar")
+        else:
+            report(mode, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from library import (generate_library, parse_size, write_audio_files,  # noqa: E402
+                     write_blob_files)
+from model import Media, Playlist, dump_playlists  # noqa: E402
+
+RESULT_FILE = "suite_result.json"
+DEFAULT_SIZES = ("100x10", "10000x500", "100000x5000")
+BENCH_SETTINGS = {"ducking_backend": "null", "ingest_workers": 1, "trigger_file": None,
+                  "media_watch": False}
+BENCHES = ("scheduler", "search", "storage", "transfer", "render", "latency")
+SEARCH_LIMIT = 500
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"seconds": min(samples), "median": statistics.median(samples), "runs": repeat}
+
+
+def result(name, size, timing, **extra):
+    return dict({"name": name, "size": size}, **timing, **extra)
+
+
+# Agendador: reconstrução do índice e um dia inteiro de check_schedules (pop_due + prévia)
+
+def bench_scheduler(playlists, size, repeat):
+    from scheduler import ScheduleIndex
+    entries = len(playlists) + sum(len(data.files) for data in playlists.values())
+    midnight = datetime.combine(date.today(), datetime.min.time())
+    results = []
+
+    index = ScheduleIndex()
+    results.append(result("scheduler.rebuild", size,
+                          measure(lambda: index.rebuild(playlists, midnight), repeat),
+                          items=entries))
+
+    fired = []
+
+    def simulate_day():
+        # Um passo por minuto, como o loop do core: eventos devidos e pré-carga dos próximos 5 min
+        index.rebuild(playlists, midnight)
+        fired.clear()
+        for minute in range(24 * 60):
+            now = midnight + timedelta(minutes=minute, seconds=1)
+            due, missed = index.pop_due(now)
+            fired.append(len(due) + len(missed))
+            index.upcoming(now + timedelta(minutes=5))
+
+    timing = measure(simulate_day, repeat)
+    results.append(result("scheduler.day", size, timing, items=sum(fired),
+                          per_tick_us=round(timing["seconds"] / (24 * 60) * 1e6, 2)))
+    index.rebuild(playlists, midnight)
+    results.append(result("scheduler.plan", size, measure(lambda: index.plan(date.today()), repeat)))
+    return results
+
+
+# Busca: construção do índice, digitação letra a letra de um nome, janela de horário e edição
+
+def bench_search(playlists, size, repeat):
+    from search import SearchIndex
+    results = []
+    index = SearchIndex()
+    results.append(result("search.rebuild", size, measure(lambda: index.rebuild(playlists), repeat),
+                          items=len(index)))
+    name, data = next((name, data) for name, data in playlists.items() if data.files)
+    typed = os.path.basename(data.files[-1].path)
+    found = []
+
+    def type_name():
+        found.clear()
+        for end in range(1, len(typed) + 1):
+            found.append(len(index.search(typed[:end], limit=SEARCH_LIMIT)))
+
+    timing = measure(type_name, repeat)
+    results.append(result("search.keystrokes", size, timing, items=len(typed),
+                          per_key_ms=round(timing["seconds"] / len(typed) * 1000, 3),
+                          last_hits=found[-1]))
+    results.append(result("search.window", size,
+                          measure(lambda: index.search("clip", 9 * 60, 9 * 60 + 30, True,
+                                                       SEARCH_LIMIT), repeat)))
+    media = data.files[0]
+    results.append(result("search.update_media", size,
+                          measure(lambda: index.update_media(name, 0, media), repeat)))
+    return results
+
+
+# Persistência: ida e volta completa e a edição de uma mídia em cada backend
+
+def bench_storage(playlists, size, repeat, workdir):
+    from storage import JsonPlaylistStore, SqlitePlaylistStore
+    results = []
+    name = next((name for name, data in playlists.items() if data.files), None)
+    for backend in ("json", "sqlite"):
+        path = os.path.join(workdir, f"bench_playlists.{'json' if backend == 'json' else 'db'}")
+
+        def open_store():
+            if backend == "json":
+                return JsonPlaylistStore(path)
+            return SqlitePlaylistStore(path, import_from=None)
+
+        store = open_store()
+        results.append(result(f"storage.{backend}.save_all", size,
+                              measure(lambda: store.save_all(playlists), repeat),
+                              bytes=os.path.getsize(path)))
+
+        def load():
+            loaded = open_store()
+            loaded.load()
+            loaded.close()
+
+        results.append(result(f"storage.{backend}.load", size, measure(load, repeat)))
+        if name is not None:
+            results.append(result(f"storage.{backend}.save_media", size,
+                                  measure(lambda: store.save_media(playlists, name, 0), repeat)))
+        store.close()
+    return results
+
+
+# Exportação e importação (pasta e zip) de uma playlist com arquivos reais
+
+def bench_transfer(workdir, file_count, file_mb, repeat):
+    from transfer import (TransferProgress, export_to_folder, export_to_zip, import_from_zip,
+                          read_export_folder)
+    paths = write_blob_files(os.path.join(workdir, "transfer_src"), file_count,
+                             int(file_mb * 1024 * 1024))
+    playlist_data = {"time": "08:00", "repeats": 1, "active": True,
+                     "files": [{"path": path, "time": None, "repeats": 1} for path in paths]}
+    total_mb = file_count * file_mb
+    size = f"{file_count}x{file_mb}MB"
+    results = []
+    runs = iter(range(10 ** 6))
+
+    def fresh(kind):
+        target = os.path.join(workdir, f"transfer_{kind}_{next(runs)}")
+        os.makedirs(target)
+        return target
+
+    def export_folder():
+        export_to_folder("bench", playlist_data, fresh("folder"), TransferProgress(), resume=False)
+
+    def export_zip():
+        export_to_zip("bench", playlist_data, os.path.join(fresh("zip"), "bench.zip"),
+                      TransferProgress())
+
+    folder = fresh("folder")
+    export_to_folder("bench", playlist_data, folder, TransferProgress(), resume=False)
+    zip_path = os.path.join(fresh("zip"), "bench.zip")
+    export_to_zip("bench", playlist_data, zip_path, TransferProgress())
+
+    for name, fn in (("transfer.export_folder", export_folder),
+                     ("transfer.export_zip", export_zip),
+                     ("transfer.import_zip",
+                      lambda: import_from_zip(zip_path, fresh("library"), TransferProgress()))):
+        timing = measure(fn, repeat)
+        results.append(result(name, size, timing,
+                              mb_per_s=round(total_mb / timing["seconds"], 1) if timing["seconds"] else None))
+    # Importar de uma pasta não copia nada: só lê a configuração e confere os arquivos
+    results.append(result("transfer.import_folder", size,
+                          measure(lambda: read_export_folder(os.path.join(folder, "export_bench")),
+                                  repeat), items=file_count))
+    return results
+
+
+# Processos filhos: interface Tk e latência de reprodução rodam isolados, como em startup.py
+
+def child_render():
+    import tkinter as tk
+    from anuncio import PlayerInterface
+    root = tk.Tk()
+    t0 = time.perf_counter()
+    app = PlayerInterface(root)
+    # Sem áudio: a medição é só da interface
+    root.unbind("<Map>")
+    root.update_idletasks()
+    construct = time.perf_counter() - t0
+
+    for name in list(app.tree_items):
+        app.playlist_tree.delete(app.tree_items.pop(name))
+    app.tree_status.clear()
+    t0 = time.perf_counter()
+    app.update_playlist_display()
+    root.update_idletasks()
+    tree = time.perf_counter() - t0
+
+    largest = max(app.playlists, key=lambda name: len(app.playlists[name].files))
+    app.playlist_tree.selection_set(app.tree_items[largest])
+    t0 = time.perf_counter()
+    app.show_media()
+    root.update_idletasks()
+    media_list = time.perf_counter() - t0
+
+    app.core.shutdown()
+    root.destroy()
+    return {"render.construct": construct, "render.tree": tree, "render.media_list": media_list,
+            "largest_playlist": len(app.playlists[largest].files)}
+
+
+def child_latency(samples):
+    # Do horário agendado até o clipe começar a tocar, com o driver "dummy" do SDL. O relógio do
+    # agendador é adiantado para cada horário cair alguns décimos de segundo depois de agora.
+    from core import PlayerCore
+    core = PlayerCore()
+    core.open_audio()
+    started = {}
+    done = threading.Event()
+
+    def on_event(event, *args):
+        if event == "playback" and args[0] == "start":
+            started[args[1].path] = args[1].started_at
+            done.set()
+
+    core.add_listener(on_event)
+    core.start()
+    core.armed.wait(30)
+    playlist_name = next(iter(core.playlists))
+    files = core.playlists[playlist_name].files
+    latencies = []
+    for i in range(samples):
+        media = files[i % len(files)]
+        target = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=2 + i)
+        offset = target - (datetime.now() + timedelta(seconds=0.3 + core.settings["duck_lead_time"]))
+        core.scheduler.clock = lambda: datetime.now() + offset
+        done.clear()
+        started.pop(media.path, None)
+        core.configure_media(playlist_name, i % len(files), target.strftime("%H:%M"), 1)
+        if not done.wait(10) or media.path not in started:
+            continue
+        latencies.append(started[media.path] - (target.timestamp() - offset.total_seconds()))
+        core.configure_media(playlist_name, i % len(files), None, 1)
+        time.sleep(0.6)
+    core.shutdown()
+    return {"latencies": latencies}
+
+
+def child(mode, samples):
+    output = child_render() if mode == "render" else child_latency(samples)
+    with open(RESULT_FILE, 'w') as f:
+        json.dump(output, f)
+
+
+def prepare_child_workdir(workdir, playlists):
+    with open(os.path.join(workdir, "playlists.json"), 'w') as f:
+        json.dump({"schema_version": 2, "playlists": dump_playlists(playlists)}, f)
+    with open(os.path.join(workdir, "player_settings.json"), 'w') as f:
+        json.dump(BENCH_SETTINGS, f)
+    shutil.copytree(os.path.join(ROOT, "logo"), os.path.join(workdir, "logo"))
+
+
+def run_child(mode, workdir, env, samples=0):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                           "--samples", str(samples)],
+                          cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"código {proc.returncode}"
+    with open(os.path.join(workdir, RESULT_FILE), 'r') as f:
+        return json.load(f), None
+
+
+def virtual_display():
+    # Sem DISPLAY, tenta um Xvfb temporário; devolve (env, processo) ou (None, motivo)
+    env = dict(os.environ)
+    if env.get("DISPLAY") or sys.platform == "win32":
+        return env, None
+    if not shutil.which("Xvfb"):
+        return None, "sem DISPLAY e Xvfb não encontrado"
+    display = f":{90 + os.getpid() % 100}"
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x800x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    env["DISPLAY"] = display
+    return env, proc
+
+
+def bench_render(playlists, size, repeat):
+    env, xvfb = virtual_display()
+    if env is None:
+        return [{"name": "render", "size": size, "skipped": xvfb}]
+    samples = []
+    try:
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as workdir:
+                prepare_child_workdir(workdir, playlists)
+                output, error = run_child("render", workdir, env)
+            if output is None:
+                return [{"name": "render", "size": size, "skipped": error}]
+            samples.append(output)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    results = []
+    for name in ("render.construct", "render.tree", "render.media_list"):
+        values = [sample[name] for sample in samples]
+        results.append(result(name, size, {"seconds": min(values),
+                                           "median": statistics.median(values),
+                                           "runs": len(values)},
+                              items=samples[0]["largest_playlist"] if name == "render.media_list"
+                              else len(playlists)))
+    return results
+
+
+def bench_latency(samples):
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy")
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_audio_files(os.path.join(workdir, "audio"), min(samples, 10))
+        playlists = {"latencia": Playlist([Media(path, minutes=None) for path in paths], minutes=None)}
+        prepare_child_workdir(workdir, playlists)
+        output, error = run_child("latency", workdir, env, samples)
+    if output is None:
+        return [{"name": "latency.scheduled_to_start", "size": str(samples), "skipped": error}]
+    values = output["latencies"]
+    if not values:
+        return [{"name": "latency.scheduled_to_start", "size": str(samples),
+                 "skipped": "nenhum clipe tocou"}]
+    return [result("latency.scheduled_to_start", str(samples),
+                   {"seconds": min(values), "median": statistics.median(values), "runs": len(values)},
+                   max=max(values))]
+
+
+# Relatório
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                              capture_output=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def key(entry):
+    return entry["name"], entry["size"]
+
+
+def print_results(results, baseline=None):
+    previous = {key(entry): entry for entry in (baseline or {}).get("results", [])}
+    for entry in results:
+        label = f"{entry['name']:30s} {entry['size']:>12s}"
+        if "skipped" in entry:
+            print(f"{label}  pulado: {entry['skipped']}")
+            continue
+        line = f"{label}  {entry['seconds'] * 1000:10.2f} ms  (mediana {entry['median'] * 1000:.2f})"
+        if entry.get("mb_per_s") is not None:
+            line += f"  {entry['mb_per_s']} MB/s"
+        old = previous.get(key(entry))
+        if old and old.get("seconds"):
+            line += f"  {entry['seconds'] / old['seconds']:.2f}x vs base"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede agendador, busca, persistência, "
+                                                 "transferência, interface e latência de reprodução")
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES),
+                        help="bibliotecas sintéticas MÍDIASxPLAYLISTS (padrão: %(default)s)")
+    parser.add_argument("--bench", nargs="+", choices=BENCHES, default=list(BENCHES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--transfer-files", type=int, default=20)
+    parser.add_argument("--transfer-mb", type=float, default=2.0)
+    parser.add_argument("--latency-samples", type=int, default=5)
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--child", choices=("render", "latency"), help=argparse.SUPPRESS)
+    parser.add_argument("--samples", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.samples)
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for spec in args.sizes:
+            media_count, playlist_count = parse_size(spec)
+            playlists = generate_library(media_count, playlist_count)
+            if "scheduler" in args.bench:
+                results += bench_scheduler(playlists, spec, args.repeat)
+            if "search" in args.bench:
+                results += bench_search(playlists, spec, args.repeat)
+            if "storage" in args.bench:
+                results += bench_storage(playlists, spec, args.repeat, workdir)
+            if "render" in args.bench:
+                results += bench_render(playlists, spec, args.repeat)
+        if "transfer" in args.bench:
+            results += bench_transfer(workdir, args.transfer_files, args.transfer_mb, args.repeat)
+    if "latency" in args.bench:
+        results += bench_latency(args.latency_samples)
+
+    print_results(results, baseline)
+    if args.output:
+        report = {"meta": {"revision": git_revision(), "python": platform.python_version(),
+                           "platform": platform.platform(),
+                           "date": datetime.now().isoformat(timespec="seconds")},
+                  "results": results}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
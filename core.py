@@ -0,0 +1,960 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from availability import MediaIndex
+from ducking import Ducker, create_backend
+from hotreload import PlaylistWatcher
+from ingest import MediaIngestor
+from metrics import MetricsExporter, StallMonitor, create_metrics
+from model import Media, Playlist, dump_playlists, parse_minutes
+from playlog import PlayLog
+from scheduler import ScheduleIndex
+from search import SearchIndex
+from storage import create_store
+from sync import SyncWorker, assign_playlist_id, playlist_id, publish_to_share
+from triggers import TriggerQueue, TriggerServer, TriggerTailer
+
+DEFAULT_SETTINGS = {
+    "catch_up_policy": "fire",
+    "catch_up_max_lateness": 900,
+    "scheduler_max_sleep": 60,
+    "audio_cache_mb": 256,
+    "preload_minutes": 5,
+    "ducking_backend": "pycaw",
+    "ducking_process": "spotify.exe",
+    "duck_level": 0.1,
+    "restore_level": 0.8,
+    "duck_fade_time": 0.5,
+    "restore_fade_time": 5.0,
+    "duck_lead_time": 0.5,
+    "fade_curve": "equal_power",
+    "storage": "json",
+    "playlist_db": "playlists.db",
+    "transfer_workers": 4,
+    "export_resume": True,
+    "library_dir": "biblioteca",
+    "ingest_workers": 2,
+    "media_info_file": "media_info.json",
+    "rendition_dir": "renditions",
+    "transcode_min_mb": 5,
+    "normalize_loudness": True,
+    "target_loudness_dbfs": -18.0,
+    "play_log_file": "play_log.jsonl",
+    "play_log_max_mb": 5,
+    "play_log_retention": 5,
+    "manual_priority": 100,
+    "zones": {"principal": {"volume": 1.0, "pan": [1.0, 1.0], "duck": True}},
+    "asset_cache_dir": "cache",
+    # Arquivo JSONL de gatilhos (opcional, ex.: "gatilhos.jsonl"); None desliga
+    "trigger_file": None,
+    "trigger_offset_file": "gatilhos.offset.json",
+    "trigger_poll_interval": 0.2,
+    "trigger_queue_size": 100,
+    "trigger_http_host": "127.0.0.1",
+    "trigger_http_port": None,
+    "trigger_unix_socket": None,
+    "media_rescan_interval": 60,
+    "media_watch": True,
+    "playlist_reload_interval": 1.0,
+    "metrics_enabled": False,
+    "metrics_file": "metrics.prom",
+    "metrics_interval": 15,
+    "stall_threshold": None,
+    "stall_log_file": "stalls.log",
+    "sync_dir": None,
+    "sync_interval": 300,
+    "sync_state_file": "sync_state.json"
+}
+
+
+def load_settings(settings_file="player_settings.json"):
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file, 'r') as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            print(f"Erro ao carregar configurações: {e}")
+    return settings
+
+
+def find_media(files, clip):
+    if isinstance(clip, int):
+        return clip if 0 <= clip < len(files) else None
+    for index, media in enumerate(files):
+        path = media.path
+        if clip == path or clip == os.path.basename(path):
+            return index
+    return None
+
+
+def init_audio_thread():
+    # As sessões do pycaw usam COM, que precisa ser inicializado em cada thread
+    try:
+        import comtypes
+        comtypes.CoInitialize()
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"Erro ao inicializar COM na thread de áudio: {e}")
+
+
+class PlayerCore:
+    def __init__(self, settings_file="player_settings.json", playlist_file="playlists.json",
+                 read_only=False):
+        self.settings_file = settings_file
+        self.settings = load_settings(settings_file)
+        self.playlist_file = playlist_file
+        # Desligado, self.metrics só devolve instrumentos que não fazem nada
+        self.metrics = create_metrics(self.settings["metrics_enabled"])
+        self.metrics_exporter = None
+        self.stall_monitors = []
+        # read_only: só consulta as playlists (ex.: --plan), sem migrar nem regravar nada
+        self.store = create_store(self.settings["storage"], playlist_file,
+                                  self.settings["playlist_db"], read_only=read_only)
+        self.playlists = self.load_playlists()
+        self.listeners = []
+        # Protege self.playlists e o índice: a GUI edita enquanto a thread do agendador lê
+        self.lock = threading.RLock()
+
+        self.scheduler = ScheduleIndex(catch_up_policy=self.settings["catch_up_policy"],
+                                       max_lateness=self.settings["catch_up_max_lateness"])
+        self.scheduler.rebuild(self.playlists)
+        self.search = SearchIndex()
+        # Construção do índice de busca em segundo plano e playlists alteradas enquanto ela roda
+        self._search_thread = None
+        self._search_dirty = None
+        self._pre_ducked_for = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.play_log = PlayLog(self.settings["play_log_file"],
+                                max_bytes=self.settings["play_log_max_mb"] * 1024 * 1024,
+                                retention=self.settings["play_log_retention"])
+        self.ducker = None
+        self.media_index = MediaIndex(interval=self.settings["media_rescan_interval"],
+                                      on_change=self.on_media_change,
+                                      watch=self.settings["media_watch"])
+        self.missing_scheduled = {}
+        self.ingestor = MediaIngestor(self.settings["media_info_file"], self.settings["rendition_dir"],
+                                      workers=self.settings["ingest_workers"],
+                                      transcode_min_mb=self.settings["transcode_min_mb"],
+                                      target_dbfs=self.settings["target_loudness_dbfs"],
+                                      normalize=self.settings["normalize_loudness"],
+                                      on_result=self.on_ingest_result,
+                                      stat=self.media_index.stat)
+        self.audio_cache = None
+        self.player = None
+        self._ducking_zones = set()
+        self._duck_lock = threading.Lock()
+        self.triggers = None
+        self.trigger_sources = []
+        self.playlist_watcher = None
+        self.sync_worker = None
+        self._owner = None
+        self._dispatch = None
+        self.armed = threading.Event()
+        self.armed_at = None
+
+    def open_audio(self):
+        # pygame só é importado aqui: carregar o SDL é a parte mais lenta da inicialização
+        from pygame import mixer
+        from audio_cache import AudioCache
+        from zones import ZoneMixer
+
+        mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+        self.ducker = Ducker(self.create_ducking_backend(),
+                             duck_level=self.settings["duck_level"],
+                             restore_level=self.settings["restore_level"],
+                             duck_time=self.settings["duck_fade_time"],
+                             restore_time=self.settings["restore_fade_time"],
+                             lead_time=self.settings["duck_lead_time"],
+                             curve=self.settings["fade_curve"],
+                             thread_init=init_audio_thread)
+        self.audio_cache = AudioCache(self.settings["audio_cache_mb"] * 1024 * 1024,
+                                      signature=self.media_index.signature)
+        self.player = ZoneMixer(self.settings["zones"], self.create_zone_worker)
+
+    def create_zone_worker(self, zone, channel, gains):
+        from playback import PlaybackWorker
+        return PlaybackWorker(before_play=lambda item: self.duck_zone(zone),
+                              after_play=lambda item: self.unduck_zone(zone),
+                              thread_init=init_audio_thread,
+                              cache=self.audio_cache,
+                              resolver=self.ingestor.playback_source,
+                              on_event=self.on_playback_event,
+                              zone=zone, channel=channel, gains=gains)
+
+    def duck_zone(self, zone):
+        # A música ambiente é uma só: fica abaixada enquanto alguma zona que pede ducking estiver tocando
+        if not self.player.zones[zone]["duck"]:
+            return 0
+        with self._duck_lock:
+            self._ducking_zones.add(zone)
+        with self.metrics.time("ducking_seconds", "Tempo das chamadas de ducking", call="duck"):
+            return self.ducker.duck()
+
+    def unduck_zone(self, zone):
+        with self._duck_lock:
+            if zone not in self._ducking_zones:
+                return
+            self._ducking_zones.discard(zone)
+            if self._ducking_zones:
+                return
+        with self.metrics.time("ducking_seconds", "Tempo das chamadas de ducking", call="unduck"):
+            self.ducker.unduck()
+
+    def create_ducking_backend(self):
+        name = self.settings["ducking_backend"]
+        options = {"process_name": self.settings["ducking_process"]} if name == "pycaw" else {}
+        return create_backend(name, **options)
+
+    def start(self):
+        self.player.start()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+        self.media_index.start()
+        self.start_triggers()
+        self.start_metrics()
+        if self.settings["sync_dir"]:
+            self.sync_worker = SyncWorker(self.settings["sync_dir"], self.settings["library_dir"],
+                                          self.settings["sync_state_file"],
+                                          lambda *args: self.run_owned(self.apply_synced_playlists,
+                                                                       *args),
+                                          interval=self.settings["sync_interval"],
+                                          workers=self.settings["transfer_workers"],
+                                          stat=self.media_index.refresh_path)
+            self.sync_worker.start()
+        interval = self.settings["playlist_reload_interval"]
+        if self.store.name == "json" and interval:
+            self.store.guard_external = True
+            self.playlist_watcher = PlaylistWatcher(
+                self.store, lambda *args: self.run_owned(self.apply_external_playlists, *args),
+                interval)
+            self.playlist_watcher.start()
+
+    def start_triggers(self):
+        settings = self.settings
+        self.triggers = TriggerQueue(self.fire_triggers, maxsize=settings["trigger_queue_size"])
+        self.triggers.start()
+        if settings["trigger_file"]:
+            self.trigger_sources.append(TriggerTailer(settings["trigger_file"],
+                                                      settings["trigger_offset_file"],
+                                                      self.triggers.put,
+                                                      poll_interval=settings["trigger_poll_interval"]))
+        if settings["trigger_http_port"] is not None or settings["trigger_unix_socket"]:
+            self.trigger_sources.append(TriggerServer(self.triggers.put,
+                                                      host=settings["trigger_http_host"],
+                                                      port=settings["trigger_http_port"],
+                                                      unix_path=settings["trigger_unix_socket"],
+                                                      metrics=self.metrics.render
+                                                      if self.metrics.enabled else None))
+        for source in self.trigger_sources:
+            source.start()
+
+    def start_metrics(self):
+        if not self.metrics.enabled:
+            return
+        metrics = self.metrics
+        # Valores que os componentes já contam são lidos só na exportação
+        metrics.gauge("schedule_entries", "Entradas no índice do agendador",
+                      fn=lambda: len(self.scheduler))
+        metrics.gauge("missing_scheduled_media", "Mídias agendadas sem arquivo",
+                      fn=lambda: sum(len(paths) for paths in self.missing_scheduled.values()))
+        if self.audio_cache is not None:
+            metrics.counter("audio_cache_hits_total", "Acertos do cache de áudio",
+                            fn=lambda: self.audio_cache.hits)
+            metrics.counter("audio_cache_misses_total", "Faltas do cache de áudio",
+                            fn=lambda: self.audio_cache.misses)
+            metrics.gauge("audio_cache_bytes", "Memória usada pelo cache de áudio",
+                          fn=lambda: self.audio_cache.used_bytes)
+        backend = self.ducker.backend if self.ducker is not None else None
+        if hasattr(backend, "resolves"):
+            metrics.counter("ducking_session_resolves_total",
+                            "Buscas da sessão de áudio do player de música",
+                            fn=lambda: backend.resolves)
+            metrics.counter("ducking_session_misses_total",
+                            "Buscas em que a sessão não foi encontrada",
+                            fn=lambda: backend.misses)
+        metrics.counter("triggers_coalesced_total", "Gatilhos repetidos agrupados",
+                        fn=lambda: self.triggers.coalesced)
+        metrics.counter("triggers_dropped_total", "Gatilhos descartados com a fila cheia",
+                        fn=lambda: self.triggers.dropped)
+        if self.settings["metrics_file"]:
+            self.metrics_exporter = MetricsExporter(metrics, self.settings["metrics_file"],
+                                                    self.settings["metrics_interval"])
+            self.metrics_exporter.start()
+
+    def create_stall_monitor(self, name):
+        # Para o loop que chamar beat() periodicamente; None se o monitor estiver desligado
+        if not self.settings["stall_threshold"]:
+            return None
+        monitor = StallMonitor(name, self.settings["stall_threshold"],
+                               self.settings["stall_log_file"], self.metrics)
+        monitor.start()
+        self.stall_monitors.append(monitor)
+        return monitor
+
+    def shutdown(self, save=True):
+        for monitor in self.stall_monitors:
+            monitor.stop(timeout=2)
+        for source in self.trigger_sources:
+            source.stop(timeout=2)
+        if self.sync_worker is not None:
+            self.sync_worker.stop(timeout=2)
+        if self.triggers is not None:
+            self.triggers.stop(timeout=2)
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(2)
+        self.media_index.stop(timeout=2)
+        if self.playlist_watcher is not None:
+            self.playlist_watcher.stop(timeout=2)
+            # Mescla uma alteração externa pendente antes do último salvamento
+            try:
+                self.playlist_watcher.poll()
+            except Exception as e:
+                print(f"Erro ao recarregar {self.store.path}: {e}")
+        if save:
+            self.save_playlists()
+        if self.player is not None:
+            self.player.shutdown(timeout=2)
+        self.ingestor.shutdown()
+        if self.ducker is not None:
+            self.ducker.shutdown(timeout=2)
+        self.store.close()
+        self.play_log.close(timeout=2)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop(timeout=2)
+
+    # Eventos
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def notify(self, event, *args):
+        for callback in self.listeners:
+            try:
+                callback(event, *args)
+            except Exception as e:
+                print(f"Erro ao notificar evento {event}: {e}")
+
+    def set_owner(self, dispatch):
+        # A GUI percorre self.playlists sem trava; com um dono, as alterações vindas de outras
+        # threads (recarga, sincronização) rodam na thread dele, entregues por dispatch(função)
+        self._owner = threading.get_ident()
+        self._dispatch = dispatch
+
+    def run_owned(self, fn, *args):
+        if self._dispatch is None or threading.get_ident() == self._owner:
+            return fn(*args)
+        done = threading.Event()
+        result = {}
+
+        def call():
+            try:
+                result["value"] = fn(*args)
+            except Exception as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        self._dispatch(call)
+        while not done.wait(0.5):
+            if self._stopped.is_set():
+                raise RuntimeError("Encerrando: alteração das playlists não aplicada")
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+    def on_playback_event(self, kind, item, message, timestamp):
+        if kind == "error":
+            print(f"Erro ao reproduzir {item.path}: {message}")
+        self.metrics.counter("playback_events_total", "Eventos de reprodução", kind=kind).inc()
+        if kind == "start" and item.load_time is not None:
+            self.metrics.histogram("media_load_seconds",
+                                   "Carga do áudio antes de tocar").observe(item.load_time)
+        if kind != "start":
+            self.log_playback(kind, item, message, timestamp)
+        self.notify("playback", kind, item, message)
+
+    def on_ingest_result(self, info):
+        if info.get("rendition"):
+            # A rendição acabou de ser gravada por outro processo
+            self.media_index.invalidate(info["rendition"])
+        if not info["ok"]:
+            print(f"Aviso: {info['path']} não pode ser reproduzido: {info.get('error')}")
+        self.notify("ingest", info)
+
+    def log_playback(self, kind, item, message, timestamp):
+        outcome = {"finish": "played", "stopped": "stopped", "preempted": "preempted",
+                   "expired": "expired", "duplicate": "duplicate"}.get(kind, "error")
+        scheduled_at = item.info.get("scheduled_at")
+        fields = {
+            "source": item.info.get("source", "queue"),
+            "repeats": item.repeats,
+            "zone": item.info.get("zone"),
+            "priority": item.priority,
+            "deadline": item.deadline,
+            "scheduled_at": scheduled_at,
+            "queued_at": item.queued_at,
+            "started_at": item.started_at,
+            "load_ms": None if item.load_time is None else round(item.load_time * 1000, 2),
+            "play_s": None if item.started_at is None else round(timestamp - item.started_at, 3),
+            "start_lag": None
+        }
+        if scheduled_at is not None and item.started_at is not None:
+            fields["start_lag"] = round(item.started_at - scheduled_at, 3)
+        if message and kind != "finish":
+            fields["error"] = message
+        self.play_log.record(outcome, item.path, item.info.get("playlist"), **fields)
+
+    # Agendador
+
+    def _run(self):
+        # O pré-ducking ajusta o volume (pycaw) direto desta thread
+        init_audio_thread()
+        while not self._stopped.is_set():
+            with self.lock:
+                self.check_schedules()
+                wait = self._next_wait()
+            if not self.armed.is_set():
+                self.armed_at = time.perf_counter()
+                self.armed.set()
+                # A análise das mídias fica para depois do primeiro agendamento
+                with self.lock:
+                    groups = {name: [media.path for media in playlist_data.files]
+                              for name, playlist_data in self.playlists.items()}
+                for name, group in groups.items():
+                    self.media_index.track(name, group)
+                paths = [path for group in groups.values() for path in group]
+                with self.lock:
+                    self.check_missing_media()
+                self.ingestor.submit(paths)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+    def _next_wait(self):
+        max_sleep = self.settings["scheduler_max_sleep"]
+        next_due = self.scheduler.seconds_until_next()
+        if next_due is None:
+            return max_sleep
+        # Acorda um pouco antes para abaixar a música antes do anúncio entrar
+        lead = self.settings["duck_lead_time"]
+        if next_due > lead and self._pre_ducked_for != self.scheduler.next_fire_time():
+            return min(next_due - lead, max_sleep)
+        return min(next_due, max_sleep)
+
+    def check_schedules(self):
+        with self.metrics.time("check_schedules_seconds", "Duração de cada passada do agendador"):
+            self._check_schedules()
+
+    def _check_schedules(self):
+        due, missed = self.scheduler.pop_due()
+        now = time.time()
+        if missed:
+            self.metrics.counter("schedule_missed_total",
+                                 "Anúncios perdidos por atraso").inc(len(missed))
+
+        for event in missed:
+            print(f"Aviso: anúncio das {event.fire_at.strftime('%H:%M')} de '{event.playlist}' "
+                  f"perdido ({int(event.lateness)}s de atraso)")
+            clip = None
+            if event.kind == "media" and event.playlist in self.playlists:
+                clip = self.playlists[event.playlist].files[event.index].path
+            self.play_log.record("missed", clip, event.playlist,
+                                 scheduled_at=event.fire_at.timestamp(), lateness=event.lateness)
+
+        for event in due:
+            playlist_data = self.playlists.get(event.playlist)
+            if not playlist_data:
+                continue
+            info = {"source": "schedule", "scheduled_at": event.fire_at.timestamp()}
+            self.metrics.histogram("schedule_lag_seconds",
+                                   "Atraso entre o horário agendado e a passada do agendador"
+                                   ).observe(max(0.0, now - info["scheduled_at"]))
+            if event.kind == "playlist":
+                self.play_playlist(event.playlist, **info)
+            else:
+                self.queue_media(event.playlist, event.index, **info)
+
+        self.pre_duck()
+        self.preload_upcoming()
+
+    def pre_duck(self):
+        next_fire = self.scheduler.next_fire_time()
+        next_due = self.scheduler.seconds_until_next()
+        lead = self.settings["duck_lead_time"]
+        if next_due is None or next_due > lead or self._pre_ducked_for == next_fire:
+            return
+        self._pre_ducked_for = next_fire
+        # Só abaixa antes se algum anúncio desse horário vai tocar numa zona com ducking
+        if self.ducker is not None and any(self.event_ducks(event)
+                                           for event in self.scheduler.upcoming(next_fire)):
+            with self.metrics.time("ducking_seconds", "Tempo das chamadas de ducking",
+                                   call="pre_duck"):
+                self.ducker.pre_duck(lead + 5)
+
+    def event_ducks(self, event):
+        playlist_data = self.playlists.get(event.playlist)
+        if not playlist_data:
+            return False
+        if event.kind == "playlist":
+            files = playlist_data.files
+        else:
+            files = [playlist_data.files[event.index]]
+        for media in files:
+            zone = media.zone if media.zone is not None else playlist_data.zone
+            if self.player.zones[self.player.zone_for(zone)]["duck"]:
+                return True
+        return False
+
+    def preload_upcoming(self):
+        until = datetime.now() + timedelta(minutes=self.settings["preload_minutes"])
+        paths = []
+        for event in self.scheduler.upcoming(until):
+            playlist_data = self.playlists.get(event.playlist)
+            if not playlist_data:
+                continue
+            if event.kind == "playlist":
+                files = playlist_data.files
+            else:
+                files = [playlist_data.files[event.index]]
+            for media in files:
+                source = self.ingestor.playback_source(media.path)[0]
+                if source not in paths:
+                    paths.append(source)
+        if paths and self.audio_cache is not None:
+            self.audio_cache.prefetch(paths)
+
+    def reindex_media(self, playlist_name, media_index):
+        playlist_data = self.playlists[playlist_name]
+        self.scheduler.update_media(playlist_name, media_index, playlist_data.files[media_index],
+                                    active=playlist_data.active)
+        self.search.update_media(playlist_name, media_index, playlist_data.files[media_index])
+        if self._search_dirty is not None:
+            self._search_dirty.add(playlist_name)
+        if self.armed.is_set():
+            self.check_missing_media([playlist_name])
+        self.wake()
+
+    def reindex_playlist(self, playlist_name):
+        if playlist_name in self.playlists:
+            self.scheduler.update_playlist(playlist_name, self.playlists[playlist_name])
+        else:
+            self.scheduler.remove_playlist(playlist_name)
+        self.search.update_playlist(playlist_name, self.playlists.get(playlist_name))
+        if self._search_dirty is not None:
+            self._search_dirty.add(playlist_name)
+        if self.armed.is_set():
+            # Só a playlist que mudou: com bibliotecas grandes, o resto custaria caro na GUI
+            playlist_data = self.playlists.get(playlist_name)
+            self.media_index.track(playlist_name, [media.path for media in playlist_data.files]
+                                   if playlist_data is not None else ())
+            self.check_missing_media([playlist_name])
+        self.wake()
+
+    def todays_plan(self, day=None):
+        # Prévia do dia: (horário, playlist, caminho) para cada mídia que vai tocar
+        day = day or datetime.now().date()
+        plan = []
+        with self.lock:
+            for event in self.scheduler.plan(day):
+                playlist_data = self.playlists.get(event.playlist)
+                if playlist_data is None:
+                    continue
+                if event.kind == "playlist":
+                    files = playlist_data.files
+                else:
+                    files = [playlist_data.files[event.index]]
+                plan.extend((event.fire_at, event.playlist, media.path) for media in files)
+        return plan
+
+    def prepare_search(self):
+        # Constrói o índice de busca numa thread, depois do primeiro agendamento
+        with self.lock:
+            if self._search_thread is not None:
+                return
+            self._search_thread = threading.Thread(target=self._build_search, name="search-index",
+                                                   daemon=True)
+        self._search_thread.start()
+
+    def _build_search(self):
+        while not self.armed.wait(0.5):
+            if self._stopped.is_set():
+                return
+        # Constrói fora da trava a partir de uma cópia do dicionário, sem atrasar o agendador;
+        # as playlists reindexadas nesse meio-tempo são refeitas na troca
+        with self.lock:
+            snapshot = dict(self.playlists)
+            self._search_dirty = set()
+        fresh = SearchIndex()
+        try:
+            fresh.rebuild(snapshot)
+        except Exception as e:
+            print(f"Erro ao construir o índice de busca: {e}")
+            with self.lock:
+                self._search_dirty = None
+                self._search_thread = None
+            return
+        with self.lock:
+            for name in self._search_dirty:
+                fresh.update_playlist(name, self.playlists.get(name))
+            self._search_dirty = None
+            self.search = fresh
+
+    def search_media(self, text="", start=None, end=None, active=None, limit=500):
+        # Busca nas mídias de todas as playlists: (playlist, índice, mídia) por ordem de playlist.
+        # None enquanto o índice ainda está sendo construído
+        with self.lock:
+            if not self.search.built:
+                self.prepare_search()
+                return None
+            return [(name, index, self.playlists[name].files[index])
+                    for name, index in self.search.search(text, start, end, active, limit)]
+
+    def next_announcements(self, count=20):
+        # Próximos anúncios que vão tocar: (horário, playlist, caminho), no máximo `count`
+        upcoming = []
+        with self.lock:
+            for event in self.scheduler.next_events(count):
+                playlist_data = self.playlists.get(event.playlist)
+                if playlist_data is None:
+                    continue
+                if event.kind == "playlist":
+                    files = playlist_data.files
+                else:
+                    files = [playlist_data.files[event.index]]
+                upcoming.extend((event.fire_at, event.playlist, media.path) for media in files)
+        return upcoming[:count]
+
+    # Disponibilidade das mídias
+
+    def check_missing_media(self, names=None):
+        # Mídias agendadas (de playlists ativas) cujo arquivo sumiu, avisadas antes do horário.
+        # Com `names`, confere só essas playlists e mantém o resultado das outras
+        if names is None:
+            missing, names = {}, self.playlists
+        else:
+            missing = {name: paths for name, paths in self.missing_scheduled.items()
+                       if name not in names}
+        for name in names:
+            playlist_data = self.playlists.get(name)
+            if playlist_data is None or not playlist_data.active:
+                continue
+            paths = [media.path for media in playlist_data.files
+                     if playlist_data.minutes is not None or media.minutes is not None]
+            absent = self.media_index.missing(dict.fromkeys(paths))
+            if absent:
+                missing[name] = absent
+        for name, paths in missing.items():
+            for path in set(paths).difference(self.missing_scheduled.get(name, ())):
+                print(f"Aviso: mídia agendada em '{name}' não encontrada: {path}")
+        if missing != self.missing_scheduled:
+            self.missing_scheduled = missing
+            self.notify("missing", missing)
+
+    def on_media_change(self, paths):
+        if self.audio_cache is not None:
+            for path in paths:
+                self.audio_cache.invalidate(path)
+        with self.lock:
+            self.check_missing_media()
+        self.ingestor.submit(path for path in paths if self.media_index.exists(path))
+        self.notify("media", paths)
+
+    def known_digests(self, paths):
+        # sha256 medido na ingestão, válido enquanto tamanho e data do arquivo não mudarem
+        digests = {}
+        for path in paths:
+            info = self.ingestor.lookup(path)
+            if info and info.get("sha256"):
+                digests[path] = info["sha256"]
+        return digests
+
+    # Reprodução
+
+    def play_playlist(self, playlist_name, **info):
+        for media_index in range(len(self.playlists[playlist_name].files)):
+            self.queue_media(playlist_name, media_index, **info)
+
+    def queue_media(self, playlist_name, media_index, repeats=None, priority=None, **info):
+        # Prioridade e atraso máximo vêm da mídia, senão da playlist; o prazo conta do horário agendado
+        playlist_data = self.playlists[playlist_name]
+        media = playlist_data.files[media_index]
+        if repeats is None:
+            repeats = media.repeats
+        if priority is None:
+            priority = media.priority if media.priority is not None else playlist_data.priority
+        zone = media.zone if media.zone is not None else playlist_data.zone
+        max_lateness = media.max_lateness
+        if max_lateness is None:
+            max_lateness = playlist_data.max_lateness
+        if max_lateness is None:
+            max_lateness = self.settings["catch_up_max_lateness"]
+        deadline = None
+        if max_lateness is not None:
+            deadline = (info.get("scheduled_at") or time.time()) + max_lateness
+        self.player.enqueue(media.path, repeats, priority=priority, deadline=deadline,
+                            zone=zone, playlist=playlist_name, index=media_index, **info)
+
+    def play_media(self, path, repeats=1, interrupt=False, **info):
+        with self.metrics.time("play_media_seconds", "Tempo para entregar a mídia ao player"):
+            if interrupt:
+                self.player.play(path, repeats, **info)
+            else:
+                self.player.enqueue(path, repeats, **info)
+
+    def stop_playback(self):
+        self.player.stop()
+
+    def fire_triggers(self, triggers):
+        with self.lock:
+            for trigger in triggers:
+                playlist_data = self.playlists.get(trigger["playlist"])
+                if playlist_data is None:
+                    print(f"Aviso: gatilho remoto para playlist inexistente '{trigger['playlist']}'")
+                    continue
+                info = {"source": "remote", "trigger_id": trigger["id"]}
+                if trigger["clip"] is None:
+                    self.play_playlist(trigger["playlist"], priority=trigger["priority"], **info)
+                    continue
+                index = find_media(playlist_data.files, trigger["clip"])
+                if index is None:
+                    print(f"Aviso: gatilho remoto para mídia inexistente '{trigger['clip']}'")
+                    continue
+                self.queue_media(trigger["playlist"], index, trigger["repeats"], trigger["priority"],
+                                 **info)
+
+    # Playlists
+
+    def load_playlists(self):
+        try:
+            return self.store.load()
+        except Exception as e:
+            print(f"Erro ao carregar playlists: {e}")
+            return {}
+
+    def save_playlists(self):
+        with self.lock, self.metrics.time("save_playlists_seconds", "Duração dos salvamentos"):
+            self.store.save_all(self.playlists)
+
+    def apply_external_playlists(self, external, signature):
+        # Recarga a quente: compara arquivo novo, base (última versão lida/gravada) e memória.
+        # Só o que mudou no arquivo é aplicado; edições locais em outras playlists são mantidas
+        # e regravadas. Se a mesma playlist mudou dos dois lados, vale o arquivo e a versão
+        # local vai para um arquivo de conflito.
+        changes = {"added": [], "removed": [], "changed": [], "conflicts": []}
+        with self.lock:
+            if external is None:
+                self.store.mark_synced(signature)
+                return changes
+            base = self.store.synced
+            records = dump_playlists(external)
+            conflicts = {}
+            local_changes = False
+            for name in list(records) + [name for name in self.playlists if name not in records]:
+                new, old = records.get(name), base.get(name)
+                local = self.playlists[name].to_record() if name in self.playlists else None
+                if new == old:
+                    local_changes = local_changes or local != old
+                    continue
+                if local == new:
+                    continue
+                if local != old:
+                    conflicts[name] = local
+                if new is None:
+                    del self.playlists[name]
+                    self.reindex_playlist(name)
+                    changes["removed"].append(name)
+                elif local is None:
+                    self.playlists[name] = external[name]
+                    self.reindex_playlist(name)
+                    changes["added"].append(name)
+                else:
+                    self.apply_playlist_diff(name, external[name])
+                    changes["changed"].append(name)
+
+            order = [name for name in records if name in self.playlists]
+            order += [name for name in self.playlists if name not in records]
+            if order != list(self.playlists):
+                reordered = [(name, self.playlists.pop(name)) for name in order]
+                self.playlists.update(reordered)
+
+            self.store.mark_synced(signature, records)
+            if conflicts:
+                changes["conflicts"] = list(conflicts)
+                self.save_conflicts(conflicts)
+            if local_changes:
+                self.store.save_all(self.playlists)
+        if any(changes.values()):
+            print(f"{self.store.path} recarregado: {len(changes['added'])} nova(s), "
+                  f"{len(changes['changed'])} alterada(s), {len(changes['removed'])} removida(s)")
+            self.notify("reload", changes)
+        return changes
+
+    def apply_playlist_diff(self, name, new):
+        current = self.playlists[name]
+        if current.to_record(include_files=False) != new.to_record(include_files=False) \
+                or len(current.files) != len(new.files):
+            self.playlists[name] = new
+            self.reindex_playlist(name)
+            return
+        # Só mídias mudaram: troca e reindexa uma a uma, o resto do índice fica intacto
+        for index, (media, new_media) in enumerate(zip(current.files, new.files)):
+            if media.to_record() != new_media.to_record():
+                current.files[index] = new_media
+                self.reindex_media(name, index)
+
+    def apply_synced_playlists(self, synced, removed):
+        # Sincronização com a pasta central: playlists casadas pelo ID estável e alteradas no
+        # lugar (sem criar cópias "_1"); a central manda, edições locais nelas são sobrescritas
+        changes = {"added": [], "removed": [], "changed": [], "conflicts": []}
+        submitted = []
+        with self.lock:
+            local_names = {playlist_id(playlist_data): name
+                           for name, playlist_data in self.playlists.items()
+                           if playlist_id(playlist_data) is not None}
+            for pid in removed:
+                name = local_names.get(pid)
+                if name is not None:
+                    self.delete_playlist(name)
+                    changes["removed"].append(name)
+            for pid, (name, new) in synced.items():
+                local_name = local_names.get(pid)
+                if local_name is None:
+                    changes["added"].append(self.add_playlist(name, new))
+                    continue
+                if local_name != name and self.rename_playlist(local_name, name):
+                    changes["removed"].append(local_name)
+                    changes["added"].append(name)
+                    local_name = name
+                if self.playlists[local_name].to_record() != new.to_record():
+                    self.apply_playlist_diff(local_name, new)
+                    self.store.save_playlist(self.playlists, local_name)
+                    changes["changed"].append(local_name)
+                    submitted.extend(media.path for media in new.files)
+        self.ingestor.submit(submitted)
+        if any(changes.values()):
+            print(f"Sincronizado com {self.settings['sync_dir']}: {len(changes['added'])} nova(s), "
+                  f"{len(changes['changed'])} alterada(s), {len(changes['removed'])} removida(s)")
+            self.notify("reload", changes)
+        return changes
+
+    def sync_now(self, progress=None):
+        if self.sync_worker is None:
+            raise ValueError("Sincronização não configurada (sync_dir)")
+        return self.sync_worker.sync(progress)
+
+    def publish_playlists(self, share_dir, progress):
+        # Lado da central: dá ID às playlists que ainda não têm e publica todas na pasta
+        with self.lock:
+            for name, playlist_data in self.playlists.items():
+                if playlist_id(playlist_data) is None:
+                    assign_playlist_id(playlist_data)
+                    self.store.save_playlist_settings(self.playlists, name)
+            playlists = {name: playlist_data.copy() for name, playlist_data in self.playlists.items()}
+            paths = set(self.all_media_paths())
+        return publish_to_share(playlists, share_dir, progress, self.settings["transfer_workers"],
+                                stat=self.media_index.stat, digests=self.known_digests(paths))
+
+    def save_conflicts(self, conflicts):
+        conflict_path = f"{self.store.path}.conflict-{time.strftime('%Y%m%d_%H%M%S')}"
+        print(f"Aviso: playlists alteradas aqui e no arquivo ao mesmo tempo: {', '.join(conflicts)}. "
+              f"Versão local salva em {conflict_path}")
+        try:
+            with open(conflict_path, 'w') as f:
+                json.dump({"playlists": {name: record for name, record in conflicts.items()
+                                         if record is not None}}, f, indent=4)
+        except OSError as e:
+            print(f"Erro ao salvar {conflict_path}: {e}")
+
+    def all_media_paths(self):
+        for playlist_data in self.playlists.values():
+            for media in playlist_data.files:
+                yield media.path
+
+    def create_playlist(self, name):
+        with self.lock:
+            self.playlists[name] = Playlist()
+            self.reindex_playlist(name)
+            self.store.save_playlist(self.playlists, name)
+
+    def toggle_playlist_status(self, playlist_name):
+        with self.lock:
+            if playlist_name not in self.playlists:
+                return
+            playlist_data = self.playlists[playlist_name]
+            playlist_data.active = not playlist_data.active
+            self.reindex_playlist(playlist_name)
+            self.store.save_playlist_settings(self.playlists, playlist_name)
+
+    def rename_playlist(self, old_name, new_name):
+        with self.lock:
+            if new_name in self.playlists:
+                return False
+            self.playlists[new_name] = self.playlists.pop(old_name)
+            self.reindex_playlist(old_name)
+            self.reindex_playlist(new_name)
+            self.store.rename_playlist(self.playlists, old_name, new_name)
+            return True
+
+    def delete_playlist(self, name):
+        with self.lock:
+            del self.playlists[name]
+            self.reindex_playlist(name)
+            self.store.delete_playlist(self.playlists, name)
+
+    def duplicate_playlist(self, name, new_name):
+        with self.lock:
+            if new_name in self.playlists:
+                return False
+            self.playlists[new_name] = self.playlists[name].copy()
+            self.reindex_playlist(new_name)
+            self.store.save_playlist(self.playlists, new_name)
+            return True
+
+    def add_playlist(self, playlist_name, playlist_data):
+        with self.lock:
+            base_name = playlist_name
+            counter = 1
+            while playlist_name in self.playlists:
+                playlist_name = f"{base_name}_{counter}"
+                counter += 1
+            self.playlists[playlist_name] = playlist_data
+            self.reindex_playlist(playlist_name)
+            self.store.save_playlist(self.playlists, playlist_name)
+        self.ingestor.submit(media.path for media in playlist_data.files)
+        return playlist_name
+
+    def add_media(self, playlist_name, paths):
+        with self.lock:
+            self.playlists[playlist_name].files.extend(Media(file_path) for file_path in paths)
+            self.reindex_playlist(playlist_name)
+            self.store.append_media(self.playlists, playlist_name, len(paths))
+        self.ingestor.submit(paths)
+
+    def configure_media(self, playlist_name, media_index, time_str, repeats, priority=0):
+        with self.lock:
+            # Altera só horário, repetições e prioridade; os demais campos da mídia ficam
+            media = self.playlists[playlist_name].files[media_index]
+            media.minutes = parse_minutes(time_str)
+            media.repeats = repeats
+            media.priority = priority or None
+            self.reindex_media(playlist_name, media_index)
+            self.store.save_media(self.playlists, playlist_name, media_index)
+
+    def set_media_repeats(self, playlist_name, media_index, repeats):
+        # Não mexe no horário: uma entrada antiga só com o caminho continua sem horário próprio
+        # (antes ganhava "00:00" e passava a tocar à meia-noite)
+        with self.lock:
+            self.playlists[playlist_name].files[media_index].repeats = repeats
+            self.store.save_media(self.playlists, playlist_name, media_index)
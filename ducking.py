@@ -0,0 +1,379 @@
+import math
+import threading
+import time
+
+
+class DuckingBackend:
+    name = "base"
+
+    def get_volume(self):
+        raise NotImplementedError
+
+    def set_volume(self, level):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class NullBackend(DuckingBackend):
+    name = "null"
+
+    def get_volume(self):
+        return None
+
+    def set_volume(self, level):
+        return False
+
+
+class FakeBackend(DuckingBackend):
+    name = "fake"
+
+    def __init__(self, volume=0.8, latency=0.0, session_alive=True):
+        self.volume = volume
+        self.latency = latency
+        self.session_alive = session_alive
+        self.history = []
+        self.resolves = 0
+        self.misses = 0
+        self._resolved = False
+        self._lock = threading.Lock()
+
+    def kill_session(self):
+        self.session_alive = False
+        self._resolved = False
+
+    def restart_session(self, volume=1.0):
+        self.session_alive = True
+        self.volume = volume
+
+    def _resolve(self):
+        if not self._resolved:
+            if self.session_alive:
+                self.resolves += 1
+                self._resolved = True
+            else:
+                self.misses += 1
+        return self._resolved
+
+    def get_volume(self):
+        with self._lock:
+            return self.volume if self._resolve() else None
+
+    def set_volume(self, level):
+        with self._lock:
+            if not self._resolve():
+                return False
+            if self.latency:
+                time.sleep(self.latency)
+            self.volume = level
+            self.history.append((time.monotonic(), level))
+            return True
+
+    def reset(self):
+        self._resolved = False
+
+
+class PycawBackend(DuckingBackend):
+    name = "pycaw"
+
+    def __init__(self, process_name="spotify.exe"):
+        from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+        self._utilities = AudioUtilities
+        self._interface = ISimpleAudioVolume
+        self.process_name = process_name.lower()
+        self.resolves = 0
+        self.misses = 0
+        self._volume = None
+        self._process = None
+        self._lock = threading.RLock()
+
+    def _resolve(self):
+        self.resolves += 1
+        self._volume = None
+        self._process = None
+        try:
+            for session in self._utilities.GetAllSessions():
+                if session.Process and session.Process.name().lower() == self.process_name:
+                    self._volume = session._ctl.QueryInterface(self._interface)
+                    self._process = session.Process
+                    break
+        except Exception as e:
+            print(f"Erro ao acessar sessão do {self.process_name}: {e}")
+        if self._volume is None:
+            self.misses += 1
+        return self._volume
+
+    def _handle(self):
+        # Só varre as sessões de novo se o processo morreu ou foi reiniciado
+        if self._volume is not None:
+            try:
+                if self._process.is_running():
+                    return self._volume
+            except Exception:
+                pass
+        return self._resolve()
+
+    def _call(self, method, *args):
+        with self._lock:
+            for _ in range(2):
+                handle = self._handle()
+                if handle is None:
+                    return None
+                try:
+                    return True, getattr(handle, method)(*args)
+                except Exception as e:
+                    # Sessão expirada (ex.: Spotify trocou de dispositivo); tenta resolver de novo
+                    print(f"Erro ao ajustar volume do {self.process_name}: {e}")
+                    self._volume = None
+            return None
+
+    def get_volume(self):
+        result = self._call("GetMasterVolume")
+        return None if result is None else result[1]
+
+    def set_volume(self, level):
+        return self._call("SetMasterVolume", level, None) is not None
+
+    def reset(self):
+        with self._lock:
+            self._volume = None
+            self._process = None
+
+
+BACKENDS = {
+    "pycaw": PycawBackend,
+    "null": NullBackend,
+    "fake": FakeBackend,
+}
+
+
+def create_backend(name, **options):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de volume desconhecido: {name}")
+    try:
+        return backend_class(**options)
+    except ImportError as e:
+        print(f"Backend de volume '{name}' indisponível ({e}); usando backend nulo")
+        return NullBackend()
+
+
+def _linear(start, target, t):
+    return start + (target - start) * t
+
+
+def _exponential(start, target, t):
+    # Interpola em escala logarítmica (dB), que soa linear ao ouvido
+    floor = 0.001
+    start, target = max(start, floor), max(target, floor)
+    return start * (target / start) ** t
+
+
+def _equal_power(start, target, t):
+    if target >= start:
+        return start + (target - start) * math.sin(t * math.pi / 2)
+    return start + (target - start) * (1 - math.cos(t * math.pi / 2))
+
+
+CURVES = {
+    "linear": _linear,
+    "exponential": _exponential,
+    "equal_power": _equal_power,
+}
+
+
+class VolumeFader(threading.Thread):
+    def __init__(self, backend, step_interval=0.05, thread_init=None):
+        super().__init__(name="volume-fader", daemon=True)
+        self.backend = backend
+        self.step_interval = step_interval
+        self.thread_init = thread_init
+        self.level = None
+        self._fade = None
+        # (instante, função) a rodar nesta thread; um só por vez, um novo substitui o anterior
+        self._call = None
+        self._running = True
+        self._condition = threading.Condition()
+
+    @property
+    def fading(self):
+        with self._condition:
+            return self._fade is not None
+
+    def fade_to(self, target, duration, curve="linear", on_done=None):
+        if curve not in CURVES:
+            raise ValueError(f"Curva de volume desconhecida: {curve}")
+        with self._condition:
+            # Um fade novo parte do nível atual, revertendo o anterior em vez de empilhar
+            start = self.level if self._fade is not None else None
+            if start is None:
+                start = self.backend.get_volume()
+            if start is None:
+                self._fade = None
+                return False
+            self._fade = (start, target, time.monotonic(), max(duration, 0.0), CURVES[curve], on_done)
+            self._condition.notify()
+            return True
+
+    def cancel(self):
+        with self._condition:
+            self._fade = None
+
+    def call_later(self, delay, callback):
+        # Roda na thread do fader, que já tem o COM inicializado para o pycaw
+        with self._condition:
+            self._call = (time.monotonic() + delay, callback)
+            self._condition.notify()
+
+    def cancel_call(self):
+        with self._condition:
+            self._call = None
+
+    def shutdown(self, timeout=None):
+        with self._condition:
+            self._running = False
+            self._fade = None
+            self._call = None
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        if self.thread_init:
+            self.thread_init()
+        with self._condition:
+            while self._running:
+                if self._call is not None and time.monotonic() >= self._call[0]:
+                    callback = self._call[1]
+                    self._call = None
+                    # Fora da trava: a função pode iniciar um fade (ex.: Ducker.unduck)
+                    self._condition.release()
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Erro na tarefa agendada do volume: {e}")
+                    finally:
+                        self._condition.acquire()
+                    continue
+                if self._fade is None:
+                    self._condition.wait(None if self._call is None
+                                         else max(0.0, self._call[0] - time.monotonic()))
+                    continue
+                fade = self._fade
+                start, target, started_at, duration, curve, on_done = fade
+                t = 1.0 if duration == 0 else min(1.0, (time.monotonic() - started_at) / duration)
+                self.level = curve(start, target, t)
+                if not self.backend.set_volume(self.level):
+                    self._fade = None
+                    continue
+                if t >= 1.0:
+                    self._fade = None
+                    if on_done:
+                        # Fora da trava, como em call_later: on_done pode pegar outras travas
+                        # (Ducker._lock) que, em outras threads, são tomadas antes desta
+                        self._condition.release()
+                        try:
+                            on_done()
+                        except Exception as e:
+                            print(f"Erro ao concluir fade de volume: {e}")
+                        finally:
+                            self._condition.acquire()
+                    continue
+                self._condition.wait(self.step_interval)
+
+
+class Ducker:
+    def __init__(self, backend, duck_level=0.1, restore_level=0.8, duck_time=0.5,
+                 restore_time=5.0, lead_time=0.5, curve="equal_power", thread_init=None):
+        self.backend = backend
+        self.duck_level = duck_level
+        self.restore_level = restore_level
+        self.duck_time = duck_time
+        self.restore_time = restore_time
+        self.lead_time = lead_time
+        self.curve = curve
+        self.fader = VolumeFader(backend, thread_init=thread_init)
+        self.fader.start()
+        self._ducked = False
+        self._ducked_at = None
+        self._restore_to = None
+        self._pre_duck = None
+        self._lock = threading.Lock()
+
+    def duck(self):
+        with self._lock:
+            self._cancel_pre_duck()
+            return self._duck()
+
+    def pre_duck(self, expires_in):
+        with self._lock:
+            self._cancel_pre_duck()
+            self._duck()
+            # Expira na thread do fader; o token ignora uma expiração já cancelada
+            token = self._pre_duck = object()
+            self.fader.call_later(expires_in, lambda: self._expire_pre_duck(token))
+
+    def _expire_pre_duck(self, token):
+        with self._lock:
+            if self._pre_duck is token:
+                self._pre_duck = None
+                self._unduck()
+
+    def unduck(self):
+        with self._lock:
+            self._cancel_pre_duck()
+            self._unduck()
+
+    def _unduck(self):
+        if not self._ducked:
+            return
+        self._ducked = False
+        target = self._restore_to if self._restore_to is not None else self.restore_level
+        # Guarda o alvo até o fim do fade: um anúncio no meio dele volta ao mesmo nível
+        self.fader.fade_to(target, self.restore_time, self.curve, on_done=self._restored)
+
+    def _restored(self):
+        # Roda na thread do fader; um fade novo iniciado antes daqui ainda precisa do alvo
+        with self._lock:
+            if not self._ducked and not self.fader.fading:
+                self._restore_to = None
+
+    def restore_now(self):
+        with self._lock:
+            self._cancel_pre_duck()
+            if not self._ducked and not self.fader.fading:
+                return
+            self.fader.cancel()
+            target = self._restore_to if self._restore_to is not None else self.restore_level
+            self._ducked = False
+            self._restore_to = None
+        self.backend.set_volume(target)
+
+    def shutdown(self, timeout=None):
+        self.restore_now()
+        self.fader.shutdown(timeout)
+
+    def _duck(self):
+        # Retorna quanto falta para a música chegar ao nível reduzido
+        if self._ducked:
+            return max(0.0, self._ducked_at + self.duck_time - time.monotonic())
+        current = self.fader.level if self.fader.fading else self.backend.get_volume()
+        if current is None:
+            return 0.0
+        self._ducked = True
+        self._ducked_at = time.monotonic()
+        if self._restore_to is None:
+            self._restore_to = current
+        if current <= self.duck_level:
+            # Já está baixa: fica onde está (interrompe a volta de um anúncio anterior)
+            self.fader.cancel()
+            return 0.0
+        self.fader.fade_to(self.duck_level, self.duck_time, self.curve)
+        return max(self.lead_time, 0.0)
+
+    def _cancel_pre_duck(self):
+        if self._pre_duck is not None:
+            self._pre_duck = None
+            self.fader.cancel_call()
@@ -0,0 +1,46 @@
+import threading
+
+
+class PlaylistWatcher:
+    # Confere o playlists.json por stat a cada `interval` segundos; se mudou, lê e interpreta o
+    # arquivo nesta thread e entrega o resultado pronto para o core aplicar só as diferenças
+
+    def __init__(self, store, apply, interval=1.0):
+        self.store = store
+        self.apply = apply
+        self.interval = interval
+        self._failed = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="playlist-watch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Erro ao recarregar {self.store.path}: {e}")
+
+    def poll(self):
+        if not self.store.changed_on_disk():
+            return False
+        try:
+            playlists, signature = self.store.read_disk()
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            # Arquivo ainda sendo gravado ou inválido: avisa uma vez e tenta de novo depois
+            if self._failed != str(e):
+                self._failed = str(e)
+                print(f"Aviso: {self.store.path} alterado mas inválido ({e}); mantendo a versão atual")
+            return False
+        self._failed = None
+        self.apply(playlists, signature)
+        return True
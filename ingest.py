@@ -0,0 +1,201 @@
+import json
+import math
+import os
+import queue
+import threading
+import wave
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from availability import stat_path
+from storage import write_json_atomic
+from transfer import hash_file
+
+MIXER_FREQUENCY = 44100
+MIXER_CHANNELS = 2
+MAX_LOUDNESS_SAMPLES = 2000000
+
+_mixer_ready = False
+
+
+def _init_mixer():
+    # Cada processo do pool decodifica com o driver "dummy": não precisa de placa de som
+    global _mixer_ready
+    if not _mixer_ready:
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        from pygame import mixer
+        mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=MIXER_CHANNELS)
+        _mixer_ready = True
+
+
+def measure_loudness(samples):
+    # RMS em dBFS sobre uma amostragem do sinal; suficiente para nivelar anúncios de voz
+    step = max(1, len(samples) // MAX_LOUDNESS_SAMPLES)
+    sampled = samples[::step]
+    if not sampled:
+        return None, 0
+    peak = max(max(sampled), -min(sampled))
+    rms = math.sqrt(sum(x * x for x in sampled) / len(sampled))
+    if rms == 0:
+        return None, peak
+    return 20 * math.log10(rms / 32768), peak
+
+
+def apply_gain(samples, gain):
+    try:
+        import numpy
+    except ImportError:
+        return array('h', (max(-32768, min(32767, int(x * gain))) for x in samples))
+    scaled = numpy.frombuffer(samples, dtype=numpy.int16).astype(numpy.float32) * gain
+    return array('h', numpy.clip(scaled, -32768, 32767).astype(numpy.int16).tobytes())
+
+
+def write_rendition(path, samples):
+    part_path = f"{path}.part"
+    with wave.open(part_path, 'wb') as out:
+        out.setnchannels(MIXER_CHANNELS)
+        out.setsampwidth(2)
+        out.setframerate(MIXER_FREQUENCY)
+        out.writeframes(samples.tobytes())
+    os.replace(part_path, path)
+
+
+def probe_media(path, rendition_dir, transcode_min_bytes, target_dbfs, normalize=True):
+    info = {"path": path, "ok": False}
+    try:
+        st = os.stat(path)
+        info.update(size=st.st_size, mtime=st.st_mtime_ns, sha256=hash_file(path))
+
+        _init_mixer()
+        from pygame import mixer
+        sound = mixer.Sound(path)
+        samples = array('h', sound.get_raw())
+        info["duration"] = round(sound.get_length(), 3)
+        loudness, peak = measure_loudness(samples)
+        info["loudness"] = None if loudness is None else round(loudness, 2)
+
+        gain = 1.0
+        if normalize and loudness is not None:
+            gain = 10 ** ((target_dbfs - loudness) / 20)
+            if peak:
+                gain = min(gain, 32767 / peak)
+        info["gain"] = round(gain, 4)
+
+        if path.lower().endswith(".wav") and st.st_size >= transcode_min_bytes:
+            os.makedirs(rendition_dir, exist_ok=True)
+            rendition = os.path.join(rendition_dir, f"{info['sha256']}.wav")
+            if not os.path.exists(rendition):
+                write_rendition(rendition, apply_gain(samples, gain) if gain != 1.0 else samples)
+            info["rendition"] = os.path.abspath(rendition)
+        info["ok"] = True
+    except Exception as e:
+        info["error"] = str(e)
+    return info
+
+
+class MediaIngestor:
+    def __init__(self, info_file="media_info.json", rendition_dir="renditions", workers=2,
+                 transcode_min_mb=5, target_dbfs=-18.0, normalize=True, on_result=None,
+                 stat=stat_path):
+        self.info_file = info_file
+        self.rendition_dir = rendition_dir
+        self.workers = workers
+        self.transcode_min_bytes = int(transcode_min_mb * 1024 * 1024)
+        self.target_dbfs = target_dbfs
+        self.normalize = normalize
+        self.on_result = on_result
+        self.stat = stat
+        self.results = queue.Queue()
+        self.info = self._load()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._save_timer = None
+
+    def _load(self):
+        if not os.path.exists(self.info_file):
+            return {}
+        try:
+            with open(self.info_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar {self.info_file}: {e}")
+            return {}
+
+    def lookup(self, path):
+        info = self.info.get(path)
+        if info is None:
+            return None
+        st = self.stat(path)
+        if not st.exists or info.get("size") != st.size or info.get("mtime") != st.mtime:
+            return None
+        return info
+
+    def playback_source(self, path):
+        # Rendição pré-processada se houver; senão o original com o ganho medido (só atenuação)
+        info = self.lookup(path)
+        if not info or not info.get("ok"):
+            return path, 1.0
+        rendition = info.get("rendition")
+        if rendition and self.stat(rendition).exists:
+            return rendition, 1.0
+        return path, min(1.0, info.get("gain", 1.0))
+
+    def submit(self, paths):
+        with self._lock:
+            for path in dict.fromkeys(paths):
+                if path in self._pending or self.lookup(path) is not None:
+                    continue
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pending.add(path)
+                future = self._pool.submit(probe_media, path, self.rendition_dir,
+                                           self.transcode_min_bytes, self.target_dbfs,
+                                           self.normalize)
+                future.add_done_callback(lambda f, p=path: self._done(p, f))
+
+    def _done(self, path, future):
+        try:
+            info = future.result()
+        except Exception as e:
+            info = {"path": path, "ok": False, "error": str(e)}
+        with self._lock:
+            self._pending.discard(path)
+            self.info[path] = info
+            self._schedule_save()
+        if self.on_result is not None:
+            self.on_result(info)
+        else:
+            self.results.put(info)
+
+    def poll_results(self):
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
+    def _schedule_save(self):
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(1.0, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            snapshot = dict(self.info)
+        try:
+            write_json_atomic(self.info_file, snapshot, indent=None)
+        except Exception as e:
+            print(f"Erro ao salvar {self.info_file}: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
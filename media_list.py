@@ -0,0 +1,120 @@
+import tkinter as tk
+
+
+class MediaRow:
+    def __init__(self, list_view):
+        self.index = None
+        self.frame = tk.Frame(list_view.canvas, bg=list_view.row_bg)
+        self.name_label = tk.Label(self.frame, text="", bg=list_view.row_bg, fg='white',
+                                   font=('Arial', 10), anchor='w', width=40)
+        self.name_label.pack(side=tk.LEFT, padx=5)
+        self.detail_label = tk.Label(self.frame, text="", bg=list_view.row_bg, fg='white',
+                                     font=('Arial', 8))
+        self.detail_label.pack(side=tk.LEFT, padx=5)
+        tk.Button(self.frame, text="⚙", bg='#4CAF50', fg='white',
+                  font=('Arial', 10), bd=0, width=2, height=1,
+                  command=lambda: list_view.on_config(self.index)).pack(side=tk.RIGHT, padx=5)
+        tk.Button(self.frame, text="►", bg='#2196F3', fg='white',
+                  font=('Arial', 10), bd=0, width=2, height=1,
+                  command=lambda: list_view.on_select(self.index)).pack(side=tk.RIGHT, padx=2)
+        self.window = list_view.canvas.create_window(0, 0, window=self.frame, anchor="nw",
+                                                     state="hidden")
+        for widget in (self.frame, self.name_label, self.detail_label):
+            widget.bind("<MouseWheel>", list_view.on_mousewheel)
+
+    def show(self, index, row):
+        self.index = index
+        name, detail = row
+        if self.name_label.cget("text") != name:
+            self.name_label.config(text=name)
+        if self.detail_label.cget("text") != detail:
+            self.detail_label.config(text=detail)
+
+
+class VirtualMediaList:
+    # Só existem widgets para as linhas visíveis (mais uma margem); eles são reaproveitados na rolagem
+
+    def __init__(self, canvas, scrollbar, on_config, on_select, on_mousewheel,
+                 row_height=34, overscan=4, row_bg='#333333'):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.on_config = on_config
+        self.on_select = on_select
+        self.on_mousewheel = on_mousewheel
+        self.row_height = row_height
+        self.overscan = overscan
+        self.row_bg = row_bg
+        self.rows = []
+        self._pool = []
+        self._visible = {}
+        self._width = 1
+
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.bind("<Configure>", self._on_resize)
+
+    def set_items(self, rows):
+        self.rows = list(rows)
+        self._update_scrollregion()
+        self.canvas.yview_moveto(0)
+        self._render(force=True)
+
+    def clear(self):
+        self.set_items([])
+
+    def update_row(self, index, row):
+        self.rows[index] = row
+        slot = self._visible.get(index)
+        if slot is not None:
+            slot.show(index, row)
+
+    def append_rows(self, rows):
+        self.rows.extend(rows)
+        self._update_scrollregion()
+        self._render()
+
+    def _update_scrollregion(self):
+        height = len(self.rows) * self.row_height
+        self.canvas.configure(scrollregion=(0, 0, self._width, height))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._render()
+
+    def _on_resize(self, event):
+        self._width = event.width
+        for slot in self._pool:
+            self.canvas.itemconfigure(slot.window, width=max(1, self._width - 4))
+        self._update_scrollregion()
+        self._render()
+
+    def _render(self, force=False):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self.rows), int((top + height) // self.row_height) + 1 + self.overscan)
+
+        wanted = range(first, last)
+        free = [slot for index, slot in self._visible.items() if index not in wanted or force]
+        self._visible = {index: slot for index, slot in self._visible.items()
+                         if index in wanted and not force}
+        for slot in free:
+            self.canvas.itemconfigure(slot.window, state="hidden")
+        free.extend(slot for slot in self._pool if slot.index is None)
+
+        for index in wanted:
+            if index in self._visible:
+                continue
+            slot = free.pop() if free else self._new_slot()
+            slot.show(index, self.rows[index])
+            self.canvas.coords(slot.window, 2, index * self.row_height + 2)
+            self.canvas.itemconfigure(slot.window, state="normal")
+            self._visible[index] = slot
+        for slot in free:
+            slot.index = None
+
+    def _new_slot(self):
+        slot = MediaRow(self)
+        self.canvas.itemconfigure(slot.window, width=max(1, self._width - 4),
+                                  height=self.row_height - 4)
+        self._pool.append(slot)
+        return slot
@@ -0,0 +1,300 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import Counter as StackCounter
+from datetime import datetime
+
+# Limites dos histogramas em segundos: de 1 ms (carga em cache) a 10 s (travamento sério)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, fn=None):
+        # Com `fn` o valor é lido na hora da exportação (ex.: contadores que já existem no backend)
+        self.fn = fn
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self.fn() if self.fn is not None else self._value
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self._value = value
+
+
+class Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return Timer(self)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket", labels + (("le", le),), cumulative
+        yield f"{name}_sum", labels, total
+        yield f"{name}_count", labels, count
+
+
+class NullInstrument:
+    # Métricas desligadas: todas as chamadas caem aqui e não fazem nada
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def time(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_INSTRUMENT = NullInstrument()
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    # Registro de contadores, medidores e histogramas, exportado no formato texto do Prometheus
+    enabled = True
+
+    def __init__(self, prefix="anuncios_"):
+        self.prefix = prefix
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, description, labels, *args):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        # Caminho rápido sem trava: o instrumento já existe na maioria das chamadas
+        if family is not None and key in family[2]:
+            return family[2][key]
+        with self._lock:
+            family = self._families.setdefault(name, (cls, description, {}))
+            if family[0] is not cls:
+                raise ValueError(f"Métrica {name} já registrada como {family[0].kind}")
+            return family[2].setdefault(key, cls(*args))
+
+    def counter(self, name, description="", fn=None, **labels):
+        return self._get(Counter, name, description, labels, fn)
+
+    def gauge(self, name, description="", fn=None, **labels):
+        return self._get(Gauge, name, description, labels, fn)
+
+    def histogram(self, name, description="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get(Histogram, name, description, labels, buckets)
+
+    def time(self, name, description="", **labels):
+        return self.histogram(name, description, **labels).time()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = sorted((name, family[0], family[1], list(family[2].items()))
+                              for name, family in self._families.items())
+        for name, cls, description, instruments in families:
+            full_name = self.prefix + name
+            if description:
+                lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {cls.kind}")
+            for labels, instrument in instruments:
+                try:
+                    for sample, sample_labels, value in instrument.samples(full_name, labels):
+                        lines.append(f"{sample}{format_labels(sample_labels)} {value}")
+                except Exception as e:
+                    print(f"Erro ao ler métrica {name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    enabled = False
+
+    def counter(self, name, description="", fn=None, **labels):
+        return NULL_INSTRUMENT
+
+    def gauge(self, name, description="", fn=None, **labels):
+        return NULL_INSTRUMENT
+
+    def histogram(self, name, description="", buckets=DEFAULT_BUCKETS, **labels):
+        return NULL_INSTRUMENT
+
+    def time(self, name, description="", **labels):
+        return NULL_INSTRUMENT
+
+    def render(self):
+        return ""
+
+
+NULL_METRICS = NullMetrics()
+
+
+def write_text_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    # Regrava o arquivo .prom a cada `interval` segundos (coletor "textfile" do node_exporter)
+
+    def __init__(self, metrics, path, interval=15):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self.write()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            write_text_atomic(self.path, self.metrics.render())
+        except Exception as e:
+            print(f"Erro ao gravar {self.path}: {e}")
+
+
+class StallMonitor:
+    # Vigia um loop que chama beat() periodicamente (ex.: o do Tk). Se ele ficar mais de
+    # `threshold` segundos sem bater, amostra a pilha da thread dele até destravar e grava
+    # no log as pilhas mais frequentes: um profiler por amostragem só durante o travamento
+
+    def __init__(self, name, threshold=0.5, log_file="stalls.log", metrics=NULL_METRICS,
+                 sample_interval=None, max_stacks=5):
+        self.name = name
+        self.threshold = threshold
+        self.log_file = log_file
+        self.sample_interval = sample_interval or min(0.05, threshold / 4)
+        self.max_stacks = max_stacks
+        self.stalls = metrics.counter("loop_stalls_total", "Travamentos acima do limite", loop=name)
+        self.stall_time = metrics.histogram("loop_stall_seconds", "Duração dos travamentos",
+                                            loop=name)
+        self._thread_id = None
+        self._last_beat = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"stall-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def beat(self):
+        self._thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+
+    def _run(self):
+        samples = StackCounter()
+        stalled_since = None
+        while not self._stopped.wait(self.sample_interval):
+            last_beat = self._last_beat
+            if last_beat is None:
+                continue
+            if time.monotonic() - last_beat > self.threshold:
+                if stalled_since is None:
+                    stalled_since = last_beat
+                frame = sys._current_frames().get(self._thread_id)
+                if frame is not None:
+                    samples["".join(traceback.format_stack(frame))] += 1
+            elif stalled_since is not None:
+                self._report(last_beat - stalled_since, samples)
+                samples, stalled_since = StackCounter(), None
+
+    def _report(self, duration, samples):
+        self.stalls.inc()
+        self.stall_time.observe(duration)
+        total = sum(samples.values())
+        lines = [f"=== {datetime.now().isoformat(timespec='seconds')} loop '{self.name}' travado "
+                 f"por {duration:.2f}s ({total} amostras)"]
+        for stack, count in samples.most_common(self.max_stacks):
+            lines.append(f"--- {count}/{total} amostras")
+            lines.append(stack.rstrip())
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"Erro ao gravar {self.log_file}: {e}")
+        print(f"Aviso: loop '{self.name}' travou por {duration:.2f}s; pilhas em {self.log_file}")
+
+
+def create_metrics(enabled):
+    return Metrics() if enabled else NULL_METRICS
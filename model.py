@@ -0,0 +1,152 @@
+import sys
+
+from recurrence import format_minutes, parse_minutes, parse_rule
+
+SCHEMA_VERSION = 2
+
+
+class Media:
+    # priority, zone e max_lateness em None herdam o valor da playlist
+    __slots__ = ("path", "minutes", "repeats", "priority", "zone", "max_lateness", "rule", "extra")
+
+    def __init__(self, path, minutes=0, repeats=1, priority=None, zone=None, max_lateness=None,
+                 rule=None, extra=None):
+        self.path = sys.intern(path)
+        self.minutes = minutes
+        self.repeats = repeats
+        self.priority = priority
+        self.zone = zone
+        self.max_lateness = max_lateness
+        self.rule = rule
+        self.extra = extra
+
+    def __repr__(self):
+        return f"Media({self.path!r}, time={self.time!r}, repeats={self.repeats})"
+
+    @property
+    def time(self):
+        return format_minutes(self.minutes)
+
+    @classmethod
+    def from_record(cls, record):
+        if isinstance(record, str):
+            # Esquema 1: entrada só com o caminho, que nunca foi agendada
+            return cls(record, minutes=None)
+        record = dict(record)
+        rule = None
+        if record.get("rule") is not None:
+            rule, record["rule"] = parse_rule(record["rule"], record["path"])
+        return cls(record.pop("path"),
+                   minutes=parse_minutes(record.pop("time", None)),
+                   repeats=int(record.pop("repeats", 1)),
+                   priority=record.pop("priority", None),
+                   zone=record.pop("zone", None),
+                   max_lateness=record.pop("max_lateness", None),
+                   rule=rule,
+                   extra=clean_extra(record))
+
+    def to_record(self):
+        record = {"path": self.path, "time": self.time, "repeats": self.repeats}
+        for key in ("priority", "zone", "max_lateness"):
+            value = getattr(self, key)
+            if value is not None:
+                record[key] = value
+        if self.rule is not None:
+            record["rule"] = self.rule.to_record()
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def copy(self):
+        return Media(self.path, self.minutes, self.repeats, self.priority, self.zone,
+                     self.max_lateness, self.rule, dict(self.extra) if self.extra else None)
+
+
+class Playlist:
+    __slots__ = ("files", "minutes", "repeats", "active", "priority", "zone", "max_lateness",
+                 "rule", "extra")
+
+    def __init__(self, files=None, minutes=0, repeats=1, active=True, priority=0, zone=None,
+                 max_lateness=None, rule=None, extra=None):
+        self.files = files if files is not None else []
+        self.minutes = minutes
+        self.repeats = repeats
+        self.active = active
+        self.priority = priority
+        self.zone = zone
+        self.max_lateness = max_lateness
+        self.rule = rule
+        self.extra = extra
+
+    def __repr__(self):
+        return f"Playlist({len(self.files)} mídias, time={self.time!r}, active={self.active})"
+
+    @property
+    def time(self):
+        return format_minutes(self.minutes)
+
+    @classmethod
+    def from_record(cls, record, files=None):
+        record = dict(record)
+        records = record.pop("files", [])
+        if files is None:
+            files = [Media.from_record(media) for media in records]
+        rule = None
+        if record.get("rule") is not None:
+            rule, record["rule"] = parse_rule(record["rule"], "playlist")
+        return cls(files,
+                   minutes=parse_minutes(record.pop("time", None)),
+                   repeats=int(record.pop("repeats", 1)),
+                   active=bool(record.pop("active", True)),
+                   priority=record.pop("priority", 0),
+                   zone=record.pop("zone", None),
+                   max_lateness=record.pop("max_lateness", None),
+                   rule=rule,
+                   extra=clean_extra(record))
+
+    def to_record(self, include_files=True):
+        record = {"time": self.time, "repeats": self.repeats, "active": self.active}
+        if self.priority:
+            record["priority"] = self.priority
+        if self.zone is not None:
+            record["zone"] = self.zone
+        if self.max_lateness is not None:
+            record["max_lateness"] = self.max_lateness
+        if self.rule is not None:
+            record["rule"] = self.rule.to_record()
+        if self.extra:
+            record.update(self.extra)
+        if include_files:
+            record["files"] = [media.to_record() for media in self.files]
+        return record
+
+    def copy(self):
+        return Playlist([media.copy() for media in self.files], self.minutes, self.repeats,
+                        self.active, self.priority, self.zone, self.max_lateness, self.rule,
+                        dict(self.extra) if self.extra else None)
+
+
+def clean_extra(record):
+    # Campos desconhecidos são preservados; uma regra inválida fica guardada como veio
+    if record.get("rule") is None:
+        record.pop("rule", None)
+    return record or None
+
+
+def load_playlists(records):
+    return {name: Playlist.from_record(record) for name, record in records.items()}
+
+
+def dump_playlists(playlists):
+    return {name: playlist.to_record() for name, playlist in playlists.items()}
+
+
+def schema_version(data):
+    # Esquema 1 (sem versão): o próprio arquivo é o dicionário de playlists
+    if isinstance(data, dict) and isinstance(data.get("schema_version"), int):
+        return data["schema_version"]
+    return 1
+
+
+def playlist_records(data):
+    return data["playlists"] if schema_version(data) >= 2 else data
@@ -0,0 +1,388 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from pygame import mixer
+
+
+class PlaybackItem:
+    __slots__ = ("path", "repeats", "info", "priority", "deadline", "queued_at", "load_time",
+                 "started_at")
+
+    def __init__(self, path, repeats=1, info=None, priority=0, deadline=None):
+        self.path = path
+        self.repeats = max(1, int(repeats))
+        self.info = info or {}
+        self.priority = priority
+        self.deadline = deadline
+        self.queued_at = time.time()
+        self.load_time = None
+        self.started_at = None
+
+    def __repr__(self):
+        return f"PlaybackItem({self.path!r}, repeats={self.repeats}, priority={self.priority})"
+
+    @property
+    def key(self):
+        # Mesma mídia, mesma posição da playlist e mesmo horário: o mesmo anúncio
+        info = self.info
+        return self.path, info.get("playlist"), info.get("index"), info.get("scheduled_at")
+
+
+class AnnouncementQueue:
+    # Maior prioridade primeiro; na mesma prioridade, o prazo mais cedo e depois a ordem de chegada
+    # (um clipe interrompido mantém o lugar original).
+    # Um anúncio já na fila (mesma PlaybackItem.key, ex.: gatilho repetido) não entra de novo:
+    # só substitui o anterior se tiver prioridade maior. A mesma mídia em outra posição da
+    # playlist é outro anúncio e toca de novo.
+
+    def __init__(self):
+        self._heap = []
+        self._items = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._items)
+
+    def push(self, item):
+        existing = self._items.get(item.key)
+        if existing is not None and existing.priority >= item.priority:
+            return False
+        self._items[item.key] = item
+        deadline = float("inf") if item.deadline is None else item.deadline
+        heapq.heappush(self._heap, (-item.priority, deadline, item.queued_at, next(self._counter), item))
+        return True
+
+    def top_priority(self):
+        self._discard_stale()
+        return -self._heap[0][0] if self._heap else None
+
+    def peek(self):
+        self._discard_stale()
+        return self._heap[0][4] if self._heap else None
+
+    def pop(self):
+        self._discard_stale()
+        item = heapq.heappop(self._heap)[4]
+        del self._items[item.key]
+        return item
+
+    def clear(self):
+        self._heap.clear()
+        self._items.clear()
+
+    def _discard_stale(self):
+        while self._heap and self._items.get(self._heap[0][4].key) is not self._heap[0][4]:
+            heapq.heappop(self._heap)
+
+
+class PlaybackWorker(threading.Thread):
+    def __init__(self, before_play=None, after_play=None, thread_init=None, cache=None,
+                 resolver=None, on_event=None, poll_interval=0.05, zone=None, channel=None,
+                 gains=(1.0, 1.0)):
+        super().__init__(name="playback" if zone is None else f"playback-{zone}", daemon=True)
+        self.zone = zone
+        # Com um canal dedicado (zonas) tudo toca como Sound nesse canal; senão usa mixer.music
+        self.channel = channel
+        self.gains = gains
+        self.cache = cache
+        self.resolver = resolver
+        self.on_event = on_event
+        self.commands = queue.Queue()
+        self.events = queue.Queue()
+        self.before_play = before_play
+        self.after_play = after_play
+        self.thread_init = thread_init
+        self.poll_interval = poll_interval
+        self._pending = AnnouncementQueue()
+        self._current = None
+        self._sound = None
+        self._start_at = None
+        self._channel = None
+        self._remaining = 0
+        self._queued = None
+        self._queued_sound = None
+        self._cached = False
+        self._prefetched = None
+        self._finished_item = None
+        self._running = True
+
+    # Comandos (seguros para chamar de qualquer thread)
+
+    def play(self, path, repeats=1, priority=0, deadline=None, **info):
+        self.commands.put(("play", PlaybackItem(path, repeats, info, priority, deadline)))
+
+    def enqueue(self, path, repeats=1, priority=0, deadline=None, **info):
+        self.commands.put(("enqueue", PlaybackItem(path, repeats, info, priority, deadline)))
+
+    def stop(self):
+        self.commands.put(("stop", None))
+
+    def set_gains(self, gains):
+        self.commands.put(("gains", gains))
+
+    def skip(self):
+        self.commands.put(("skip", None))
+
+    def shutdown(self, timeout=None):
+        self.commands.put(("shutdown", None))
+        if self.is_alive():
+            self.join(timeout)
+
+    def poll_events(self):
+        while True:
+            try:
+                yield self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    # Thread de reprodução
+
+    def run(self):
+        if self.thread_init:
+            self.thread_init()
+        while self._running:
+            if self._current is not None and self._pending.top_priority() is not None \
+                    and self._pending.top_priority() > self._current.priority:
+                self._preempt()
+            while self._current is None and self._pending:
+                self._start(self._pending.pop())
+            if self._current is None:
+                self._idle()
+            timeout = None if self._current is None else self.poll_interval
+            if self._start_at is not None:
+                timeout = max(0.0, min(timeout, self._start_at - time.monotonic()))
+            try:
+                command, item = self.commands.get(timeout=timeout)
+                self._handle(command, item)
+            except queue.Empty:
+                pass
+
+            if self._start_at is not None:
+                if time.monotonic() >= self._start_at:
+                    self._begin()
+            elif self._current is not None and self._channel is not None:
+                self._advance_channel()
+            elif self._current is not None and not self._is_busy():
+                if self._remaining > 0:
+                    self._play_once()
+                else:
+                    self._finish("finish")
+            if self._current is not None:
+                self._lookahead()
+        self._halt()
+        self._idle()
+
+    def _handle(self, command, item):
+        if command == "enqueue":
+            if not self._pending.push(item):
+                self._emit("duplicate", item)
+        elif command == "play":
+            self._halt()
+            self._pending.clear()
+            self._pending.push(item)
+        elif command == "stop":
+            self._halt()
+            self._pending.clear()
+        elif command == "skip":
+            self._halt()
+        elif command == "gains":
+            self.gains = item
+            if self._channel is not None and self._channel is self.channel:
+                self._channel.set_volume(*self.gains)
+        elif command == "shutdown":
+            self._running = False
+
+    def _start(self, item):
+        if item.deadline is not None and time.time() > item.deadline:
+            self._emit("expired", item)
+            return
+        load_start = time.perf_counter()
+        source, volume = self.resolver(item.path) if self.resolver else (item.path, 1.0)
+        sound = self.cache.get(source) if self.cache is not None else None
+        self._cached = sound is not None
+        try:
+            if sound is None and self.channel is not None:
+                sound = self.cache.load(source) if self.cache is not None else mixer.Sound(source)
+            if sound is None:
+                mixer.music.load(source)
+                mixer.music.set_volume(volume * max(self.gains))
+            else:
+                sound.set_volume(volume)
+        except Exception as e:
+            self._emit("error", item, str(e))
+            return
+        item.load_time = time.perf_counter() - load_start
+        self._current = item
+        self._sound = sound
+        self._remaining = item.repeats
+        # O hook pode pedir um atraso (ex.: tempo para abaixar a música antes do anúncio)
+        lead = self._hook(self.before_play, item)
+        if lead:
+            self._start_at = time.monotonic() + lead
+        else:
+            self._begin()
+
+    def _begin(self):
+        item, sound = self._current, self._sound
+        self._start_at = None
+        item.started_at = time.time()
+        self._emit("start", item, "cache" if self._cached else None)
+        if sound is None:
+            self._play_once()
+        elif self.channel is not None:
+            self._remaining = 0
+            self.channel.play(sound, loops=item.repeats - 1)
+            self.channel.set_volume(*self.gains)
+            self._channel = self.channel
+        else:
+            # Clipes em cache tocam todas as repetições de uma vez no mesmo canal
+            self._remaining = 0
+            self._channel = sound.play(loops=item.repeats - 1)
+            if self._channel is None:
+                self._finish("error", "Nenhum canal de áudio livre")
+            else:
+                self._channel.set_volume(*self.gains)
+
+    def _advance_channel(self):
+        # Clipes em cache seguem no mesmo canal com Channel.queue: o próximo entra sem intervalo
+        channel = self._channel
+        if self._queued is not None and channel.get_queue() is None:
+            queued, self._queued = self._queued, None
+            if queued is not self._current:
+                self._handoff(queued)
+        if not channel.get_busy():
+            self._finish("finish")
+            return
+        self._queue_next()
+
+    def _queue_next(self):
+        if self._queued is self._current and self._queued is not None:
+            return
+        if self._queued is None and self._remaining > 0:
+            self._remaining -= 1
+            self._channel.queue(self._sound)
+            self._queued = self._current
+            return
+        item = self._pending.peek()
+        if item is None or self.cache is None or self._remaining > 0:
+            return
+        if item.priority > self._current.priority:
+            return
+        if self._queued is not None and item.priority <= self._queued.priority:
+            return
+        if item.deadline is not None and time.time() > item.deadline:
+            return
+        source, volume = self.resolver(item.path) if self.resolver else (item.path, 1.0)
+        if source not in self.cache:
+            return
+        load_start = time.perf_counter()
+        sound = self.cache.get(source)
+        if sound is None:
+            return
+        self._pending.pop()
+        sound.set_volume(volume)
+        item.load_time = time.perf_counter() - load_start
+        # Substitui o que estava na fila do canal se chegou algo mais urgente
+        if self._queued is not None:
+            self._pending.push(self._queued)
+        self._channel.queue(sound)
+        self._queued, self._queued_sound = item, sound
+
+    def _handoff(self, item):
+        previous = self._current
+        self._emit("finish", previous)
+        self._current = item
+        self._sound = self._queued_sound
+        self._queued_sound = None
+        self._remaining = item.repeats - 1
+        # A música já está abaixada: o atraso pedido pelo hook não se aplica
+        self._hook(self.before_play, item)
+        item.started_at = time.time()
+        self._emit("start", item, "gapless")
+
+    def _lookahead(self):
+        # Decodifica o próximo clipe enquanto o atual toca
+        item = self._pending.peek()
+        if item is None or self.cache is None or item is self._prefetched:
+            return
+        self._prefetched = item
+        source = self.resolver(item.path)[0] if self.resolver else item.path
+        if source not in self.cache:
+            self.cache.prefetch([source])
+
+    def _unqueue(self):
+        # Parar o canal descarta o que estava na fila dele; o item volta para a fila de anúncios
+        if self._queued is not None and self._queued is not self._current:
+            self._pending.push(self._queued)
+        self._queued = None
+        self._queued_sound = None
+
+    def _play_once(self):
+        self._remaining -= 1
+        try:
+            mixer.music.play()
+        except Exception as e:
+            self._finish("error", str(e))
+
+    def _is_busy(self):
+        if self._channel is not None:
+            return self._channel.get_busy()
+        return mixer.music.get_busy()
+
+    def _halt(self):
+        if self._current is not None:
+            if self._channel is not None:
+                self._channel.stop()
+                self._unqueue()
+            else:
+                mixer.music.stop()
+            self._finish("stopped")
+
+    def _preempt(self):
+        # Um anúncio mais urgente interrompe o atual, que volta para a fila e recomeça depois
+        item = self._current
+        if self._channel is not None:
+            self._channel.stop()
+            self._unqueue()
+        else:
+            mixer.music.stop()
+        self._finish("preempted")
+        item.load_time = None
+        item.started_at = None
+        self._pending.push(item)
+
+    def _finish(self, kind, message=None):
+        item, self._current, self._remaining = self._current, None, 0
+        self._channel = None
+        self._sound = None
+        self._start_at = None
+        self._emit(kind, item, message)
+        # O after_play só roda quando a fila esvazia: o ducking fica mantido durante o bloco
+        self._finished_item = item
+
+    def _idle(self):
+        item, self._finished_item = self._finished_item, None
+        if item is not None:
+            self._hook(self.after_play, item)
+
+    def _hook(self, callback, item):
+        if callback is None:
+            return None
+        try:
+            return callback(item)
+        except Exception as e:
+            self._emit("error", item, str(e))
+            return None
+
+    def _emit(self, kind, item, message=None):
+        event = (kind, item, message, time.time())
+        if self.on_event is None:
+            self.events.put(event)
+            return
+        try:
+            self.on_event(*event)
+        except Exception as e:
+            print(f"Erro ao tratar evento de reprodução: {e}")
@@ -0,0 +1,126 @@
+import json
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+class PlayLog:
+    def __init__(self, path="play_log.jsonl", max_bytes=5 * 1024 * 1024, retention=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="play-log", daemon=True)
+        self._thread.start()
+
+    def record(self, outcome, clip=None, playlist=None, **fields):
+        entry = {"time": datetime.now().isoformat(timespec="milliseconds"), "outcome": outcome,
+                 "clip": clip, "playlist": playlist}
+        entry.update(fields)
+        self._queue.put(entry)
+
+    def close(self, timeout=None):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        # Agrupa o que estiver na fila numa única escrita, sem bloquear quem registra
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [entry for entry in batch if entry is not None]
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"Erro ao gravar log de reprodução: {e}")
+
+    def _write(self, entries):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        oldest = f"{self.path}.{self.retention}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.retention - 1, 0, -1):
+            src = f"{self.path}.{index}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{index + 1}")
+        if self.retention > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def log_files(path="play_log.jsonl", retention=5):
+    files = [f"{path}.{index}" for index in range(retention, 0, -1)] + [path]
+    return [f for f in files if os.path.exists(f)]
+
+
+def read_entries(path="play_log.jsonl", retention=5, since=None):
+    for log_file in log_files(path, retention):
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or entry.get("time", "") >= since:
+                    yield entry
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def clip_counts(entries, outcome="played"):
+    return Counter(entry["clip"] for entry in entries
+                   if entry.get("outcome") == outcome and entry.get("clip"))
+
+
+def start_lag_percentiles(entries, percentiles=(50, 95, 99)):
+    lags = sorted(entry["start_lag"] for entry in entries
+                  if entry.get("start_lag") is not None and entry.get("outcome") != "missed")
+    return {f"p{p}": percentile(lags, p) for p in percentiles}
+
+
+def misses_per_day(entries):
+    return dict(sorted(Counter(entry["time"][:10] for entry in entries
+                               if entry.get("outcome") == "missed").items()))
+
+
+def summary(entries):
+    entries = list(entries)
+    return {
+        "entries": len(entries),
+        "outcomes": dict(Counter(entry.get("outcome") for entry in entries)),
+        "start_lag": start_lag_percentiles(entries),
+        "misses_per_day": misses_per_day(entries),
+        "clips": dict(clip_counts(entries).most_common())
+    }
+
+
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else "play_log.jsonl"
+    print(json.dumps(summary(read_entries(log_path)), indent=4, ensure_ascii=False))
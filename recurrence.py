@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+WEEKDAYS = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+ALL_DAYS = 0b1111111
+
+
+def parse_minutes(time_str):
+    # "HH:MM" -> minutos desde a meia-noite; None para horário ausente ou inválido (não agenda)
+    try:
+        hours, minutes = time_str.split(":")
+        hours, minutes = int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+def format_minutes(minutes):
+    if minutes is None:
+        return None
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class Rule:
+    # Regra de recorrência de uma playlist ou mídia (chave "rule" no JSON). O horário de início
+    # continua sendo o "time" da entrada; a regra só acrescenta:
+    #   "days": ["seg", "qua"] ou [0, 2]  dias da semana (0 = segunda)
+    #   "start_date"/"end_date": "AAAA-MM-DD"  período em que vale (inclusive)
+    #   "every": 30, "until": "18:00"  repete a cada N minutos até o horário final
+    #   "except": ["AAAA-MM-DD", ...]  datas sem anúncio
+    __slots__ = ("days", "start_date", "end_date", "every", "until", "excluded")
+
+    def __init__(self, days=ALL_DAYS, start_date=None, end_date=None, every=None, until=None,
+                 excluded=()):
+        self.days = days
+        self.start_date = start_date
+        self.end_date = end_date
+        self.every = every
+        self.until = until
+        self.excluded = frozenset(excluded)
+
+    @classmethod
+    def from_record(cls, record):
+        if not isinstance(record, dict):
+            raise ValueError("Regra de recorrência deve ser um objeto")
+        days = ALL_DAYS
+        if record.get("days") is not None:
+            days = 0
+            for day in record["days"]:
+                if isinstance(day, str) and day.lower()[:3] in WEEKDAYS:
+                    day = WEEKDAYS.index(day.lower()[:3])
+                if not isinstance(day, int) or not 0 <= day < 7:
+                    raise ValueError(f"Dia da semana inválido: {day}")
+                days |= 1 << day
+            if not days:
+                raise ValueError("Regra sem nenhum dia da semana")
+        every = record.get("every")
+        if every is not None and (not isinstance(every, int) or every < 1):
+            raise ValueError("'every' deve ser um número inteiro de minutos")
+        until = None
+        if record.get("until") is not None:
+            until = parse_minutes(record["until"])
+            if until is None:
+                raise ValueError(f"Horário final inválido: {record['until']}")
+        return cls(days, parse_date(record.get("start_date")), parse_date(record.get("end_date")),
+                   every, until, (parse_date(day) for day in record.get("except") or ()))
+
+    def to_record(self):
+        record = {}
+        if self.days != ALL_DAYS:
+            record["days"] = [WEEKDAYS[day] for day in range(7) if self.days & (1 << day)]
+        if self.start_date:
+            record["start_date"] = self.start_date.isoformat()
+        if self.end_date:
+            record["end_date"] = self.end_date.isoformat()
+        if self.every:
+            record["every"] = self.every
+        if self.until is not None:
+            record["until"] = format_minutes(self.until)
+        if self.excluded:
+            record["except"] = sorted(day.isoformat() for day in self.excluded)
+        return record
+
+
+def parse_date(value):
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Data inválida: {value}")
+
+
+def parse_rule(record, owner):
+    # Regra inválida não derruba o carregamento: a entrada fica sem agendamento até ser corrigida
+    try:
+        return Rule.from_record(record), None
+    except ValueError as e:
+        print(f"Aviso: regra de recorrência inválida em {owner}: {e}")
+        return None, record
+
+
+class Schedule:
+    # Regra compilada: horários do dia já expandidos e ordenados, dias da semana em bitmask.
+    # O próximo disparo sai de um bisect no dia certo, olhando no máximo 7 dias + exceções.
+    __slots__ = ("times", "days", "start_date", "end_date", "excluded")
+
+    def __init__(self, times, days=ALL_DAYS, start_date=None, end_date=None, excluded=frozenset()):
+        self.times = times
+        self.days = days
+        self.start_date = start_date
+        self.end_date = end_date
+        self.excluded = excluded
+
+    def active_on(self, day):
+        return (self.days & (1 << day.weekday()) and day not in self.excluded
+                and (self.start_date is None or day >= self.start_date)
+                and (self.end_date is None or day <= self.end_date))
+
+    def next_fire(self, start):
+        # Primeiro disparo em `start` ou depois (horários em minutos cheios)
+        day = start.date()
+        minute = start.hour * 60 + start.minute + (1 if start.second or start.microsecond else 0)
+        if self.start_date is not None and day < self.start_date:
+            day, minute = self.start_date, 0
+        for _ in range(8 + len(self.excluded)):
+            if self.end_date is not None and day > self.end_date:
+                return None
+            if self.active_on(day):
+                i = bisect_left(self.times, minute)
+                if i < len(self.times):
+                    return datetime.combine(day, datetime.min.time()) + timedelta(minutes=self.times[i])
+            day += timedelta(days=1)
+            minute = 0
+        return None
+
+    def occurrences(self, day):
+        if not self.active_on(day):
+            return []
+        midnight = datetime.combine(day, datetime.min.time())
+        return [midnight + timedelta(minutes=minutes) for minutes in self.times]
+
+
+def compile_schedule(minutes, rule=None):
+    if minutes is None:
+        return None
+    if rule is None:
+        return Schedule((minutes,))
+    times = [minutes]
+    if rule.every:
+        end = rule.until if rule.until is not None else 24 * 60 - 1
+        times = list(range(minutes, end + 1, rule.every)) or [minutes]
+    return Schedule(tuple(times), rule.days, rule.start_date, rule.end_date, rule.excluded)
@@ -0,0 +1,205 @@
+import heapq
+import itertools
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from recurrence import compile_schedule
+
+ScheduledEvent = namedtuple("ScheduledEvent", "kind playlist index fire_at lateness")
+
+
+def fired_signature(kind, entry):
+    # Independe do nome da playlist e da posição da mídia: renomear, reordenar ou recarregar
+    # a mesma entrada não a toca de novo, e uma entrada nova no mesmo minuto ainda toca
+    if kind == "playlist":
+        return kind, entry.minutes, tuple(media.path for media in entry.files)
+    return kind, entry.minutes, entry.path
+
+
+class ScheduleIndex:
+    CATCH_UP_POLICIES = ("fire", "skip")
+
+    def __init__(self, catch_up_policy="fire", max_lateness=900, grace=60, clock=datetime.now):
+        if catch_up_policy not in self.CATCH_UP_POLICIES:
+            raise ValueError(f"Política de recuperação inválida: {catch_up_policy}")
+        self.catch_up_policy = catch_up_policy
+        self.max_lateness = max_lateness
+        self.grace = grace
+        self.clock = clock
+        self._heap = []
+        self._entries = {}
+        self._schedules = {}
+        # Playlist ou mídia de cada chave, para reconhecer o que já tocou
+        self._sources = {}
+        self._keys_by_playlist = {}
+        # Entradas (fired_signature) que já saíram da fila no minuto `_fired_minute`: reindexar
+        # nesse minuto (liga/desliga, renomear, recarga, sincronização) não as toca de novo
+        self._fired = set()
+        self._fired_minute = None
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, playlists, now=None):
+        now = now or self.clock()
+        self._heap = []
+        self._entries = {}
+        self._schedules = {}
+        self._sources = {}
+        self._keys_by_playlist = {}
+        for name, data in playlists.items():
+            self.update_playlist(name, data, now)
+
+    def update_playlist(self, name, data, now=None):
+        now = now or self.clock()
+        self.remove_playlist(name)
+        if not data.active:
+            return
+        self._set_entry(("playlist", name), data, now)
+        for idx, media in enumerate(data.files):
+            self._set_entry(("media", name, idx), media, now)
+
+    def update_media(self, name, index, media, active=True, now=None):
+        now = now or self.clock()
+        key = ("media", name, index)
+        self._drop_entry(key)
+        if active:
+            self._set_entry(key, media, now)
+
+    def remove_playlist(self, name):
+        for key in self._keys_by_playlist.pop(name, ()):
+            self._entries.pop(key, None)
+            self._schedules.pop(key, None)
+            self._sources.pop(key, None)
+        self._maybe_compact()
+
+    def next_fire_time(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def seconds_until_next(self, now=None):
+        fire_at = self.next_fire_time()
+        if fire_at is None:
+            return None
+        now = now or self.clock()
+        return max(0.0, (fire_at - now).total_seconds())
+
+    def upcoming(self, until):
+        # Percorre só o topo do heap: filhos de um nó posterior a `until` também são
+        # posteriores, então a subárvore inteira fica de fora
+        events = []
+        heap = self._heap
+        stack = [0] if heap else []
+        while stack:
+            i = stack.pop()
+            fire_at, token, key = heap[i]
+            if fire_at > until:
+                continue
+            if self._entries.get(key) == token:
+                events.append(ScheduledEvent(key[0], key[1], key[2] if len(key) > 2 else None,
+                                             fire_at, 0.0))
+            stack.extend(j for j in (2 * i + 1, 2 * i + 2) if j < len(heap))
+        events.sort(key=lambda event: event.fire_at)
+        return events
+
+    def next_events(self, count, now=None):
+        # Próximos `count` disparos de todas as entradas, em ordem: parte do próximo horário de
+        # cada uma (já no heap) e avança só as que saem da fila
+        now = now or self.clock()
+        pending = [item for item in self._heap if self._entries.get(item[2]) == item[1]]
+        heapq.heapify(pending)
+        events = []
+        while pending and len(events) < count:
+            fire_at, token, key = heapq.heappop(pending)
+            events.append(ScheduledEvent(key[0], key[1], key[2] if len(key) > 2 else None,
+                                         fire_at, 0.0))
+            next_at = self._schedules[key].next_fire(max(fire_at, now) + timedelta(minutes=1))
+            if next_at is not None:
+                heapq.heappush(pending, (next_at, token, key))
+        return events
+
+    def plan(self, day):
+        # Todos os disparos do dia, direto das regras compiladas (não mexe no heap)
+        events = []
+        for key, schedule in self._schedules.items():
+            for fire_at in schedule.occurrences(day):
+                events.append(ScheduledEvent(key[0], key[1], key[2] if len(key) > 2 else None,
+                                             fire_at, 0.0))
+        events.sort(key=lambda event: (event.fire_at, event.playlist,
+                                       -1 if event.index is None else event.index))
+        return events
+
+    def pop_due(self, now=None):
+        now = now or self.clock()
+        due, missed = [], []
+        minute = now.replace(second=0, microsecond=0)
+        if minute != self._fired_minute:
+            self._fired = set()
+            self._fired_minute = minute
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            fire_at, _, key = heapq.heappop(self._heap)
+            del self._entries[key]
+            self._fired.add(fired_signature(key[0], self._sources[key]))
+            lateness = (now - fire_at).total_seconds()
+            event = ScheduledEvent(key[0], key[1], key[2] if len(key) > 2 else None,
+                                   fire_at, lateness)
+            if lateness <= self.grace:
+                due.append(event)
+            elif self.catch_up_policy == "fire" and lateness <= self.max_lateness:
+                due.append(event)
+            else:
+                missed.append(event)
+
+            # Reagenda para o próximo horário da regra depois de agora; uma parada longa
+            # dispara só uma vez
+            next_at = self._schedules[key].next_fire(minute + timedelta(minutes=1))
+            if next_at is None:
+                self._drop_entry(key)
+            else:
+                self._push(key, next_at)
+        return due, missed
+
+    def _set_entry(self, key, entry, now):
+        if entry.extra and "rule" in entry.extra:
+            # Regra inválida (guardada como veio): não agenda até ser corrigida
+            return
+        schedule = compile_schedule(entry.minutes, entry.rule)
+        if schedule is None:
+            return
+        self._schedules[key] = schedule
+        self._sources[key] = entry
+        self._keys_by_playlist.setdefault(key[1], set()).add(key)
+        # Uma entrada marcada para o minuto corrente ainda toca, como no scan antigo,
+        # a não ser que já tenha tocado neste minuto
+        start = now.replace(second=0, microsecond=0)
+        if start == self._fired_minute and fired_signature(key[0], entry) in self._fired:
+            start += timedelta(minutes=1)
+        fire_at = schedule.next_fire(start)
+        if fire_at is not None:
+            self._push(key, fire_at)
+
+    def _push(self, key, fire_at):
+        token = next(self._counter)
+        self._entries[key] = token
+        self._keys_by_playlist.setdefault(key[1], set()).add(key)
+        heapq.heappush(self._heap, (fire_at, token, key))
+
+    def _drop_entry(self, key):
+        self._schedules.pop(key, None)
+        self._sources.pop(key, None)
+        self._entries.pop(key, None)
+        self._keys_by_playlist.get(key[1], set()).discard(key)
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._entries.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [item for item in self._heap if self._entries.get(item[2]) == item[1]]
+            heapq.heapify(self._heap)
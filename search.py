@@ -0,0 +1,214 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+from recurrence import compile_schedule
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+EMPTY = frozenset()
+
+
+def normalize(text):
+    # Sem acento e sem maiúsculas: "Promoção" acha "promocao" e vice-versa
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def prefixes(text):
+    # Termos de 1 e 2 letras casam com o início de uma palavra do nome
+    words = TOKEN_RE.findall(text)
+    return {word[:1] for word in words} | {word[:2] for word in words if len(word) > 1}
+
+
+def times_of(entry):
+    # Horários do dia em que a entrada dispara; regra inválida não agenda, como no agendador
+    if entry.extra and "rule" in entry.extra:
+        return ()
+    schedule = compile_schedule(entry.minutes, entry.rule)
+    return schedule.times if schedule is not None else ()
+
+
+def window_ranges(start, end):
+    # Janela inclusive; início depois do fim atravessa a meia-noite
+    if start <= end:
+        return ((start, end),)
+    return ((start, 24 * 60 - 1), (0, end))
+
+
+class SearchIndex:
+    # Índice em memória das mídias de todas as playlists, chaveado por (playlist, índice):
+    # nome do arquivo em palavras (prefixos curtos) e trigramas (trecho), horários ordenados
+    # e playlist ativa. O core o atualiza junto com o índice do agendador; até o primeiro
+    # rebuild as atualizações são ignoradas, para a construção não pesar na inicialização
+
+    def __init__(self):
+        self.built = False
+        self.clear()
+
+    def clear(self):
+        self._names = {}
+        self._times = {}
+        self._prefixes = {}
+        self._trigrams = {}
+        self._timeline = []
+        self._keys_by_playlist = {}
+        self._playlist_times = {}
+        self._active = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def rebuild(self, playlists):
+        self.clear()
+        for name, data in playlists.items():
+            self._add_playlist(name, data)
+        self._timeline.sort()
+        self.built = True
+
+    def update_playlist(self, name, data):
+        if not self.built:
+            return
+        self.remove_playlist(name)
+        if data is not None:
+            self._add_playlist(name, data, insert=True)
+
+    def update_media(self, name, index, media):
+        if not self.built:
+            return
+        key = (name, index)
+        self._remove(key)
+        self._add(key, media, insert=True)
+
+    def remove_playlist(self, name):
+        for key in self._keys_by_playlist.pop(name, ()):
+            self._remove(key)
+        self._playlist_times.pop(name, None)
+        self._active.pop(name, None)
+
+    def _add_playlist(self, name, data, insert=False):
+        self._active[name] = data.active
+        self._playlist_times[name] = times_of(data)
+        self._keys_by_playlist[name] = set()
+        for index, media in enumerate(data.files):
+            self._add((name, index), media, insert)
+
+    def _add(self, key, media, insert=False):
+        # Uma mídia toca nos próprios horários e nos da playlist
+        name = normalize(media.path.replace("\\", "/").rsplit("/", 1)[-1])
+        times = sorted(set(times_of(media)).union(self._playlist_times.get(key[0], ())))
+        self._names[key] = name
+        self._times[key] = times
+        self._keys_by_playlist.setdefault(key[0], set()).add(key)
+        for prefix in prefixes(name):
+            self._prefixes.setdefault(prefix, set()).add(key)
+        for gram in trigrams(name):
+            self._trigrams.setdefault(gram, set()).add(key)
+        for minutes in times:
+            if insert:
+                insort(self._timeline, (minutes, key))
+            else:
+                self._timeline.append((minutes, key))
+
+    def _remove(self, key):
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        self._keys_by_playlist.get(key[0], set()).discard(key)
+        for index_map, parts in ((self._prefixes, prefixes(name)),
+                                 (self._trigrams, trigrams(name))):
+            for part in parts:
+                keys = index_map.get(part)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index_map[part]
+        for minutes in self._times.pop(key):
+            i = bisect_left(self._timeline, (minutes, key))
+            if i < len(self._timeline) and self._timeline[i] == (minutes, key):
+                del self._timeline[i]
+
+    def search(self, text="", start=None, end=None, active=None, limit=None):
+        # Todas as palavras de `text` precisam aparecer no nome do arquivo; janela de horário
+        # (minutos do dia) e filtro de ativa são opcionais. Retorna chaves (playlist, índice)
+        # ordenadas; com `limit`, só as primeiras nessa ordem
+        terms = TOKEN_RE.findall(normalize(text))
+        ranges = None
+        if start is not None or end is not None:
+            ranges = window_ranges(0 if start is None else start, 24 * 60 - 1 if end is None else end)
+
+        # O filtro mais seletivo gera os candidatos; os demais só conferem cada um
+        plans = [(self._estimate(term), term) for term in terms]
+        if ranges is not None:
+            plans.append((self._window_size(ranges), None))
+        plans.sort(key=lambda plan: plan[0])
+        if not plans:
+            candidates = self._names
+        elif plans[0][1] is None:
+            candidates = self._window_keys(ranges)
+        else:
+            candidates = self._term_keys(plans[0][1])
+        # O termo que gerou os candidatos também é conferido: trigramas não garantem o trecho
+        checks = terms
+
+        found = (key for key in candidates if self._matches(key, active, ranges, checks))
+        # Os candidatos vêm de conjuntos, sem ordem: o limite só vale depois de ordenar
+        if limit:
+            return heapq.nsmallest(limit, found)
+        return sorted(found)
+
+    def _matches(self, key, active, ranges, checks):
+        if active is not None and self._active.get(key[0]) != active:
+            return False
+        if ranges is not None and not any(self._fires_within(key, low, high)
+                                          for low, high in ranges):
+            return False
+        return all(self._name_matches(key, term) for term in checks)
+
+    def _estimate(self, term):
+        # Tamanho máximo do resultado de um termo: o menor conjunto de trigramas dele
+        if len(term) < 3:
+            return len(self._prefixes.get(term, EMPTY))
+        return min(len(self._trigrams.get(gram, EMPTY)) for gram in trigrams(term))
+
+    def _term_keys(self, term):
+        if len(term) < 3:
+            yield from self._prefixes.get(term, EMPTY)
+            return
+        # Percorre o menor conjunto de trigramas e testa os outros; o trecho é conferido depois
+        sets = sorted((self._trigrams.get(gram, EMPTY) for gram in trigrams(term)), key=len)
+        for key in sets[0]:
+            if all(key in other for other in sets[1:]):
+                yield key
+
+    def _name_matches(self, key, term):
+        if len(term) < 3:
+            return key in self._prefixes.get(term, EMPTY)
+        return term in self._names[key]
+
+    def _window_size(self, ranges):
+        timeline = self._timeline
+        return sum(bisect_left(timeline, (high + 1,)) - bisect_left(timeline, (low,))
+                   for low, high in ranges)
+
+    def _window_keys(self, ranges):
+        # Uma mídia pode disparar várias vezes na janela: cada chave sai uma vez só
+        timeline = self._timeline
+        seen = set()
+        for low, high in ranges:
+            for _, key in timeline[bisect_left(timeline, (low,)):bisect_left(timeline, (high + 1,))]:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def _fires_within(self, key, low, high):
+        times = self._times[key]
+        i = bisect_left(times, low)
+        return i < len(times) and times[i] <= high
+
+    def times(self, key):
+        return self._times.get(key, ())
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from model import (SCHEMA_VERSION, Media, Playlist, dump_playlists, load_playlists,
+                   playlist_records, schema_version)
+
+
+def write_json_atomic(path, data, indent=4):
+    # Grava num arquivo temporário e troca de uma vez: uma queda no meio nunca trunca o original
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonPlaylistStore:
+    name = "json"
+
+    def __init__(self, path="playlists.json", read_only=False):
+        self.path = path
+        # Só consulta (ex.: --plan): não migra, não move arquivo danificado e não grava
+        self.read_only = read_only
+        # (mtime, tamanho, sha256) do arquivo como foi lido/gravado por nós e o conteúdo dele;
+        # é a base para reconhecer alterações externas e comparar com as edições locais
+        self.signature = None
+        self.synced = {}
+        # Com a recarga automática ligada, não sobrescreve um arquivo alterado por outro programa
+        self.guard_external = False
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                raw = f.read()
+            data = json.loads(raw)
+            version = schema_version(data)
+            playlists = load_playlists(playlist_records(data))
+            self.mark_synced(raw_signature(st, raw), dump_playlists(playlists))
+        except Exception as e:
+            if self.read_only:
+                print(f"Erro ao carregar {self.path}: {e}")
+                return {}
+            # Preserva o arquivo danificado em vez de sobrescrevê-lo no próximo salvamento
+            corrupt_path = f"{self.path}.corrupt-{time.strftime('%Y%m%d_%H%M%S')}"
+            print(f"Erro ao carregar {self.path}: {e}. Arquivo movido para {corrupt_path}")
+            os.replace(self.path, corrupt_path)
+            return {}
+        if version < SCHEMA_VERSION and not self.read_only:
+            self.migrate(playlists, version)
+        return playlists
+
+    def migrate(self, playlists, version):
+        # Migração única: guarda o arquivo antigo ao lado e regrava tudo no esquema atual
+        backup_path = f"{self.path}.v{version}"
+        if not os.path.exists(backup_path):
+            shutil.copy2(self.path, backup_path)
+        self.save_all(playlists)
+        print(f"{self.path} migrado do esquema {version} para {SCHEMA_VERSION} "
+              f"(original em {backup_path})")
+
+    def save_all(self, playlists):
+        if self.read_only:
+            return False
+        if self.guard_external and self.modified_externally():
+            print(f"Aviso: {self.path} foi alterado por outro programa; "
+                  f"as alterações locais serão mescladas na recarga")
+            return False
+        data = {"schema_version": SCHEMA_VERSION, "playlists": dump_playlists(playlists)}
+        write_json_atomic(self.path, data)
+        # Lê de volta para a assinatura bater com os bytes gravados (fim de linha no Windows)
+        with open(self.path, 'rb') as f:
+            self.mark_synced(raw_signature(os.fstat(f.fileno()), f.read()), data["playlists"])
+        return True
+
+    # Alterações externas (recarga automática)
+
+    def mark_synced(self, signature, records=None):
+        self.signature = signature
+        if records is not None:
+            self.synced = records
+
+    def changed_on_disk(self):
+        # Só stat: barato o bastante para rodar a cada segundo
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return self.signature is not None and (st.st_mtime_ns, st.st_size) != self.signature[:2]
+
+    def modified_externally(self):
+        if not self.changed_on_disk():
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            return False
+        # Só a data mudou (ex.: cópia do mesmo arquivo): conteúdo igual não é alteração
+        return digest != self.signature[2]
+
+    def read_disk(self):
+        # Devolve (playlists, assinatura); playlists None quando o conteúdo é o mesmo já conhecido
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            raw = f.read()
+        signature = raw_signature(st, raw)
+        if self.signature is not None and signature[2] == self.signature[2]:
+            return None, signature
+        return load_playlists(playlist_records(json.loads(raw))), signature
+
+    def save_playlist(self, playlists, name):
+        self.save_all(playlists)
+
+    def save_playlist_settings(self, playlists, name):
+        self.save_all(playlists)
+
+    def rename_playlist(self, playlists, old_name, new_name):
+        self.save_all(playlists)
+
+    def delete_playlist(self, playlists, name):
+        self.save_all(playlists)
+
+    def save_media(self, playlists, name, index):
+        self.save_all(playlists)
+
+    def append_media(self, playlists, name, count):
+        self.save_all(playlists)
+
+    def close(self):
+        pass
+
+
+def raw_signature(st, raw):
+    return st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest()
+
+
+class SqlitePlaylistStore:
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS playlists (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS media (
+            playlist TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (playlist, position)
+        );
+    """
+
+    def __init__(self, path="playlists.db", import_from="playlists.json", read_only=False):
+        self.path = path
+        self._lock = threading.RLock()
+        if read_only:
+            # Só consulta: abre o banco como está, sem criar, migrar ou importar
+            if os.path.exists(path):
+                self.conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True,
+                                            check_same_thread=False, isolation_level=None)
+            else:
+                self.conn = sqlite3.connect(":memory:", check_same_thread=False,
+                                            isolation_level=None)
+                self.conn.executescript(self.SCHEMA)
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # FULL: cada commit chega ao disco antes de retornar (PCs das lojas sofrem quedas de energia)
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(self.SCHEMA)
+        self.migrate()
+        if import_from:
+            self.import_json(import_from)
+
+    def import_json(self, json_path):
+        with self._lock:
+            if self._get_meta("imported_from") is not None:
+                return False
+            if self.conn.execute("SELECT 1 FROM playlists LIMIT 1").fetchone():
+                return False
+            playlists = JsonPlaylistStore(json_path).load() if os.path.exists(json_path) else {}
+            with self._transaction():
+                for name in playlists:
+                    self._write_playlist(playlists, name)
+                self._set_meta("imported_from", os.path.abspath(json_path))
+            if playlists:
+                print(f"{len(playlists)} playlists importadas de {json_path} para {self.path}")
+            return True
+
+    def migrate(self):
+        with self._lock:
+            version = int(self._get_meta("schema_version") or 1)
+            if version >= SCHEMA_VERSION:
+                return
+            # Esquema 1 guardava mídias como caminho puro ou dicionário; regrava tudo normalizado
+            playlists = self.load()
+            with self._transaction():
+                for name in playlists:
+                    self._write_playlist(playlists, name)
+                self._set_meta("schema_version", str(SCHEMA_VERSION))
+            if playlists:
+                print(f"{self.path} migrado do esquema {version} para {SCHEMA_VERSION}")
+
+    def load(self):
+        with self._lock:
+            files = {}
+            for name, data in self.conn.execute(
+                    "SELECT playlist, data FROM media ORDER BY playlist, position"):
+                files.setdefault(name, []).append(Media.from_record(json.loads(data)))
+            return {name: Playlist.from_record(json.loads(data), files.get(name, []))
+                    for name, data in self.conn.execute(
+                        "SELECT name, data FROM playlists ORDER BY position")}
+
+    def save_all(self, playlists):
+        with self._lock, self._transaction():
+            self.conn.execute("DELETE FROM media")
+            self.conn.execute("DELETE FROM playlists")
+            for name in playlists:
+                self._write_playlist(playlists, name)
+
+    def save_playlist(self, playlists, name):
+        with self._lock, self._transaction():
+            self._write_playlist(playlists, name)
+
+    def save_playlist_settings(self, playlists, name):
+        with self._lock, self._transaction():
+            self._write_playlist_row(playlists, name)
+
+    def rename_playlist(self, playlists, old_name, new_name):
+        with self._lock, self._transaction():
+            # Vai para o fim, como no dicionário em memória (core.rename_playlist)
+            self.conn.execute(
+                "UPDATE playlists SET name = ?, position = (SELECT MAX(position) + 1 FROM playlists) "
+                "WHERE name = ?", (new_name, old_name))
+            self.conn.execute("UPDATE media SET playlist = ? WHERE playlist = ?", (new_name, old_name))
+
+    def delete_playlist(self, playlists, name):
+        with self._lock, self._transaction():
+            self.conn.execute("DELETE FROM media WHERE playlist = ?", (name,))
+            self.conn.execute("DELETE FROM playlists WHERE name = ?", (name,))
+
+    def save_media(self, playlists, name, index):
+        media = playlists[name].files[index]
+        with self._lock, self._transaction():
+            self.conn.execute("INSERT OR REPLACE INTO media (playlist, position, data) VALUES (?, ?, ?)",
+                              (name, index, json.dumps(media.to_record())))
+
+    def append_media(self, playlists, name, count):
+        files = playlists[name].files
+        start = len(files) - count
+        with self._lock, self._transaction():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO media (playlist, position, data) VALUES (?, ?, ?)",
+                [(name, start + i, json.dumps(media.to_record()))
+                 for i, media in enumerate(files[start:])])
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _write_playlist(self, playlists, name):
+        self._write_playlist_row(playlists, name)
+        self.conn.execute("DELETE FROM media WHERE playlist = ?", (name,))
+        self.conn.executemany(
+            "INSERT INTO media (playlist, position, data) VALUES (?, ?, ?)",
+            [(name, i, json.dumps(media.to_record())) for i, media in enumerate(playlists[name].files)])
+
+    def _write_playlist_row(self, playlists, name):
+        data = playlists[name].to_record(include_files=False)
+        row = self.conn.execute("SELECT position FROM playlists WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            position = self.conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM playlists").fetchone()[0]
+        else:
+            position = row[0]
+        self.conn.execute("INSERT OR REPLACE INTO playlists (name, position, data) VALUES (?, ?, ?)",
+                          (name, position, json.dumps(data)))
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+def create_store(kind, json_path="playlists.json", db_path="playlists.db", read_only=False):
+    if kind == "sqlite":
+        return SqlitePlaylistStore(db_path, import_from=json_path, read_only=read_only)
+    if kind == "json":
+        return JsonPlaylistStore(json_path, read_only=read_only)
+    raise ValueError(f"Tipo de armazenamento desconhecido: {kind}")
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from availability import stat_path
+from model import Playlist
+from storage import write_json_atomic
+from transfer import (TransferProgress, build_export_entries, copy_file, hash_sources,
+                      playlist_settings)
+
+MANIFEST_NAME = "manifest.json"
+SYNC_FORMAT = 1
+
+# Pasta central (compartilhamento de rede ou pasta local):
+#   manifest.json            {"format": 1, "revision": ..., "playlists": {id: playlist}}
+#   media/<hash>/<arquivo>   conteúdo endereçado pelo sha256, igual à exportação
+# Cada mídia do manifesto traz "sha256" e "size"; a loja só baixa o conteúdo que ainda não tem
+
+
+def playlist_id(playlist_data):
+    return (playlist_data.extra or {}).get("sync_id")
+
+
+def assign_playlist_id(playlist_data):
+    # ID estável: o nome pode mudar na central sem virar outra playlist nas lojas
+    if playlist_id(playlist_data) is None:
+        playlist_data.extra = dict(playlist_data.extra or {}, sync_id=uuid.uuid4().hex)
+    return playlist_id(playlist_data)
+
+
+def share_path(base_dir, relpath):
+    path = os.path.normpath(os.path.join(base_dir, *relpath.replace("\\", "/").split("/")))
+    if not path.startswith(os.path.normpath(base_dir) + os.sep):
+        raise ValueError(f"Caminho inválido no manifesto: {relpath}")
+    return path
+
+
+def load_sync_state(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Erro ao carregar {state_file}: {e}")
+        return {}
+
+
+def publish_to_share(playlists, share_dir, progress, workers=4, stat=stat_path, digests=None):
+    # Lado da central: copia só o conteúdo que a pasta ainda não tem e regrava o manifesto.
+    # As playlists precisam ter ID (assign_playlist_id) antes de publicar
+    paths = list(dict.fromkeys(media.path for playlist_data in playlists.values()
+                               for media in playlist_data.files))
+    digests, sizes = hash_sources(paths, progress, workers, stat, digests)
+    records, targets = {}, {}
+    for name, playlist_data in playlists.items():
+        record = playlist_data.to_record()
+        entries, playlist_targets = build_export_entries(record, digests)
+        for entry in entries:
+            entry["size"] = sizes[playlist_targets[entry["sha256"]][1]]
+        targets.update(playlist_targets)
+        record = playlist_settings(record)
+        record.pop("sync_id", None)
+        record.update(name=name, files=entries)
+        records[playlist_id(playlist_data)] = record
+
+    pending = []
+    for digest, (relpath, src_path) in targets.items():
+        st = stat_path(share_path(share_dir, relpath))
+        if not st.exists or st.size != sizes[src_path]:
+            pending.append((digest, relpath, src_path))
+    copy_all(pending, lambda relpath, src_path: (src_path, share_path(share_dir, relpath)),
+             sizes, progress, workers)
+
+    failed = {path for path, _ in progress.errors}
+    for record in records.values():
+        record["files"] = [entry for entry in record["files"]
+                           if targets[entry["sha256"]][1] not in failed]
+    write_json_atomic(os.path.join(share_dir, MANIFEST_NAME), {
+        "format": SYNC_FORMAT,
+        "revision": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "playlists": records
+    })
+    return records
+
+
+def copy_all(pending, locate, sizes, progress, workers):
+    # pending: (sha256, caminho relativo, origem); cada cópia confere o hash antes de renomear
+    progress.start_phase("copy", sum(sizes[src] for _, _, src in pending), len(pending))
+
+    def task(item):
+        digest, relpath, src = item
+        try:
+            copy_file(*locate(relpath, src), progress, expected_digest=digest)
+        except Exception as e:
+            progress.error(src, e)
+        progress.file_done()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(task, pending))
+
+
+def read_manifest(share_dir, state):
+    # None se o manifesto não mudou desde a última sincronização completa
+    manifest_path = os.path.join(share_dir, MANIFEST_NAME)
+    st = os.stat(manifest_path)
+    signature = [st.st_mtime_ns, st.st_size]
+    if signature == state.get("manifest_stat"):
+        return None, signature, None
+    with open(manifest_path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest == state.get("manifest_sha256"):
+        return None, signature, digest
+    manifest = json.loads(raw)
+    if not isinstance(manifest.get("playlists"), dict):
+        raise ValueError("Manifesto de sincronização inválido!")
+    if manifest.get("format", SYNC_FORMAT) > SYNC_FORMAT:
+        raise ValueError(f"Manifesto no formato {manifest['format']}, mais novo que este programa")
+    return manifest, signature, digest
+
+
+def pull_from_share(share_dir, library_dir, state, progress, workers=4, stat=stat_path):
+    # Retorna ((playlists por ID, IDs removidos) ou None se nada mudou, novo estado).
+    # Uma playlist com mídia que falhou na cópia fica de fora e é tentada de novo na próxima vez
+    library_dir = os.path.abspath(library_dir)
+    manifest, signature, digest = read_manifest(share_dir, state)
+    if manifest is None:
+        return None, dict(state, manifest_stat=signature)
+
+    wanted, sizes = {}, {}
+    for record in manifest["playlists"].values():
+        for media in record["files"]:
+            wanted[media["sha256"]] = media["path"]
+            sizes[media["path"]] = media.get("size") or 0
+    pending = []
+    for sha256, relpath in wanted.items():
+        st = stat(share_path(library_dir, relpath))
+        if not st.exists or (sizes[relpath] and st.size != sizes[relpath]):
+            pending.append((sha256, relpath, relpath))
+    copy_all(pending, lambda relpath, _: (share_path(share_dir, relpath),
+                                          share_path(library_dir, relpath)),
+             sizes, progress, workers)
+    # Com o MediaIndex do core, isto já atualiza o stat em cache dos arquivos recém-baixados
+    for _, relpath, _ in pending:
+        stat(share_path(library_dir, relpath))
+
+    failed = {relpath for relpath, _ in progress.errors}
+    playlists = {}
+    for pid, record in manifest["playlists"].items():
+        if any(media["path"] in failed for media in record["files"]):
+            print(f"Aviso: playlist '{record.get('name', pid)}' não sincronizada: "
+                  f"falha ao copiar mídias")
+            continue
+        files = [dict({key: value for key, value in media.items()
+                       if key not in ("sha256", "size")}, path=share_path(library_dir, media["path"]))
+                 for media in record["files"]]
+        settings = {key: value for key, value in record.items() if key not in ("name", "files")}
+        playlist_data = Playlist.from_record(dict(settings, files=files, sync_id=pid))
+        playlists[pid] = (record.get("name") or pid, playlist_data)
+
+    removed = [pid for pid in state.get("playlists", []) if pid not in manifest["playlists"]]
+    new_state = dict(state, playlists=sorted(manifest["playlists"]))
+    if not failed:
+        new_state.update(manifest_stat=signature, manifest_sha256=digest,
+                         revision=manifest.get("revision"))
+    return (playlists, removed), new_state
+
+
+class SyncWorker:
+    # Puxa da pasta central a cada `interval` segundos; com o manifesto igual, custa um stat
+
+    def __init__(self, share_dir, library_dir, state_file, apply, interval=300, workers=4,
+                 stat=stat_path):
+        self.share_dir = share_dir
+        self.library_dir = os.path.abspath(library_dir)
+        self.state_file = state_file
+        self.apply = apply
+        self.interval = interval
+        self.workers = workers
+        self.stat = stat
+        self.state = load_sync_state(state_file)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sync", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Erro ao sincronizar com {self.share_dir}: {e}")
+            if self._stopped.wait(self.interval):
+                return
+
+    def sync(self, progress=None):
+        # Também chamado pela GUI ("Sincronizar Agora"); a trava evita duas passadas juntas
+        progress = progress or TransferProgress()
+        with self._lock:
+            result, new_state = pull_from_share(self.share_dir, self.library_dir, self.state,
+                                                progress, self.workers, self.stat)
+            changes = None
+            if result is not None:
+                changes = self.apply(*result)
+            if new_state != self.state:
+                self.state = new_state
+                write_json_atomic(self.state_file, new_state)
+            for path, message in progress.errors:
+                print(f"Erro ao copiar {path}: {message}")
+            return changes
@@ -0,0 +1,136 @@
+import threading
+import time
+
+# Substitutos do pygame.mixer para testar os workers sem depender do tempo real dos clipes:
+# o teste decide quando cada clipe termina (finish)
+
+
+class FakeMusic:
+    def __init__(self):
+        self.loaded = None
+        self.busy = False
+        self.plays = []
+
+    def load(self, path):
+        self.loaded = path
+
+    def set_volume(self, volume):
+        pass
+
+    def play(self):
+        self.busy = True
+        self.plays.append(self.loaded)
+
+    def get_busy(self):
+        return self.busy
+
+    def stop(self):
+        self.busy = False
+
+    def finish(self):
+        self.busy = False
+
+
+class FakeSound:
+    def __init__(self, path):
+        self.path = path
+        self.volume = 1.0
+        self.channel = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self, loops=0):
+        self.channel = FakeChannel()
+        self.channel.play(self, loops)
+        return self.channel
+
+
+class FakeChannel:
+    def __init__(self, channel_id=None):
+        self.id = channel_id
+        self.sound = None
+        self.loops = 0
+        self.queued = None
+        self.volume = (1.0, 1.0)
+        self.played = []
+        self._lock = threading.Lock()
+
+    def play(self, sound, loops=0):
+        with self._lock:
+            self.sound, self.loops, self.queued = sound, loops, None
+            self.played.append(sound.path)
+
+    def queue(self, sound):
+        with self._lock:
+            self.queued = sound
+
+    def get_queue(self):
+        return self.queued
+
+    def get_busy(self):
+        return self.sound is not None
+
+    def stop(self):
+        with self._lock:
+            self.sound, self.queued = None, None
+
+    def set_volume(self, left, right=None):
+        self.volume = (left, left if right is None else right)
+
+    def finish(self):
+        # Fim de uma passada do clipe: repete, segue para o que estava na fila ou para
+        with self._lock:
+            if self.loops:
+                self.loops -= 1
+            elif self.queued is not None:
+                self.sound, self.queued = self.queued, None
+                self.played.append(self.sound.path)
+            else:
+                self.sound = None
+
+
+class FakeMixer:
+    Sound = FakeSound
+    Channel = FakeChannel
+
+    def __init__(self):
+        self.music = FakeMusic()
+        self.num_channels = 8
+        self.reserved = 0
+
+    def set_num_channels(self, count):
+        self.num_channels = count
+
+    def get_num_channels(self):
+        return self.num_channels
+
+    def set_reserved(self, count):
+        self.reserved = count
+
+
+class FakeCache:
+    def __init__(self):
+        self.sounds = {}
+
+    def __contains__(self, path):
+        return path in self.sounds
+
+    def get(self, path):
+        return self.sounds.get(path)
+
+    def load(self, path):
+        return self.sounds.setdefault(path, FakeSound(path))
+
+    def prefetch(self, paths):
+        for path in paths:
+            self.load(path)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
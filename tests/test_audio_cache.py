@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+pytest.importorskip("pygame")
+
+import audio_cache
+from audio_cache import AudioCache
+from fake_mixer import wait_for
+
+
+class FakeSound:
+    # 1 s por kB de arquivo; com o mixer falso abaixo, 2 bytes decodificados por byte do arquivo
+    def __init__(self, path):
+        self.path = path
+        self.length = os.path.getsize(path) / 1000
+
+    def get_length(self):
+        return self.length
+
+
+class FakeMixer:
+    def __init__(self):
+        self.loads = []
+
+    def Sound(self, path):
+        self.loads.append(os.path.basename(path))
+        return FakeSound(path)
+
+    def get_init(self):
+        return 1000, -16, 1
+
+
+@pytest.fixture
+def fake_mixer(monkeypatch):
+    fake = FakeMixer()
+    monkeypatch.setattr(audio_cache, "mixer", fake)
+    return fake
+
+
+def clip(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return str(path)
+
+
+def test_lru_evicts_least_recently_used_within_budget(tmp_path, fake_mixer):
+    cache = AudioCache(budget_bytes=500)
+    a, b, c = (clip(tmp_path, name, 100) for name in ("a.wav", "b.wav", "c.wav"))
+    cache.load(a)
+    cache.load(b)
+    assert cache.used_bytes == 400
+    # Usar `a` o torna recente: quem sai para caber `c` é `b`
+    assert cache.get(a) is not None
+    cache.load(c)
+    assert a in cache and c in cache and b not in cache
+    assert cache.used_bytes == 400
+    # Maior que o orçamento inteiro: toca, mas não entra no cache
+    big = clip(tmp_path, "grande.wav", 300)
+    assert cache.load(big).path == big and big not in cache
+    assert (cache.hits, fake_mixer.loads) == (1, ["a.wav", "b.wav", "c.wav", "grande.wav"])
+
+
+def test_changed_file_is_reloaded(tmp_path, fake_mixer):
+    cache = AudioCache()
+    path = clip(tmp_path, "a.wav", 100)
+    first = cache.load(path)
+    assert cache.load(path) is first
+    with open(path, "ab") as f:
+        f.write(b"\0" * 50)
+    assert cache.get(path) is None and path not in cache
+    assert cache.load(path).get_length() == 0.15
+    assert cache.used_bytes == 300
+    os.remove(path)
+    assert cache.get(path) is None
+    with pytest.raises(FileNotFoundError):
+        cache.load(path)
+
+
+def test_prefetch_decodes_in_background_once(tmp_path, fake_mixer):
+    cache = AudioCache()
+    paths = [clip(tmp_path, name, 10) for name in ("a.wav", "b.wav")]
+    cache.prefetch(paths + [str(tmp_path / "sumiu.wav")])
+    assert wait_for(lambda: all(path in cache for path in paths) and cache._prefetcher is None)
+    cache.prefetch(paths)
+    assert wait_for(lambda: cache._prefetcher is None)
+    assert fake_mixer.loads == ["a.wav", "b.wav"]
@@ -0,0 +1,16 @@
+from availability import MediaIndex
+
+
+def test_track_groups_share_paths(tmp_path):
+    shared, only_a = str(tmp_path / "shared.mp3"), str(tmp_path / "a.mp3")
+    open(shared, 'wb').close()
+    index = MediaIndex(watch=False)
+    index.track("A", [shared, only_a])
+    index.track("B", [shared])
+    assert index.missing([shared, only_a]) == [only_a]
+
+    # A playlist A deixa de usar os dois; o compartilhado continua acompanhado por B
+    index.untrack("A")
+    assert shared in index._stats and only_a not in index._stats
+    index.untrack("B")
+    assert index._stats == {} and index._tracked == {} and index._folders == {}
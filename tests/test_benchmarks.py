@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import wave
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+from library import generate_library, parse_size, synthetic_paths, write_audio_files  # noqa: E402
+from model import dump_playlists  # noqa: E402
+
+
+def test_parse_size():
+    assert parse_size("10000x500") == (10000, 500)
+    assert parse_size("100") == (100, 1)
+
+
+def test_generated_library_is_deterministic_and_spread_evenly():
+    playlists = generate_library(103, 10)
+    assert len(playlists) == 10
+    assert [len(data.files) for data in playlists.values()] == [11, 11, 11] + [10] * 7
+    assert dump_playlists(generate_library(103, 10)) == dump_playlists(playlists)
+    assert dump_playlists(generate_library(103, 10, seed=1)) != dump_playlists(playlists)
+    paths = set(synthetic_paths(5000))
+    assert all(media.path in paths for data in playlists.values() for media in data.files)
+    scheduled = sum(media.minutes is not None for data in playlists.values() for media in data.files)
+    assert 0 < scheduled < 103
+
+
+def test_audio_files_are_valid_wavs(tmp_path):
+    paths = write_audio_files(str(tmp_path), 2, seconds=0.1)
+    with wave.open(paths[1]) as clip:
+        assert (clip.getnchannels(), clip.getframerate(), clip.getnframes()) == (2, 44100, 4410)
+
+
+def test_suite_writes_machine_readable_results(tmp_path):
+    output = tmp_path / "resultado.json"
+    subprocess.run([sys.executable, os.path.join(BENCH_DIR, "suite.py"), "--sizes", "50x5",
+                    "--bench", "scheduler", "storage", "transfer", "--repeat", "1",
+                    "--transfer-files", "2", "--transfer-mb", "0.01", "--output", str(output)],
+                   cwd=tmp_path, check=True, capture_output=True, timeout=120)
+    report = json.loads(output.read_text())
+    names = {entry["name"] for entry in report["results"]}
+    assert {"scheduler.rebuild", "storage.sqlite.load", "transfer.export_zip"} <= names
+    assert all(entry["seconds"] >= 0 and entry["runs"] == 1 for entry in report["results"])
+    assert set(report["meta"]) == {"revision", "python", "platform", "date"}
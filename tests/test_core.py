@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from core import PlayerCore
+from hotreload import PlaylistWatcher
+
+
+@pytest.fixture
+def make_core(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def make(playlists, **settings):
+        (tmp_path / "playlists.json").write_text(json.dumps(playlists))
+        (tmp_path / "player_settings.json").write_text(json.dumps(settings))
+        return PlayerCore()
+    return make
+
+
+def test_legacy_entry_keeps_no_time_when_repeats_change(make_core, tmp_path):
+    core = make_core({"Loja": {"files": ["/musicas/a.mp3"], "time": "10:00", "repeats": 1,
+                               "active": True}})
+    core.set_media_repeats("Loja", 0, 3)
+    media = core.playlists["Loja"].files[0]
+    assert (media.time, media.repeats) == (None, 3)
+    # Continua tocando só com a playlist, sem disparo próprio
+    assert [event.kind for event in core.scheduler.next_events(5)] == ["playlist"] * 5
+    saved = json.loads((tmp_path / "playlists.json").read_text())["playlists"]["Loja"]["files"]
+    assert saved == [{"path": "/musicas/a.mp3", "time": None, "repeats": 3}]
+
+    # Configurar a mídia (o diálogo sugere 00:00) é que dá um horário a ela
+    core.configure_media("Loja", 0, "00:00", 3)
+    assert [event.index for event in core.scheduler.next_events(2)
+            if event.kind == "media"] == [0]
+
+
+def record(time, repeats=1, active=True):
+    return {"files": [{"path": "/musicas/a.mp3", "time": None, "repeats": repeats}],
+            "time": time, "repeats": 1, "active": active}
+
+
+def test_hot_reload_merges_external_and_local_edits(make_core, tmp_path):
+    path = tmp_path / "playlists.json"
+    core = make_core({"schema_version": 2, "playlists": {
+        "A": record("08:00"), "B": record("09:00"), "C": record("10:00"), "D": record("11:00")}})
+    core.store.guard_external = True
+    reloads = []
+    core.listeners.append(lambda event, *args: reloads.append((event, args)))
+
+    # Outro programa altera o arquivo: muda A e B, remove C e cria E
+    data = json.loads(path.read_text())
+    playlists = data["playlists"]
+    playlists["A"]["files"][0]["repeats"] = 2
+    playlists["B"]["time"] = "09:30"
+    del playlists["C"]
+    playlists["E"] = record("12:00")
+    path.write_text(json.dumps(data))
+
+    # Enquanto isso, aqui: A (conflito) e D; o salvamento não sobrescreve o arquivo alterado
+    core.set_media_repeats("A", 0, 7)
+    core.set_media_repeats("D", 0, 3)
+    assert json.loads(path.read_text()) == data
+
+    assert PlaylistWatcher(core.store, core.apply_external_playlists).poll()
+    changes = reloads[-1][1][0]
+    assert (sorted(changes["changed"]), changes["added"], changes["removed"], changes["conflicts"]) == \
+        (["A", "B"], ["E"], ["C"], ["A"])
+    # No conflito vale o arquivo; a edição local que não conflita é mantida e regravada
+    assert list(core.playlists) == ["A", "B", "D", "E"]
+    assert core.playlists["A"].files[0].repeats == 2 and core.playlists["D"].files[0].repeats == 3
+    saved = json.loads(path.read_text())["playlists"]
+    assert saved["D"]["files"][0]["repeats"] == 3 and saved["B"]["time"] == "09:30"
+    conflict = json.loads(next(tmp_path.glob("playlists.json.conflict-*")).read_text())
+    assert conflict["playlists"]["A"]["files"][0]["repeats"] == 7
+    # O agendador já segue o arquivo novo
+    assert {event.playlist for event in core.scheduler.next_events(4)} == {"A", "B", "D", "E"}
+
+    # Nada mudou desde a última leitura
+    assert not PlaylistWatcher(core.store, core.apply_external_playlists).poll()
+
+
+def test_hot_reload_waits_for_a_valid_file(make_core, tmp_path):
+    core = make_core({"schema_version": 2, "playlists": {"A": record("08:00")}})
+    (tmp_path / "playlists.json").write_text('{"schema_version": 2, "playlists": {"A": ')
+    watcher = PlaylistWatcher(core.store, core.apply_external_playlists)
+    assert not watcher.poll()
+    assert list(core.playlists) == ["A"]
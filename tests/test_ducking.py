@@ -0,0 +1,218 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from ducking import Ducker, FakeBackend, NullBackend, PycawBackend, create_backend
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def make_ducker(volume):
+    backend = FakeBackend(volume=volume)
+    ducker = Ducker(backend, duck_level=0.1, restore_level=0.8, duck_time=0.05,
+                    restore_time=0.05, lead_time=0.0)
+    return backend, ducker
+
+
+def test_duck_and_restore_previous_volume():
+    backend, ducker = make_ducker(0.6)
+    try:
+        ducker.duck()
+        assert wait_for(lambda: abs(backend.volume - 0.1) < 1e-9)
+        ducker.unduck()
+        assert wait_for(lambda: not ducker.fader.fading and abs(backend.volume - 0.6) < 1e-9)
+    finally:
+        ducker.shutdown(1)
+
+
+def test_quiet_music_is_restored_to_its_own_level():
+    backend, ducker = make_ducker(0.05)
+    try:
+        assert ducker.duck() == 0.0
+        ducker.unduck()
+        assert wait_for(lambda: not ducker.fader.fading)
+        time.sleep(0.1)
+        assert abs(backend.volume - 0.05) < 1e-9
+    finally:
+        ducker.shutdown(1)
+
+
+def test_restore_now_jumps_back_immediately():
+    backend, ducker = make_ducker(0.7)
+    try:
+        ducker.duck()
+        assert wait_for(lambda: abs(backend.volume - 0.1) < 1e-9)
+        ducker.restore_now()
+        assert abs(backend.volume - 0.7) < 1e-9
+    finally:
+        ducker.shutdown(1)
+
+
+def test_missing_session_does_not_duck():
+    backend, ducker = make_ducker(0.7)
+    backend.kill_session()
+    try:
+        assert ducker.duck() == 0.0
+        ducker.unduck()
+        assert backend.history == []
+    finally:
+        ducker.shutdown(1)
+
+
+class ThreadRecordingBackend(FakeBackend):
+    def __init__(self, volume):
+        super().__init__(volume=volume)
+        self.threads = set()
+
+    def get_volume(self):
+        self.threads.add(threading.current_thread().name)
+        return super().get_volume()
+
+    def set_volume(self, level):
+        self.threads.add(threading.current_thread().name)
+        return super().set_volume(level)
+
+
+def test_pre_duck_expires_on_fader_thread():
+    backend = ThreadRecordingBackend(0.6)
+    ducker = Ducker(backend, duck_time=0.05, restore_time=0.05, lead_time=0.0)
+    try:
+        ducker.pre_duck(0.1)
+        assert wait_for(lambda: abs(backend.volume - 0.1) < 1e-9)
+        backend.threads.clear()
+        assert wait_for(lambda: not ducker.fader.fading and abs(backend.volume - 0.6) < 1e-9)
+        assert backend.threads == {"volume-fader"}
+    finally:
+        ducker.shutdown(1)
+
+
+def test_announcement_cancels_pre_duck_expiry():
+    backend, ducker = make_ducker(0.6)
+    try:
+        ducker.pre_duck(0.1)
+        ducker.duck()
+        time.sleep(0.3)
+        assert abs(backend.volume - 0.1) < 1e-9
+    finally:
+        ducker.shutdown(1)
+
+
+def test_restore_target_survives_ducks_racing_the_fader():
+    backend = FakeBackend(volume=0.6)
+    ducker = Ducker(backend, duck_level=0.1, duck_time=0.0, restore_time=0.0, lead_time=0.0)
+    try:
+        for _ in range(200):
+            ducker.duck()
+            ducker.unduck()
+        assert wait_for(lambda: not ducker.fader.fading and ducker._restore_to is None)
+        assert abs(backend.volume - 0.6) < 1e-9
+        # A trava do Ducker e a do fader não se cruzam: duck continua respondendo
+        done = threading.Event()
+        threading.Thread(target=lambda: (ducker.duck(), done.set()), daemon=True).start()
+        assert done.wait(2)
+    finally:
+        ducker.shutdown(1)
+
+
+def test_fake_backend_resolves_session_once():
+    backend = FakeBackend(volume=0.5)
+    for level in (0.4, 0.3, 0.2):
+        assert backend.set_volume(level)
+    assert (backend.get_volume(), backend.resolves, backend.misses) == (0.2, 1, 0)
+    backend.kill_session()
+    assert not backend.set_volume(0.1) and backend.get_volume() is None
+    backend.restart_session(volume=0.9)
+    assert backend.get_volume() == 0.9 and backend.resolves == 2
+
+
+class FakeProcess:
+    def __init__(self, name):
+        self._name = name
+        self.running = True
+
+    def name(self):
+        return self._name
+
+    def is_running(self):
+        return self.running
+
+
+class FakeVolume:
+    def __init__(self):
+        self.level = 0.7
+        self.expired = False
+
+    def GetMasterVolume(self):
+        if self.expired:
+            raise OSError("sessão expirada")
+        return self.level
+
+    def SetMasterVolume(self, level, context):
+        if self.expired:
+            raise OSError("sessão expirada")
+        self.level = level
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.Process = FakeProcess(name) if name else None
+        self.volume = FakeVolume()
+        self._ctl = types.SimpleNamespace(QueryInterface=lambda interface: self.volume)
+
+
+@pytest.fixture
+def fake_pycaw(monkeypatch):
+    utilities = types.SimpleNamespace(scans=0, sessions=[])
+
+    def get_all_sessions():
+        utilities.scans += 1
+        return list(utilities.sessions)
+    utilities.GetAllSessions = get_all_sessions
+    module = types.ModuleType("pycaw.pycaw")
+    module.AudioUtilities = utilities
+    module.ISimpleAudioVolume = object()
+    monkeypatch.setitem(sys.modules, "pycaw", types.ModuleType("pycaw"))
+    monkeypatch.setitem(sys.modules, "pycaw.pycaw", module)
+    return utilities
+
+
+def test_pycaw_backend_caches_session_until_process_restarts(fake_pycaw):
+    fake_pycaw.sessions = [FakeSession(None), FakeSession("chrome.exe"), FakeSession("Spotify.exe")]
+    backend = create_backend("pycaw")
+    assert isinstance(backend, PycawBackend)
+    assert backend.get_volume() == 0.7
+    for step in range(10):
+        assert backend.set_volume(step / 10)
+    assert (fake_pycaw.scans, fake_pycaw.sessions[2].volume.level) == (1, 0.9)
+
+    # Processo reiniciado: varre de novo e acha a sessão nova
+    fake_pycaw.sessions[2].Process.running = False
+    fake_pycaw.sessions[2] = FakeSession("spotify.exe")
+    assert backend.set_volume(0.5)
+    assert (fake_pycaw.scans, fake_pycaw.sessions[2].volume.level) == (2, 0.5)
+
+    # Handle expirado: uma nova tentativa com a sessão resolvida de novo
+    fake_pycaw.sessions[2].volume.expired = True
+    assert backend.get_volume() is None
+    assert (backend.resolves, backend.misses) == (3, 0)
+
+    fake_pycaw.sessions = []
+    backend.reset()
+    assert not backend.set_volume(0.5) and backend.misses == 1
+
+
+def test_missing_backend_falls_back_to_null(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pycaw", None)
+    assert isinstance(create_backend("pycaw"), NullBackend)
+    with pytest.raises(ValueError):
+        create_backend("alsa")
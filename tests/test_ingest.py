@@ -0,0 +1,69 @@
+import math
+import os
+import wave
+from array import array
+
+import pytest
+
+pytest.importorskip("pygame")
+
+from fake_mixer import wait_for
+from ingest import MIXER_FREQUENCY, MediaIngestor, apply_gain, measure_loudness
+
+
+def write_tone(path, amplitude, seconds=0.5):
+    frames = int(MIXER_FREQUENCY * seconds)
+    samples = array('h')
+    for i in range(frames):
+        value = int(amplitude * math.sin(2 * math.pi * 440 * i / MIXER_FREQUENCY))
+        samples.extend((value, value))
+    with wave.open(str(path), 'wb') as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(MIXER_FREQUENCY)
+        out.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_loudness_and_gain():
+    samples = array('h', [16384, -16384] * 100)
+    loudness, peak = measure_loudness(samples)
+    assert round(loudness, 2) == -6.02 and peak == 16384
+    assert measure_loudness(array('h', [0] * 10)) == (None, 0)
+    assert list(apply_gain(array('h', [1000, -20000, 30000]), 2.0)) == [2000, -32768, 32767]
+
+
+def test_pool_measures_normalizes_and_caches_results(tmp_path):
+    quiet = write_tone(tmp_path / "baixo.wav", 1000)
+    loud = write_tone(tmp_path / "alto.wav", 20000)
+    results = []
+    ingestor = MediaIngestor(str(tmp_path / "media_info.json"), str(tmp_path / "renditions"),
+                             workers=2, transcode_min_mb=0, target_dbfs=-18.0,
+                             on_result=results.append)
+    try:
+        ingestor.submit([quiet, loud, quiet, str(tmp_path / "sumiu.wav")])
+        assert wait_for(lambda: len(results) == 3, timeout=30)
+        info = {os.path.basename(result["path"]): result for result in results}
+        assert not info["sumiu.wav"]["ok"] and "error" in info["sumiu.wav"]
+        assert info["baixo.wav"]["duration"] == 0.5
+        # O clipe baixo ganha volume até o alvo; o alto é atenuado
+        assert info["baixo.wav"]["gain"] > 1.0 > info["alto.wav"]["gain"]
+
+        source, volume = ingestor.playback_source(quiet)
+        assert (source, volume) == (info["baixo.wav"]["rendition"], 1.0)
+        with wave.open(source) as rendition:
+            measured, _ = measure_loudness(array('h', rendition.readframes(rendition.getnframes())))
+        assert abs(measured - -18.0) < 0.5
+
+        # Já medido: não volta para o pool
+        ingestor.submit([quiet, loud])
+        assert ingestor._pending == set()
+    finally:
+        ingestor.shutdown()
+
+    # Resultados persistem; arquivo alterado é medido de novo
+    reopened = MediaIngestor(str(tmp_path / "media_info.json"), str(tmp_path / "renditions"))
+    assert reopened.lookup(loud)["sha256"] == info["alto.wav"]["sha256"]
+    write_tone(tmp_path / "alto.wav", 20000, seconds=0.25)
+    assert reopened.lookup(loud) is None
+    assert reopened.playback_source(loud) == (loud, 1.0)
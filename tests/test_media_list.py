@@ -0,0 +1,100 @@
+import media_list
+from media_list import VirtualMediaList
+
+
+class FakeCanvas:
+    # Só o que o VirtualMediaList usa do Canvas: rolagem, altura e posição das janelas
+    def __init__(self, height):
+        self.height = height
+        self.top = 0
+        self.options = {}
+        self.windows = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def bind(self, sequence, callback):
+        pass
+
+    def yview_moveto(self, fraction):
+        self.top = 0
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_height(self):
+        return self.height
+
+    def create_window(self, x, y, **options):
+        window = len(self.windows) + 1
+        self.windows[window] = {"y": y, "state": options.get("state")}
+        return window
+
+    def coords(self, window, x, y):
+        self.windows[window]["y"] = y
+
+    def itemconfigure(self, window, **options):
+        self.windows[window].update(options)
+
+
+class FakeRow:
+    def __init__(self, list_view):
+        self.index = None
+        self.row = None
+        self.shows = 0
+        self.window = list_view.canvas.create_window(0, 0, state="hidden")
+
+    def show(self, index, row):
+        self.index, self.row = index, row
+        self.shows += 1
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+def make_list(monkeypatch, height=100):
+    monkeypatch.setattr(media_list, "MediaRow", FakeRow)
+    canvas = FakeCanvas(height)
+    view = VirtualMediaList(canvas, FakeScrollbar(), None, None, None, row_height=20, overscan=2)
+    return view, canvas
+
+
+def shown(view, canvas):
+    return sorted((slot.index, slot.row[0]) for slot in view._pool
+                  if canvas.windows[slot.window]["state"] == "normal")
+
+
+def test_only_visible_rows_and_overscan_get_widgets(monkeypatch):
+    view, canvas = make_list(monkeypatch)
+    view.set_items([(f"clip{i}.mp3", "") for i in range(1000)])
+    # 100 px / 20 px = 5 linhas (+1 parcial) e 2 de margem abaixo
+    assert [index for index, _ in shown(view, canvas)] == list(range(8))
+    assert len(view._pool) == 8
+
+    # Rolar reaproveita as linhas existentes em vez de criar outras
+    canvas.top = 500 * 20
+    view._on_scroll(0.5, 0.51)
+    assert [index for index, _ in shown(view, canvas)] == list(range(498, 508))
+    assert len(view._pool) == 10
+    assert canvas.windows[view._visible[500].window]["y"] == 500 * 20 + 2
+    assert canvas.options["scrollregion"][3] == 1000 * 20
+
+
+def test_update_row_touches_only_that_row(monkeypatch):
+    view, canvas = make_list(monkeypatch)
+    view.set_items([(f"clip{i}.mp3", "") for i in range(20)])
+    shows = {slot.index: slot.shows for slot in view._pool}
+    view.update_row(3, ("novo.mp3", "08:00"))
+    assert view._visible[3].row == ("novo.mp3", "08:00")
+    shows[3] += 1
+    assert {slot.index: slot.shows for slot in view._pool} == shows
+    # Linha fora da tela: só o dado muda, aparece ao rolar
+    view.update_row(15, ("longe.mp3", ""))
+    assert 15 not in view._visible and view.rows[15] == ("longe.mp3", "")
+
+    view.set_items([("unica.mp3", "")])
+    assert shown(view, canvas) == [(0, "unica.mp3")]
+    view.append_rows([("outra.mp3", "")])
+    assert shown(view, canvas) == [(0, "unica.mp3"), (1, "outra.mp3")]
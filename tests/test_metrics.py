@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from fake_mixer import wait_for
+from metrics import NULL_METRICS, Metrics, MetricsExporter, StallMonitor, create_metrics
+
+
+def test_render_prometheus_text():
+    metrics = Metrics()
+    metrics.counter("plays_total", "Anúncios tocados", zone="loja").inc(2)
+    metrics.counter("plays_total", zone='caixa "2"').inc()
+    metrics.gauge("queue_size", "Anúncios na fila", fn=lambda: 3)
+    histogram = metrics.histogram("load_seconds", "Carga do clipe", buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+    assert metrics.render() == (
+        '# HELP anuncios_load_seconds Carga do clipe\n'
+        '# TYPE anuncios_load_seconds histogram\n'
+        'anuncios_load_seconds_bucket{le="0.01"} 2\n'
+        'anuncios_load_seconds_bucket{le="0.1"} 3\n'
+        'anuncios_load_seconds_bucket{le="+Inf"} 4\n'
+        'anuncios_load_seconds_sum 2.065\n'
+        'anuncios_load_seconds_count 4\n'
+        '# HELP anuncios_plays_total Anúncios tocados\n'
+        '# TYPE anuncios_plays_total counter\n'
+        'anuncios_plays_total{zone="loja"} 2\n'
+        'anuncios_plays_total{zone="caixa \\"2\\""} 1\n'
+        '# HELP anuncios_queue_size Anúncios na fila\n'
+        '# TYPE anuncios_queue_size gauge\n'
+        'anuncios_queue_size 3\n')
+
+
+def test_same_name_returns_same_instrument_and_kind_is_checked():
+    metrics = Metrics()
+    assert metrics.counter("a", x="1") is metrics.counter("a", x="1")
+    assert metrics.counter("a", x="1") is not metrics.counter("a", x="2")
+    with pytest.raises(ValueError):
+        metrics.histogram("a")
+    with metrics.time("b"):
+        pass
+    assert metrics.histogram("b").count == 1
+
+
+def test_disabled_metrics_do_nothing(tmp_path):
+    assert create_metrics(False) is NULL_METRICS
+    with NULL_METRICS.time("x"):
+        NULL_METRICS.counter("y").inc()
+    assert NULL_METRICS.render() == ""
+    exporter = MetricsExporter(create_metrics(True), str(tmp_path / "anuncios.prom"))
+    exporter.metrics.counter("plays_total").inc()
+    exporter.stop()
+    assert (tmp_path / "anuncios.prom").read_text() == \
+        "# TYPE anuncios_plays_total counter\nanuncios_plays_total 1\n"
+
+
+def blocking_call(seconds):
+    time.sleep(seconds)
+
+
+def test_stall_monitor_samples_the_stuck_loop(tmp_path):
+    metrics = Metrics()
+    log_file = tmp_path / "stalls.log"
+    monitor = StallMonitor("tk", threshold=0.05, log_file=str(log_file), metrics=metrics,
+                           sample_interval=0.01)
+    monitor.start()
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            monitor.beat()
+            time.sleep(0.005)
+            if not log_file.exists() and monitor.stalls.value == 0:
+                blocking_call(0.3)
+                monitor.beat()
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    try:
+        assert wait_for(lambda: monitor.stalls.value == 1)
+    finally:
+        stop.set()
+        thread.join(1)
+        monitor.stop(1)
+    report = log_file.read_text()
+    assert "loop 'tk' travado" in report and "blocking_call" in report
+    assert metrics.histogram("loop_stall_seconds", loop="tk").sum >= 0.2
+    assert 'anuncios_loop_stalls_total{loop="tk"} 1' in metrics.render()
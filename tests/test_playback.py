@@ -0,0 +1,201 @@
+import time
+
+import pytest
+
+pytest.importorskip("pygame")
+
+import playback
+from fake_mixer import FakeCache, FakeMixer, wait_for
+from playback import AnnouncementQueue, PlaybackItem, PlaybackWorker
+
+
+def item(path, priority=0, deadline=None, **info):
+    return PlaybackItem(path, priority=priority, deadline=deadline, info=info)
+
+
+def drain(queue):
+    return [queue.pop().path for _ in range(len(queue))]
+
+
+def test_queue_orders_by_priority_deadline_and_arrival():
+    queue = AnnouncementQueue()
+    queue.push(item("normal1.mp3"))
+    queue.push(item("urgente.mp3", priority=5))
+    queue.push(item("prazo.mp3", deadline=time.time() + 10))
+    queue.push(item("normal2.mp3"))
+    assert drain(queue) == ["urgente.mp3", "prazo.mp3", "normal1.mp3", "normal2.mp3"]
+
+
+def test_queue_keeps_same_clip_at_other_playlist_positions():
+    queue = AnnouncementQueue()
+    for index, path in enumerate(["vinheta.mp3", "promo.mp3", "vinheta.mp3"]):
+        assert queue.push(item(path, playlist="Loja", index=index, scheduled_at=100.0))
+    assert drain(queue) == ["vinheta.mp3", "promo.mp3", "vinheta.mp3"]
+
+
+def test_queue_coalesces_repeated_announcement():
+    queue = AnnouncementQueue()
+    assert queue.push(item("promo.mp3", playlist="Loja", index=1))
+    # Gatilho repetido para a mesma mídia: não entra de novo, salvo com prioridade maior
+    assert not queue.push(item("promo.mp3", playlist="Loja", index=1))
+    assert queue.push(item("promo.mp3", priority=3, playlist="Loja", index=1))
+    assert len(queue) == 1 and queue.pop().priority == 3
+    # Outro horário agendado é outro anúncio
+    queue.push(item("promo.mp3", playlist="Loja", index=1, scheduled_at=100.0))
+    assert queue.push(item("promo.mp3", playlist="Loja", index=1, scheduled_at=160.0))
+
+
+@pytest.fixture
+def fake_mixer(monkeypatch):
+    fake = FakeMixer()
+    monkeypatch.setattr(playback, "mixer", fake)
+    return fake
+
+
+def start_worker(**options):
+    events = []
+    worker = PlaybackWorker(on_event=lambda kind, item, message, timestamp:
+                            events.append((kind, item.path, message)),
+                            poll_interval=0.005, **options)
+    worker.start()
+    return worker, events
+
+
+def kinds(events, path=None):
+    return [kind for kind, event_path, _ in events if path is None or event_path == path]
+
+
+def test_higher_priority_preempts_and_interrupted_clip_restarts(fake_mixer):
+    worker, events = start_worker()
+    try:
+        worker.enqueue("promo.mp3")
+        assert wait_for(lambda: kinds(events) == ["start"])
+        worker.enqueue("alerta.mp3", priority=10)
+        assert wait_for(lambda: ("start", "alerta.mp3", None) in events)
+        assert kinds(events, "promo.mp3") == ["start", "preempted"]
+        fake_mixer.music.finish()
+        assert wait_for(lambda: kinds(events, "promo.mp3") == ["start", "preempted", "start"])
+        fake_mixer.music.finish()
+        assert wait_for(lambda: kinds(events, "promo.mp3")[-1] == "finish")
+        assert fake_mixer.music.plays == ["promo.mp3", "alerta.mp3", "promo.mp3"]
+    finally:
+        worker.shutdown(1)
+
+
+def test_expired_announcement_is_skipped(fake_mixer):
+    worker, events = start_worker()
+    try:
+        worker.enqueue("atrasado.mp3", deadline=time.time() - 1)
+        worker.enqueue("promo.mp3")
+        assert wait_for(lambda: ("start", "promo.mp3", None) in events)
+        assert ("expired", "atrasado.mp3", None) in events
+        assert fake_mixer.music.plays == ["promo.mp3"]
+    finally:
+        worker.shutdown(1)
+
+
+def test_cached_clips_play_gapless_with_ducking_held(fake_mixer):
+    cache = FakeCache()
+    cache.prefetch(["a.mp3", "b.mp3"])
+    ducked = []
+    worker, events = start_worker(cache=cache, before_play=lambda item: ducked.append(item.path),
+                                  after_play=lambda item: ducked.append("restore"))
+    try:
+        worker.enqueue("a.mp3")
+        worker.enqueue("b.mp3")
+        assert wait_for(lambda: ("start", "a.mp3", "cache") in events)
+        channel = cache.get("a.mp3").channel
+        # O próximo clipe já fica na fila do canal enquanto o atual toca
+        assert wait_for(lambda: channel.get_queue() is cache.get("b.mp3"))
+        channel.finish()
+        assert wait_for(lambda: ("start", "b.mp3", "gapless") in events)
+        assert kinds(events) == ["start", "finish", "start"]
+        assert ducked == ["a.mp3", "b.mp3"]
+        channel.finish()
+        assert wait_for(lambda: ducked[-1:] == ["restore"])
+        assert ducked == ["a.mp3", "b.mp3", "restore"]
+        assert channel.played == ["a.mp3", "b.mp3"]
+    finally:
+        worker.shutdown(1)
+
+
+def test_urgent_clip_replaces_queued_one(fake_mixer):
+    cache = FakeCache()
+    cache.prefetch(["a.mp3", "b.mp3", "c.mp3"])
+    worker, events = start_worker(cache=cache)
+    try:
+        worker.enqueue("a.mp3", priority=5)
+        assert wait_for(lambda: ("start", "a.mp3", "cache") in events)
+        channel = cache.get("a.mp3").channel
+        worker.enqueue("b.mp3")
+        assert wait_for(lambda: channel.get_queue() is cache.get("b.mp3"))
+        worker.enqueue("c.mp3", priority=3)
+        assert wait_for(lambda: channel.get_queue() is cache.get("c.mp3"))
+        channel.finish()
+        assert wait_for(lambda: ("start", "c.mp3", "gapless") in events)
+        channel.finish()
+        # b voltou para a fila e toca depois, sem perder o lugar
+        assert wait_for(lambda: ("start", "b.mp3", "gapless") in events)
+        assert kinds(events, "b.mp3") == ["start"] and channel.played == ["a.mp3", "c.mp3", "b.mp3"]
+    finally:
+        worker.shutdown(1)
+
+
+def test_commands_play_skip_and_stop(fake_mixer):
+    worker, events = start_worker()
+    try:
+        worker.enqueue("a.mp3", repeats=2)
+        worker.enqueue("b.mp3")
+        worker.enqueue("c.mp3")
+        assert wait_for(lambda: fake_mixer.music.plays == ["a.mp3"])
+        # Repetições voltam a tocar o mesmo arquivo antes de seguir
+        fake_mixer.music.finish()
+        assert wait_for(lambda: fake_mixer.music.plays == ["a.mp3", "a.mp3"])
+        worker.skip()
+        assert wait_for(lambda: fake_mixer.music.plays[-1:] == ["b.mp3"])
+        assert kinds(events, "a.mp3") == ["start", "stopped"]
+        # play interrompe o atual e descarta a fila
+        worker.play("urgente.mp3")
+        assert wait_for(lambda: kinds(events, "urgente.mp3") == ["start"])
+        worker.stop()
+        assert wait_for(lambda: kinds(events, "urgente.mp3") == ["start", "stopped"])
+        time.sleep(0.05)
+        assert "c.mp3" not in fake_mixer.music.plays and not fake_mixer.music.busy
+    finally:
+        worker.shutdown(1)
+    assert not worker.is_alive()
+
+
+def test_events_wait_in_queue_without_callback(fake_mixer):
+    played = []
+    worker = PlaybackWorker(before_play=lambda item: 0.05, after_play=played.append,
+                            poll_interval=0.005)
+    worker.start()
+    try:
+        started = time.monotonic()
+        worker.enqueue("a.mp3")
+        # before_play pediu 50 ms para abaixar a música antes do anúncio
+        assert wait_for(lambda: fake_mixer.music.busy)
+        assert time.monotonic() - started >= 0.045
+        fake_mixer.music.finish()
+        assert wait_for(lambda: played)
+        assert [(kind, item.path) for kind, item, _, _ in worker.poll_events()] == \
+            [("start", "a.mp3"), ("finish", "a.mp3")]
+    finally:
+        worker.shutdown(1)
+
+
+def test_load_error_is_reported_and_next_clip_plays(fake_mixer, monkeypatch):
+    def load(path):
+        if path == "quebrado.mp3":
+            raise RuntimeError("arquivo inválido")
+        fake_mixer.music.loaded = path
+    monkeypatch.setattr(fake_mixer.music, "load", load)
+    worker, events = start_worker()
+    try:
+        worker.enqueue("quebrado.mp3")
+        worker.enqueue("ok.mp3")
+        assert wait_for(lambda: kinds(events, "ok.mp3") == ["start"])
+        assert events[0] == ("error", "quebrado.mp3", "arquivo inválido")
+    finally:
+        worker.shutdown(1)
@@ -0,0 +1,98 @@
+import itertools
+from types import SimpleNamespace
+
+from anuncio import PlayerInterface
+from model import Playlist
+
+
+class FakeTree:
+    # Treeview em memória: registra cada operação para conferir que a árvore não é recriada
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def insert(self, parent, index, text, values, image):
+        iid = f"I{next(self._ids)}"
+        self.items[iid] = {"text": text, "values": values, "image": image}
+        self.order.append(iid)
+        self.calls.append(("insert", text))
+        return iid
+
+    def delete(self, iid):
+        self.calls.append(("delete", self.items.pop(iid)["text"]))
+        self.order.remove(iid)
+
+    def item(self, iid, option=None, **options):
+        if option is not None:
+            return self.items[iid][option]
+        self.items[iid].update(options)
+        self.calls.append(("item", self.items[iid]["text"]))
+
+    def move(self, iid, parent, position):
+        self.order.remove(iid)
+        self.order.insert(position, iid)
+
+    def rows(self):
+        return [(self.items[iid]["text"], self.items[iid]["values"][0]) for iid in self.order]
+
+
+def make_view(playlists):
+    view = SimpleNamespace(playlists=playlists, playlist_tree=FakeTree(), tree_items={},
+                           tree_status={}, on_icon="on", off_icon="off",
+                           core=SimpleNamespace(missing_scheduled={}))
+    view.update = lambda: PlayerInterface.update_playlist_display(view)
+    return view
+
+
+def test_tree_applies_only_the_differences():
+    playlists = {"Manhã": Playlist(), "Tarde": Playlist(active=False), "Noite": Playlist()}
+    view = make_view(playlists)
+    view.update()
+    tree = view.playlist_tree
+    assert tree.rows() == [("Manhã", "ON"), ("Tarde", "OFF"), ("Noite", "ON")]
+
+    tree.calls.clear()
+    view.update()
+    assert tree.calls == []
+
+    playlists["Tarde"].active = True
+    view.core.missing_scheduled["Noite"] = ["/sumiu.mp3"]
+    del playlists["Manhã"]
+    playlists["Madrugada"] = Playlist(active=False)
+    view.update()
+    assert sorted(tree.calls) == [("delete", "Manhã"), ("insert", "Madrugada"),
+                                  ("item", "Noite"), ("item", "Tarde")]
+    assert tree.rows() == [("Tarde", "ON"), ("Noite", "ON ⚠"), ("Madrugada", "OFF")]
+    assert tree.items[view.tree_items["Madrugada"]]["image"] == "off"
+
+
+def test_rename_keeps_the_item_and_follows_the_new_order():
+    playlists = {"A": Playlist(), "B": Playlist(), "C": Playlist()}
+    view = make_view(playlists)
+    view.update()
+    tree = view.playlist_tree
+    item = view.tree_items["A"]
+
+    # Como core.rename_playlist: a playlist renomeada vai para o fim
+    playlists["Z"] = playlists.pop("A")
+    PlayerInterface.rename_tree_item(view, "A", "Z")
+    tree.calls.clear()
+    view.update()
+    assert tree.calls == [] and view.tree_items["Z"] == item
+    assert tree.rows() == [("B", "ON"), ("C", "ON"), ("Z", "ON")]
+    assert list(view.tree_items) == ["B", "C", "Z"]
+
+
+def test_status_click_is_handled_by_one_delegated_handler():
+    view = make_view({"A": Playlist(), "B": Playlist()})
+    view.update()
+    toggled = []
+    view.toggle_playlist_status = toggled.append
+    tree = view.playlist_tree
+    tree.identify_column = lambda x: "#1" if x > 100 else "#0"
+    tree.identify_row = lambda y: tree.order[y // 20] if y < 40 else ""
+    for x, y in ((150, 25), (50, 5), (150, 60)):
+        PlayerInterface.on_tree_click(view, SimpleNamespace(x=x, y=y))
+    assert toggled == ["B"]
@@ -0,0 +1,52 @@
+import json
+import os
+
+from playlog import PlayLog, log_files, percentile, read_entries, summary
+
+
+def test_rotation_keeps_only_the_configured_files(tmp_path):
+    path = str(tmp_path / "play_log.jsonl")
+    # Limite menor que uma linha: toda escrita termina rotacionando
+    for i in range(10):
+        log = PlayLog(path, max_bytes=50, retention=2)
+        log.record("played", f"clip{i}.mp3", "Loja", start_lag=0.01)
+        log.close(2)
+    assert [os.path.basename(f) for f in log_files(path, retention=2)] == \
+        ["play_log.jsonl.2", "play_log.jsonl.1"]
+    assert not os.path.exists(path) and not os.path.exists(f"{path}.3")
+    # Do mais antigo para o mais novo: a última entrada é a última registrada
+    entries = list(read_entries(path, retention=2))
+    assert [entry["clip"] for entry in entries] == ["clip8.mp3", "clip9.mp3"]
+
+    log = PlayLog(path, max_bytes=1024 * 1024, retention=2)
+    log.record("played", "clip10.mp3")
+    log.close(2)
+    assert [entry["clip"] for entry in read_entries(path, retention=2)][-2:] == \
+        ["clip9.mp3", "clip10.mp3"]
+
+
+def test_batched_writes_and_summary(tmp_path):
+    path = str(tmp_path / "play_log.jsonl")
+    log = PlayLog(path)
+    for lag in (0.01, 0.02, 0.03, 0.5):
+        log.record("played", "promo.mp3", "Loja", start_lag=lag)
+    log.record("missed", "vinheta.mp3", "Loja", lateness=1200)
+    log.close(2)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"cortado": \n')
+    entries = list(read_entries(path))
+    assert [entry["outcome"] for entry in entries] == ["played"] * 4 + ["missed"]
+
+    report = summary(entries)
+    assert report["outcomes"] == {"played": 4, "missed": 1}
+    assert report["clips"] == {"promo.mp3": 4}
+    assert report["start_lag"]["p50"] == 0.025
+    assert list(report["misses_per_day"].values()) == [1]
+    assert list(read_entries(path, since="9999")) == []
+    assert json.loads(json.dumps(report)) == report
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([1, 2, 3, 4], 100) == 4
@@ -0,0 +1,58 @@
+from datetime import date, datetime
+
+import pytest
+
+from recurrence import Rule, compile_schedule, format_minutes, parse_minutes
+
+
+def schedule(minutes, **rule):
+    return compile_schedule(parse_minutes(minutes), Rule.from_record(rule) if rule else None)
+
+
+def test_parse_and_format_minutes():
+    assert parse_minutes("09:05") == 9 * 60 + 5
+    assert format_minutes(9 * 60 + 5) == "09:05"
+    for value in (None, "", "24:00", "9h", "10:60"):
+        assert parse_minutes(value) is None
+    assert compile_schedule(None) is None
+
+
+def test_daily_entry_fires_today_then_tomorrow():
+    daily = schedule("10:00")
+    assert daily.next_fire(datetime(2026, 5, 4, 9, 0)) == datetime(2026, 5, 4, 10, 0)
+    assert daily.next_fire(datetime(2026, 5, 4, 10, 0)) == datetime(2026, 5, 4, 10, 0)
+    # Segundos depois do minuto já contam como passado
+    assert daily.next_fire(datetime(2026, 5, 4, 10, 0, 1)) == datetime(2026, 5, 5, 10, 0)
+
+
+def test_weekdays_and_dates():
+    # 2026-05-04 é uma segunda-feira
+    weekend = schedule("10:00", days=["sab", "dom"], end_date="2026-05-10", **{"except": ["2026-05-09"]})
+    assert weekend.next_fire(datetime(2026, 5, 4, 12, 0)) == datetime(2026, 5, 10, 10, 0)
+    assert weekend.next_fire(datetime(2026, 5, 10, 11, 0)) is None
+    later = schedule("08:00", start_date="2026-06-01")
+    assert later.next_fire(datetime(2026, 5, 4, 9, 0)) == datetime(2026, 6, 1, 8, 0)
+
+
+def test_every_until_expands_times():
+    repeating = schedule("09:00", every=45, until="11:00")
+    assert repeating.times == (540, 585, 630)
+    assert [fire_at.strftime("%H:%M") for fire_at in repeating.occurrences(date(2026, 5, 4))] == \
+        ["09:00", "09:45", "10:30"]
+    assert repeating.next_fire(datetime(2026, 5, 4, 9, 1)) == datetime(2026, 5, 4, 9, 45)
+
+
+@pytest.mark.parametrize("record", [
+    [], {"days": []}, {"days": ["xyz"]}, {"days": [7]}, {"every": 0}, {"every": "30"},
+    {"until": "25:00"}, {"start_date": "amanhã"},
+])
+def test_invalid_rules(record):
+    with pytest.raises(ValueError):
+        Rule.from_record(record)
+
+
+def test_rule_record_round_trip():
+    record = {"days": ["seg", "qua"], "start_date": "2026-01-01", "end_date": "2026-12-31",
+              "every": 30, "until": "18:00", "except": ["2026-04-21"]}
+    assert Rule.from_record(record).to_record() == record
+    assert Rule.from_record({"days": [0, 2]}).to_record() == {"days": ["seg", "qua"]}
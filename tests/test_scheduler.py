@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from model import Media, Playlist
+from scheduler import ScheduleIndex
+
+
+def library():
+    return {"Loja": Playlist([Media("a.mp3", minutes=14 * 60 + 17),
+                              Media("b.mp3", minutes=14 * 60 + 30)], minutes=None)}
+
+
+def test_fires_entry_marked_for_current_minute():
+    index = ScheduleIndex()
+    index.rebuild(library(), now=datetime(2026, 5, 4, 14, 17, 20))
+    due, missed = index.pop_due(datetime(2026, 5, 4, 14, 17, 21))
+    assert [(event.playlist, event.index) for event in due] == [("Loja", 0)]
+    assert missed == []
+
+
+def test_reindex_in_same_minute_does_not_fire_again():
+    playlists = library()
+    index = ScheduleIndex()
+    index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+    due, _ = index.pop_due(datetime(2026, 5, 4, 14, 17, 1))
+    assert [event.index for event in due] == [0]
+
+    index.update_playlist("Loja", playlists["Loja"], now=datetime(2026, 5, 4, 14, 17, 40))
+    index.update_media("Loja", 0, playlists["Loja"].files[0], now=datetime(2026, 5, 4, 14, 17, 41))
+    due, missed = index.pop_due(datetime(2026, 5, 4, 14, 17, 45))
+    assert due == [] and missed == []
+    # Continua agendada para o dia seguinte
+    assert index.next_fire_time() == datetime(2026, 5, 4, 14, 30)
+    due, _ = index.pop_due(datetime(2026, 5, 4, 14, 30, 5))
+    assert [event.index for event in due] == [1]
+    due, _ = index.pop_due(datetime(2026, 5, 5, 14, 17, 5))
+    assert [event.index for event in due] == [0]
+
+
+def test_reindex_arms_entry_that_has_not_fired_yet():
+    playlists = library()
+    index = ScheduleIndex()
+    index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+    index.pop_due(datetime(2026, 5, 4, 14, 17, 1))
+    # Outra entrada do mesmo minuto, adicionada depois do disparo, ainda toca
+    playlists["Loja"].files.append(Media("c.mp3", minutes=14 * 60 + 17))
+    index.update_playlist("Loja", playlists["Loja"], now=datetime(2026, 5, 4, 14, 17, 30))
+    due, _ = index.pop_due(datetime(2026, 5, 4, 14, 17, 31))
+    assert [event.index for event in due] == [2]
+
+
+def test_late_events_follow_catch_up_policy():
+    playlists = library()
+    for policy, expect_due in (("fire", True), ("skip", False)):
+        index = ScheduleIndex(catch_up_policy=policy, max_lateness=900)
+        index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+        due, missed = index.pop_due(datetime(2026, 5, 4, 14, 22))
+        assert bool(due) is expect_due and bool(missed) is not expect_due
+
+
+def test_inactive_playlist_is_not_scheduled():
+    playlists = library()
+    playlists["Loja"].active = False
+    index = ScheduleIndex()
+    index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+    assert len(index) == 0 and index.next_fire_time() is None
+
+
+def test_rename_in_same_minute_does_not_fire_again():
+    playlists = {"a": Playlist([Media("a.mp3", minutes=14 * 60 + 17)], minutes=14 * 60 + 17)}
+    index = ScheduleIndex()
+    index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+    due, _ = index.pop_due(datetime(2026, 5, 4, 14, 17, 1))
+    assert sorted(event.kind for event in due) == ["media", "playlist"]
+
+    # Como core.rename_playlist: sai com o nome antigo, entra com o novo
+    playlists["b"] = playlists.pop("a")
+    index.remove_playlist("a")
+    index.update_playlist("b", playlists["b"], now=datetime(2026, 5, 4, 14, 17, 30))
+    due, missed = index.pop_due(datetime(2026, 5, 4, 14, 17, 31))
+    assert due == [] and missed == []
+    assert index.next_fire_time() == datetime(2026, 5, 5, 14, 17)
+
+
+def test_reload_with_shifted_media_fires_only_new_entry():
+    playlists = library()
+    index = ScheduleIndex()
+    index.rebuild(playlists, now=datetime(2026, 5, 4, 14, 0))
+    index.pop_due(datetime(2026, 5, 4, 14, 17, 1))
+    # Recarga externa insere uma mídia nova no início: os índices das antigas mudam
+    playlists["Loja"] = Playlist([Media("novo.mp3", minutes=14 * 60 + 17)]
+                                 + [media.copy() for media in playlists["Loja"].files], minutes=None)
+    index.update_playlist("Loja", playlists["Loja"], now=datetime(2026, 5, 4, 14, 17, 30))
+    due, _ = index.pop_due(datetime(2026, 5, 4, 14, 17, 31))
+    assert [(event.index, playlists["Loja"].files[event.index].path) for event in due] == \
+        [(0, "novo.mp3")]
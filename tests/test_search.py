@@ -0,0 +1,88 @@
+from model import Media, Playlist
+from search import SearchIndex, normalize
+
+
+def library():
+    return {"Manhã": Playlist([Media("C:\\anuncios\\Promoção Pão.mp3", minutes=8 * 60),
+                               Media("/anuncios/padaria_fresca.mp3", minutes=None)],
+                              minutes=7 * 60 + 30),
+            "Noite": Playlist([Media("/anuncios/promo_noite.mp3", minutes=23 * 60 + 50),
+                               Media("/anuncios/fechamento.mp3", minutes=0)],
+                              minutes=None, active=False)}
+
+
+def brute_force(playlists, term):
+    return sorted((name, index) for name, data in playlists.items()
+                  for index, media in enumerate(data.files)
+                  if normalize(term) in normalize(media.path.replace("\\", "/").rsplit("/", 1)[-1]))
+
+
+def built(playlists):
+    index = SearchIndex()
+    index.rebuild(playlists)
+    return index
+
+
+def test_terms_ignore_accents_and_case():
+    index = built(library())
+    assert normalize("Promoção") == "promocao"
+    assert index.search("PROMOCAO") == [("Manhã", 0)]
+    assert index.search("promo") == [("Manhã", 0), ("Noite", 0)]
+    # Termos curtos casam com o início de uma palavra
+    assert index.search("pa") == [("Manhã", 0), ("Manhã", 1)]
+    assert index.search("promo pao") == [("Manhã", 0)]
+    assert index.search("xyz") == []
+
+
+def test_time_window_and_active_filters():
+    index = built(library())
+    # A mídia sem horário próprio toca no horário da playlist (07:30)
+    assert index.search(start=7 * 60, end=7 * 60 + 45) == [("Manhã", 0), ("Manhã", 1)]
+    assert index.search(start=8 * 60, end=8 * 60) == [("Manhã", 0)]
+    # Janela que atravessa a meia-noite
+    assert index.search(start=23 * 60, end=30) == [("Noite", 0), ("Noite", 1)]
+    assert index.search(active=False) == [("Noite", 0), ("Noite", 1)]
+    assert index.search("promo", active=True) == [("Manhã", 0)]
+    # O limite devolve as primeiras na ordem (playlist, índice)
+    assert index.search(limit=1) == [("Manhã", 0)]
+    assert index.search(active=False, limit=1) == [("Noite", 0)]
+    assert index.search(limit=3) == [("Manhã", 0), ("Manhã", 1), ("Noite", 0)]
+
+
+def test_limit_keeps_the_first_keys_in_order():
+    playlists = {f"P{n:02d}": Playlist([Media(f"/anuncios/promo_{n}_{i}.mp3", minutes=i)
+                                        for i in range(5)], minutes=None)
+                 for n in range(30, 0, -1)}
+    index = built(playlists)
+    expected = brute_force(playlists, "promo")
+    assert index.search("promo", limit=7) == expected[:7]
+    assert index.search(start=0, end=4, limit=3) == [("P01", 0), ("P01", 1), ("P01", 2)]
+
+
+def test_updates_match_a_full_rebuild():
+    playlists = library()
+    index = built(playlists)
+
+    playlists["Manhã"].files[1] = Media("/anuncios/promo_pao_de_queijo.mp3", minutes=9 * 60)
+    index.update_media("Manhã", 1, playlists["Manhã"].files[1])
+    playlists["Noite"].active = True
+    playlists["Noite"].files.append(Media("/anuncios/promo_final.mp3", minutes=22 * 60))
+    index.update_playlist("Noite", playlists["Noite"])
+    playlists["Tarde"] = Playlist([Media("/anuncios/promo_tarde.mp3", minutes=15 * 60)])
+    index.update_playlist("Tarde", playlists["Tarde"])
+    del playlists["Manhã"]
+    index.update_playlist("Manhã", None)
+
+    fresh = built(playlists)
+    for text, start, end, active in (("promo", None, None, None), ("pa", None, None, None),
+                                     ("", 21 * 60, 23 * 60 + 59, True), ("", None, None, None)):
+        assert index.search(text, start, end, active) == fresh.search(text, start, end, active)
+    assert index.search("promo") == brute_force(playlists, "promo")
+    assert len(index) == len(fresh) == 4
+    assert index.times(("Manhã", 0)) == ()
+
+
+def test_updates_are_ignored_until_built():
+    index = SearchIndex()
+    index.update_playlist("Manhã", library()["Manhã"])
+    assert len(index) == 0 and not index.built
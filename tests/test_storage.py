@@ -0,0 +1,144 @@
+import json
+import sqlite3
+
+import pytest
+
+from model import SCHEMA_VERSION, Media, Playlist, dump_playlists
+from recurrence import Rule
+from storage import JsonPlaylistStore, SqlitePlaylistStore
+
+V1_PLAYLISTS = {"Loja": {"time": "10:00", "repeats": 1, "active": True,
+                         "files": ["/musicas/a.mp3",
+                                   {"path": "/musicas/b.mp3", "time": "11:00", "repeats": 2}]}}
+
+
+def test_read_only_store_does_not_migrate_or_write(tmp_path):
+    path = tmp_path / "playlists.json"
+    path.write_text(json.dumps(V1_PLAYLISTS))
+    store = JsonPlaylistStore(str(path), read_only=True)
+    playlists = store.load()
+    assert [media.path for media in playlists["Loja"].files] == ["/musicas/a.mp3", "/musicas/b.mp3"]
+    assert store.save_all(playlists) is False
+    assert json.loads(path.read_text()) == V1_PLAYLISTS
+    assert [p.name for p in tmp_path.iterdir()] == ["playlists.json"]
+
+
+def sample_playlists():
+    return {"Loja": Playlist([Media("/musicas/a.mp3", minutes=9 * 60, priority=3),
+                              Media("/musicas/b.mp3", repeats=2, extra={"nota": "cliente"})],
+                             minutes=10 * 60, priority=1, zone="caixa",
+                             rule=Rule.from_record({"days": ["seg", "sex"], "every": 30,
+                                                    "until": "12:00"})),
+            "Vazia": Playlist(minutes=None, active=False)}
+
+
+def test_model_round_trip_keeps_unknown_fields_and_invalid_rules():
+    record = {"time": "08:15", "repeats": 1, "active": True, "cor": "azul",
+              "rule": {"days": ["xyz"]},
+              "files": [{"path": "/m/a.mp3", "time": None, "repeats": 1, "rule": {"every": 0}}]}
+    playlist = Playlist.from_record(record)
+    # Regra inválida não agenda, mas é guardada como veio
+    assert playlist.rule is None and playlist.files[0].rule is None
+    assert playlist.to_record() == record
+
+
+def test_json_store_round_trip(tmp_path):
+    store = JsonPlaylistStore(str(tmp_path / "playlists.json"))
+    playlists = sample_playlists()
+    assert store.save_all(playlists)
+    data = json.loads((tmp_path / "playlists.json").read_text())
+    assert data["schema_version"] == SCHEMA_VERSION
+    assert dump_playlists(JsonPlaylistStore(store.path).load()) == dump_playlists(playlists)
+
+
+def test_json_store_migrates_v1_with_backup(tmp_path):
+    path = tmp_path / "playlists.json"
+    path.write_text(json.dumps(V1_PLAYLISTS))
+    playlists = JsonPlaylistStore(str(path)).load()
+
+    files = playlists["Loja"].files
+    assert [(media.path, media.time, media.repeats) for media in files] == \
+        [("/musicas/a.mp3", None, 1), ("/musicas/b.mp3", "11:00", 2)]
+    data = json.loads(path.read_text())
+    assert data["schema_version"] == SCHEMA_VERSION
+    assert data["playlists"] == dump_playlists(playlists)
+    assert json.loads((tmp_path / "playlists.json.v1").read_text()) == V1_PLAYLISTS
+
+
+def test_json_store_keeps_corrupt_file(tmp_path):
+    path = tmp_path / "playlists.json"
+    path.write_text('{"Loja": ')
+    assert JsonPlaylistStore(str(path)).load() == {}
+    assert not path.exists()
+    assert [p.read_text() for p in tmp_path.glob("playlists.json.corrupt-*")] == ['{"Loja": ']
+
+
+def test_sqlite_store_round_trip_and_incremental_writes(tmp_path):
+    store = SqlitePlaylistStore(str(tmp_path / "playlists.db"), import_from=None)
+    playlists = sample_playlists()
+    store.save_all(playlists)
+
+    playlists["Loja"].files[1].repeats = 5
+    store.save_media(playlists, "Loja", 1)
+    playlists["Loja"].files.append(Media("/musicas/c.mp3", minutes=15 * 60))
+    store.append_media(playlists, "Loja", 1)
+    playlists["Loja"].priority = 7
+    store.save_playlist_settings(playlists, "Loja")
+    # Renomear leva a playlist para o fim, como em core.rename_playlist
+    playlists["Centro"] = playlists.pop("Loja")
+    store.rename_playlist(playlists, "Loja", "Centro")
+    store.close()
+
+    reopened = SqlitePlaylistStore(str(tmp_path / "playlists.db"), import_from=None)
+    loaded = reopened.load()
+    assert list(loaded) == list(playlists) == ["Vazia", "Centro"]
+    assert dump_playlists(loaded) == dump_playlists(playlists)
+    del playlists["Vazia"]
+    reopened.delete_playlist(playlists, "Vazia")
+    assert list(reopened.load()) == ["Centro"]
+    reopened.close()
+
+
+def test_sqlite_store_imports_json_once(tmp_path):
+    json_path = tmp_path / "playlists.json"
+    json_path.write_text(json.dumps(V1_PLAYLISTS))
+    db_path = str(tmp_path / "playlists.db")
+    store = SqlitePlaylistStore(db_path, import_from=str(json_path))
+    assert [media.path for media in store.load()["Loja"].files] == ["/musicas/a.mp3", "/musicas/b.mp3"]
+    store.delete_playlist({}, "Loja")
+    store.close()
+    # Esvaziado de propósito: não importa de novo
+    store = SqlitePlaylistStore(db_path, import_from=str(json_path))
+    assert store.load() == {}
+    store.close()
+
+
+def test_sqlite_store_migrates_v1_rows(tmp_path):
+    db_path = str(tmp_path / "playlists.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SqlitePlaylistStore.SCHEMA)
+    conn.execute("INSERT INTO playlists VALUES ('Loja', 0, ?)",
+                 (json.dumps({"time": "10:00", "repeats": 1, "active": True}),))
+    conn.execute("INSERT INTO media VALUES ('Loja', 0, ?)", (json.dumps("/musicas/a.mp3"),))
+    conn.commit()
+    conn.close()
+
+    store = SqlitePlaylistStore(db_path, import_from=None)
+    assert store._get_meta("schema_version") == str(SCHEMA_VERSION)
+    row = store.conn.execute("SELECT data FROM media").fetchone()
+    assert json.loads(row[0]) == {"path": "/musicas/a.mp3", "time": None, "repeats": 1}
+    store.close()
+
+
+def test_sqlite_read_only_store_does_not_write(tmp_path):
+    db_path = str(tmp_path / "playlists.db")
+    store = SqlitePlaylistStore(db_path, import_from=None)
+    store.save_all(sample_playlists())
+    store.close()
+    store = SqlitePlaylistStore(db_path, import_from=None, read_only=True)
+    assert list(store.load()) == ["Loja", "Vazia"]
+    with pytest.raises(sqlite3.OperationalError):
+        store.delete_playlist({}, "Loja")
+    store.close()
+    assert SqlitePlaylistStore(str(tmp_path / "nenhum.db"), read_only=True).load() == {}
+    assert not (tmp_path / "nenhum.db").exists()
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from model import Media, Playlist
+from sync import (MANIFEST_NAME, SyncWorker, assign_playlist_id, publish_to_share,
+                  pull_from_share, share_path)
+from transfer import TransferProgress
+
+
+def central(tmp_path):
+    clips = tmp_path / "central"
+    clips.mkdir()
+    (clips / "promo.mp3").write_bytes(b"promo" * 100)
+    (clips / "vinheta.mp3").write_bytes(b"vinheta" * 100)
+    playlists = {"Manhã": Playlist([Media(str(clips / "promo.mp3"), minutes=8 * 60)], minutes=None),
+                 "Noite": Playlist([Media(str(clips / "vinheta.mp3"), minutes=None, repeats=2),
+                                    Media(str(clips / "promo.mp3"), minutes=22 * 60)],
+                                   minutes=21 * 60, priority=3)}
+    for playlist_data in playlists.values():
+        assign_playlist_id(playlist_data)
+    return playlists
+
+
+def ids(playlists):
+    return {name: playlist_data.extra["sync_id"] for name, playlist_data in playlists.items()}
+
+
+def test_publish_copies_each_content_once(tmp_path):
+    playlists = central(tmp_path)
+    share = tmp_path / "share"
+    records = publish_to_share(playlists, str(share), TransferProgress(), workers=2)
+    manifest = json.loads((share / MANIFEST_NAME).read_text())
+    assert manifest["playlists"] == records
+    assert {record["name"] for record in records.values()} == {"Manhã", "Noite"}
+    assert len(list(share.glob("media/*/*"))) == 2
+    noite = records[ids(playlists)["Noite"]]
+    assert (noite["priority"], noite["files"][0]["size"], noite["files"][0]["repeats"]) == (3, 700, 2)
+
+    # Publicar de novo não copia nada
+    progress = TransferProgress()
+    publish_to_share(playlists, str(share), progress)
+    assert progress.snapshot()[3:] == (0, 0)
+
+
+def test_pull_retries_playlists_whose_media_failed_to_copy(tmp_path):
+    playlists = central(tmp_path)
+    share, library = tmp_path / "share", tmp_path / "loja"
+    publish_to_share(playlists, str(share), TransferProgress())
+    vinheta = next(path for path in share.glob("media/*/vinheta.mp3"))
+    original = vinheta.read_bytes()
+    # Conteúdo na central diferente do manifesto (cópia pela metade, disco com defeito...)
+    vinheta.write_bytes(b"x" * len(original))
+
+    progress = TransferProgress()
+    (synced, removed), state = pull_from_share(str(share), str(library), {}, progress)
+    assert [name for name, _ in synced.values()] == ["Manhã"] and removed == []
+    assert [os.path.basename(path) for path, _ in progress.errors] == ["vinheta.mp3"]
+    assert not list(library.glob("media/*/vinheta.mp3"))
+    # Sem marcar o manifesto como sincronizado: a próxima passada tenta de novo
+    assert "manifest_sha256" not in state
+
+    vinheta.write_bytes(original)
+    progress = TransferProgress()
+    (synced, removed), state = pull_from_share(str(share), str(library), state, progress)
+    assert sorted(name for name, _ in synced.values()) == ["Manhã", "Noite"]
+    # A promo já estava na loja: só a vinheta é copiada
+    assert (progress.errors, progress.snapshot()[4]) == ([], 1)
+    name, noite = synced[ids(playlists)["Noite"]]
+    assert noite.extra["sync_id"] == ids(playlists)["Noite"]
+    assert [media.path for media in noite.files] == \
+        [str(next(library.glob(f"media/*/{clip}"))) for clip in ("vinheta.mp3", "promo.mp3")]
+    assert (noite.time, noite.files[1].time) == ("21:00", "22:00")
+
+    # Manifesto igual: nada a fazer
+    assert pull_from_share(str(share), str(library), state, TransferProgress())[0] is None
+
+    manha = ids(playlists)["Manhã"]
+    del playlists["Manhã"]
+    publish_to_share(playlists, str(share), TransferProgress())
+    (synced, removed), state = pull_from_share(str(share), str(library), state, TransferProgress())
+    assert (list(synced), removed) == ([ids(playlists)["Noite"]], [manha])
+
+
+def test_share_path_rejects_paths_outside_the_folder(tmp_path):
+    assert share_path(str(tmp_path), "media/ab/a.mp3") == str(tmp_path / "media" / "ab" / "a.mp3")
+    with pytest.raises(ValueError):
+        share_path(str(tmp_path), "../fora.mp3")
+
+
+def test_worker_applies_and_remembers_state(tmp_path):
+    playlists = central(tmp_path)
+    share = tmp_path / "share"
+    publish_to_share(playlists, str(share), TransferProgress())
+    applied = []
+    state_file = str(tmp_path / "sync_state.json")
+    worker = SyncWorker(str(share), str(tmp_path / "loja"), state_file,
+                        lambda synced, removed: applied.append((sorted(synced), removed)))
+    worker.sync()
+    assert applied == [(sorted(ids(playlists).values()), [])]
+    # Outro processo com o mesmo estado salvo não aplica de novo
+    SyncWorker(str(share), str(tmp_path / "loja"), state_file, applied.append).sync()
+    assert len(applied) == 1
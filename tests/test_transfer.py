@@ -0,0 +1,110 @@
+import glob
+import io
+import json
+import os
+import zipfile
+
+import transfer
+from model import Media, Playlist
+from recurrence import Rule
+from transfer import (CONFIG_NAME, TransferProgress, export_to_folder, export_to_zip,
+                      import_from_zip, import_record, read_export_folder)
+
+
+def test_export_import_round_trip_keeps_playlist_settings(tmp_path):
+    clip = tmp_path / "promo.mp3"
+    clip.write_bytes(b"audio")
+    playlist = Playlist([Media(str(clip), minutes=9 * 60, rule=Rule.from_record({"days": ["seg", "qua", "sex"]}))],
+                        minutes=10 * 60 + 30, repeats=2, active=False, priority=5, zone="caixa",
+                        rule=Rule.from_record({"days": ["sab", "dom"]}), extra={"sync_id": "abc"})
+
+    folder, entries = export_to_folder("Promo", playlist.to_record(), str(tmp_path / "out"),
+                                       TransferProgress())
+    assert len(entries) == 1
+    import_data, files = read_export_folder(folder)
+    imported = Playlist.from_record(import_record(import_data, files))
+
+    assert (imported.time, imported.repeats, imported.priority, imported.zone) == \
+        ("10:30", 2, 5, "caixa")
+    assert imported.rule.to_record() == playlist.rule.to_record()
+    assert imported.active and not imported.extra
+    media = imported.files[0]
+    assert media.time == "09:00" and media.rule.to_record() == playlist.files[0].rule.to_record()
+
+
+def library(tmp_path):
+    clips = tmp_path / "clips"
+    clips.mkdir()
+    (clips / "promo.mp3").write_bytes(b"promo" * 1000)
+    (clips / "copia.mp3").write_bytes(b"promo" * 1000)
+    (clips / "vinheta.mp3").write_bytes(b"vinheta")
+    files = [{"path": str(clips / name), "time": time, "repeats": 1}
+             for name, time in (("promo.mp3", "08:00"), ("copia.mp3", "09:00"),
+                                ("vinheta.mp3", None), ("sumiu.mp3", "10:00"))]
+    return {"files": files, "time": "07:00", "repeats": 1, "active": True}
+
+
+def test_zip_round_trip_stores_repeated_content_once(tmp_path):
+    playlist = library(tmp_path)
+    progress = TransferProgress()
+    entries = export_to_zip("Loja", playlist, str(tmp_path / "loja.zip"), progress, workers=2)
+    # O arquivo que não existe fica de fora; os dois clipes iguais viram um só no zip
+    assert [entry["time"] for entry in entries] == ["08:00", "09:00", None]
+    with zipfile.ZipFile(tmp_path / "loja.zip") as archive:
+        assert len([name for name in archive.namelist() if name.startswith("media/")]) == 2
+    assert not (tmp_path / "loja.zip.part").exists()
+
+    imported, files = import_from_zip(str(tmp_path / "loja.zip"), str(tmp_path / "biblioteca"),
+                                      TransferProgress())
+    assert [os.path.basename(entry["path"]) for entry in files] == \
+        ["promo.mp3", "promo.mp3", "vinheta.mp3"]
+    assert open(files[1]["path"], 'rb').read() == b"promo" * 1000
+    assert imported["metadata"]["playlist_name"] == "Loja"
+
+    # Importar de novo não regrava o que já está na biblioteca
+    progress = TransferProgress()
+    import_from_zip(str(tmp_path / "loja.zip"), str(tmp_path / "biblioteca"), progress)
+    assert progress.skipped == 2
+
+
+def test_zip_import_rejects_paths_outside_the_library(tmp_path):
+    with zipfile.ZipFile(tmp_path / "ruim.zip", 'w') as archive:
+        archive.writestr("../fora.mp3", b"x")
+        archive.writestr(CONFIG_NAME, json.dumps({"playlist": {"files": []}}))
+    progress = TransferProgress()
+    import_from_zip(str(tmp_path / "ruim.zip"), str(tmp_path / "biblioteca"), progress)
+    assert not (tmp_path / "fora.mp3").exists()
+    assert [path for path, _ in progress.errors] == ["../fora.mp3"]
+
+
+def test_folder_export_resumes_and_never_leaves_partial_files(tmp_path, monkeypatch):
+    playlist = library(tmp_path)
+    out = str(tmp_path / "out")
+    folder, entries = export_to_folder("Loja", playlist, out, TransferProgress())
+    assert len(entries) == 3
+
+    # Uma cópia interrompida deixa só o .part; a próxima exportação refaz só aquele arquivo
+    promo = next(path for path in glob.glob(os.path.join(folder, "media", "*", "*"))
+                 if open(path, 'rb').read(5) == b"promo")
+    os.remove(promo)
+    with open(promo + ".part", 'wb') as f:
+        f.write(b"pro")
+    progress = TransferProgress()
+    folder, entries = export_to_folder("Loja", playlist, out, progress)
+    assert (progress.skipped, len(entries)) == (1, 3)
+    assert open(promo, 'rb').read() == b"promo" * 1000 and not os.path.exists(promo + ".part")
+
+    # Conteúdo que muda durante a cópia: erro, sem arquivo final e a mídia fica de fora
+    real_copy_stream = transfer.copy_stream
+
+    def changing_copy(src, dst, progress=None, expected_digest=None):
+        if src.name.endswith("vinheta.mp3"):
+            return real_copy_stream(io.BytesIO(b"outra"), dst, progress, expected_digest)
+        return real_copy_stream(src, dst, progress, expected_digest)
+    monkeypatch.setattr(transfer, "copy_stream", changing_copy)
+    progress = TransferProgress()
+    folder, entries = export_to_folder("Loja", playlist, str(tmp_path / "out2"), progress)
+    assert [os.path.basename(path) for path, _ in progress.errors] == ["vinheta.mp3"]
+    assert [entry["time"] for entry in entries] == ["08:00", "09:00"]
+    copied = [os.path.basename(path) for path in glob.glob(os.path.join(folder, "media", "*", "*.mp3"))]
+    assert copied == ["promo.mp3"]
@@ -0,0 +1,117 @@
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import triggers
+from triggers import TriggerQueue, TriggerServer, TriggerTailer, parse_trigger
+
+
+def test_parse_trigger_accepts_playlist_and_optional_fields():
+    trigger = parse_trigger({"playlist": "Loja", "clip": "promo.mp3", "repeats": 2,
+                             "priority": 5, "id": "caixa-1"})
+    assert (trigger["playlist"], trigger["clip"], trigger["repeats"], trigger["priority"],
+            trigger["id"]) == ("Loja", "promo.mp3", 2, 5, "caixa-1")
+    assert parse_trigger({"playlist": "Loja"})["clip"] is None
+
+
+@pytest.mark.parametrize("data", [
+    None, [], {}, {"playlist": 1}, {"playlist": "Loja", "clip": 1.5},
+    {"playlist": "Loja", "repeats": 0}, {"playlist": "Loja", "repeats": "2"},
+    {"playlist": "Loja", "priority": "alta"},
+])
+def test_parse_trigger_rejects_invalid(data):
+    with pytest.raises(ValueError):
+        parse_trigger(data)
+
+
+def test_queue_coalesces_and_drops_when_full():
+    queue = TriggerQueue(lambda batch: None, maxsize=2)
+    assert queue.put(parse_trigger({"playlist": "A"}))
+    assert queue.put(parse_trigger({"playlist": "A"}))
+    assert queue.put(parse_trigger({"playlist": "A", "clip": 1}))
+    assert not queue.put(parse_trigger({"playlist": "B"}))
+    assert (queue.coalesced, queue.dropped) == (1, 1)
+
+
+def test_queue_dispatches_burst_as_one_batch():
+    batches = []
+    done = threading.Event()
+    queue = TriggerQueue(lambda batch: (batches.append(batch), done.set()), batch_window=0.05)
+    queue.start()
+    try:
+        for name in ("A", "B", "A"):
+            queue.put(parse_trigger({"playlist": name}))
+        assert done.wait(2)
+        assert [[trigger["playlist"] for trigger in batch] for batch in batches] == [["A", "B"]]
+    finally:
+        queue.stop(1)
+
+
+def test_tailer_reads_only_appended_lines(tmp_path):
+    path, received = tmp_path / "gatilhos.jsonl", []
+    path.write_text('{"playlist": "antigo"}\n')
+    tailer = TriggerTailer(str(path), str(tmp_path / "offset.json"),
+                           lambda trigger: received.append(trigger["playlist"]) or True)
+    tailer.poll()
+    with open(path, 'a') as f:
+        f.write('{"playlist": "A"}\nlixo\n{"playlist": "B"}\n{"playlist": "C"')
+    tailer.poll()
+    assert received == ["A", "B"]
+
+    # A posição sobrevive a um reinício; a linha incompleta é lida quando terminar
+    with open(path, 'a') as f:
+        f.write('}\n')
+    TriggerTailer(str(path), str(tmp_path / "offset.json"),
+                  lambda trigger: received.append(trigger["playlist"]) or True).poll()
+    assert received == ["A", "B", "C"]
+
+
+def test_tailer_skips_lines_longer_than_a_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(triggers, "READ_CHUNK", 32)
+    path, received = tmp_path / "gatilhos.jsonl", []
+    path.write_text("")
+    tailer = TriggerTailer(str(path), str(tmp_path / "offset.json"),
+                           lambda trigger: received.append(trigger["playlist"]) or True)
+    tailer.poll()
+    with open(path, 'a') as f:
+        f.write('{"playlist": "A"}\n{"playlist": "' + "x" * 40)
+    tailer.poll()
+    assert received == ["A"]
+
+    # O resto da linha grande chega depois e também é descartado; a seguinte é lida
+    with open(path, 'a') as f:
+        f.write('"}\n{"playlist": "B"}\n')
+    tailer.poll()
+    assert received == ["A", "B"]
+    assert tailer.offset == path.stat().st_size
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_server_accepts_posted_triggers():
+    received = []
+    port = free_port()
+    server = TriggerServer(lambda trigger: received.append(trigger) or True, port=port)
+    server.start()
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/trigger", method="POST",
+                                         data=json.dumps([{"playlist": "A"}, {"playlist": "B"}]).encode())
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.status == 202 and json.load(response) == {"accepted": 2}
+        assert [trigger["playlist"] for trigger in received] == ["A", "B"]
+
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/trigger", method="POST",
+                                         data=b'{"clip": 1}')
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 400
+    finally:
+        server.stop(2)
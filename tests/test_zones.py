@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("pygame")
+
+import playback
+import zones
+from fake_mixer import FakeCache, FakeMixer, wait_for
+from playback import PlaybackWorker
+from zones import ZoneMixer, zone_gains
+
+
+@pytest.fixture
+def fake_mixer(monkeypatch):
+    fake = FakeMixer()
+    monkeypatch.setattr(playback, "mixer", fake)
+    monkeypatch.setattr(zones, "mixer", fake)
+    return fake
+
+
+def make_mixer(config):
+    events, channels = [], {}
+    cache = FakeCache()
+
+    def create_worker(zone, channel, gains):
+        channels[zone] = channel
+        return PlaybackWorker(cache=cache, zone=zone, channel=channel, gains=gains,
+                              poll_interval=0.005,
+                              on_event=lambda kind, item, message, timestamp:
+                              events.append((kind, item.info.get("zone"), item.path)))
+
+    player = ZoneMixer(config, create_worker)
+    player.start()
+    return player, events, channels
+
+
+def test_zone_gains():
+    assert zone_gains({"volume": 0.5, "pan": [1.0, 0.0]}) == (0.5, 0.0)
+
+
+def test_single_zone_uses_music_without_reserved_channels(fake_mixer):
+    player, events, channels = make_mixer({})
+    try:
+        assert list(player.workers) == ["principal"] and channels == {"principal": None}
+        assert fake_mixer.reserved == 0
+    finally:
+        player.shutdown(1)
+
+
+def test_zones_play_at_the_same_time_on_their_own_channels(fake_mixer):
+    player, events, channels = make_mixer({"loja": {}, "caixa": {"volume": 0.5, "pan": [0, 1]},
+                                           "deposito": {"duck": False}})
+    try:
+        assert fake_mixer.reserved == 3
+        assert [channel.id for channel in channels.values()] == [0, 1, 2]
+        player.enqueue("promo.mp3", zone="loja")
+        player.enqueue("chamada.mp3", zone="caixa")
+        # Zona desconhecida cai na primeira
+        player.enqueue("aviso.mp3", zone="nenhuma")
+        assert wait_for(lambda: ("start", "loja", "promo.mp3") in events
+                        and ("start", "caixa", "chamada.mp3") in events)
+        assert channels["loja"].get_busy() and channels["caixa"].get_busy()
+        assert channels["caixa"].volume == (0.0, 0.5)
+        assert not channels["deposito"].played
+
+        player.set_volume("caixa", 1.0)
+        assert wait_for(lambda: channels["caixa"].volume == (0.0, 1.0))
+        channels["loja"].finish()
+        assert wait_for(lambda: ("start", "loja", "aviso.mp3") in events)
+
+        player.stop("caixa")
+        assert wait_for(lambda: ("stopped", "caixa", "chamada.mp3") in events)
+        assert channels["loja"].get_busy()
+    finally:
+        player.shutdown(1)
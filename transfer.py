@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from availability import stat_path
+from storage import write_json_atomic
+
+CHUNK_SIZE = 1024 * 1024
+CONFIG_NAME = "playlist_config.json"
+EXPORT_FORMAT = 2
+
+
+class TransferProgress:
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phase = ""
+        self.done_bytes = 0
+        self.total_bytes = 0
+        self.files_done = 0
+        self.files_total = 0
+        self.skipped = 0
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def start_phase(self, phase, total_bytes, files_total):
+        with self._lock:
+            self.phase = phase
+            self.done_bytes = 0
+            self.total_bytes = total_bytes
+            self.files_done = 0
+            self.files_total = files_total
+        self._notify()
+
+    def advance(self, nbytes):
+        with self._lock:
+            self.done_bytes += nbytes
+        self._notify()
+
+    def file_done(self, skipped=False):
+        with self._lock:
+            self.files_done += 1
+            if skipped:
+                self.skipped += 1
+        self._notify()
+
+    def error(self, path, exc):
+        with self._lock:
+            self.errors.append((path, str(exc)))
+
+    def snapshot(self):
+        with self._lock:
+            return (self.phase, self.done_bytes, self.total_bytes,
+                    self.files_done, self.files_total)
+
+    def _notify(self):
+        if self.callback:
+            self.callback(self)
+
+
+def hash_file(path, progress=None):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if progress:
+                progress.advance(len(chunk))
+    return digest.hexdigest()
+
+
+def copy_stream(src, dst, progress=None, expected_digest=None):
+    digest = hashlib.sha256()
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        dst.write(chunk)
+        if progress:
+            progress.advance(len(chunk))
+    if expected_digest and digest.hexdigest() != expected_digest:
+        raise IOError("Conteúdo mudou durante a cópia")
+    return digest.hexdigest()
+
+
+def copy_file(src_path, dst_path, progress=None, expected_digest=None):
+    # Copia para .part e só renomeia no final: nunca sobra um arquivo pela metade com o nome final
+    part_path = f"{dst_path}.part"
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    with open(src_path, 'rb') as src, open(part_path, 'wb') as dst:
+        copy_stream(src, dst, progress, expected_digest)
+    try:
+        os.utime(part_path, ns=(os.stat(src_path).st_atime_ns, os.stat(src_path).st_mtime_ns))
+    except OSError:
+        pass
+    os.replace(part_path, dst_path)
+
+
+def content_path(digest, src_path):
+    # Um diretório por conteúdo: clipes repetidos são gravados uma vez e o nome original é mantido
+    filename = src_path.replace("\\", "/").rsplit("/", 1)[-1]
+    return f"media/{digest[:32]}/{filename}"
+
+
+def media_fields(media):
+    if isinstance(media, dict):
+        return media["path"], media.get("time", "00:00"), media.get("repeats", 1)
+    return media, "00:00", 1
+
+
+def export_metadata(playlist_name):
+    return {
+        "export_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "playlist_name": playlist_name,
+        "format": EXPORT_FORMAT
+    }
+
+
+def hash_sources(paths, progress, workers, stat=stat_path, digests=None):
+    # digests: hashes já conhecidos (ex.: da ingestão); a cópia confere o conteúdo de qualquer forma
+    digests = digests or {}
+    sizes = {}
+    for path in paths:
+        st = stat(path)
+        if st.exists:
+            sizes[path] = st.size
+    progress.start_phase("hash", sum(sizes.values()), len(sizes))
+
+    def task(path):
+        try:
+            if path in digests:
+                progress.advance(sizes[path])
+                return path, digests[path]
+            return path, hash_file(path, progress)
+        except Exception as e:
+            progress.error(path, e)
+            return path, None
+        finally:
+            progress.file_done()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = dict(pool.map(task, list(sizes)))
+    return {path: digest for path, digest in digests.items() if digest}, sizes
+
+
+def build_export_entries(playlist_data, digests):
+    entries, targets = [], {}
+    for media in playlist_data["files"]:
+        path, media_time, repeats = media_fields(media)
+        digest = digests.get(path)
+        if digest is None:
+            continue
+        target = targets.setdefault(digest, (content_path(digest, path), path))[0]
+        entry = dict(media) if isinstance(media, dict) else {}
+        entry.update({"path": target, "time": media_time, "repeats": repeats, "sha256": digest})
+        entries.append(entry)
+    return entries, targets
+
+
+def playlist_settings(playlist_data):
+    return {key: value for key, value in playlist_data.items() if key != "files"}
+
+
+def export_to_folder(playlist_name, playlist_data, dest_dir, progress, workers=4, resume=True,
+                     stat=stat_path, digests=None):
+    export_folder = os.path.join(dest_dir, f"export_{playlist_name}")
+    paths = list(dict.fromkeys(media_fields(media)[0] for media in playlist_data["files"]))
+    digests, sizes = hash_sources(paths, progress, workers, stat, digests)
+    entries, targets = build_export_entries(playlist_data, digests)
+    if not entries:
+        return export_folder, []
+
+    os.makedirs(export_folder, exist_ok=True)
+    progress.start_phase("copy", sum(sizes[src] for _, src in targets.values()), len(targets))
+
+    def task(item):
+        digest, (relpath, src_path) = item
+        dst_path = os.path.join(export_folder, *relpath.split("/"))
+        try:
+            if resume and os.path.exists(dst_path) and os.path.getsize(dst_path) == sizes[src_path] \
+                    and hash_file(dst_path) == digest:
+                progress.advance(sizes[src_path])
+                progress.file_done(skipped=True)
+                return
+            copy_file(src_path, dst_path, progress, expected_digest=digest)
+        except Exception as e:
+            progress.error(src_path, e)
+        progress.file_done()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(task, targets.items()))
+
+    failed = {path for path, _ in progress.errors}
+    entries = [entry for entry in entries if targets[entry["sha256"]][1] not in failed]
+    if entries:
+        playlist = playlist_settings(playlist_data)
+        playlist["files"] = entries
+        write_json_atomic(os.path.join(export_folder, CONFIG_NAME),
+                          {"playlist": playlist, "metadata": export_metadata(playlist_name)})
+    return export_folder, entries
+
+
+def export_to_zip(playlist_name, playlist_data, zip_path, progress, workers=4, stat=stat_path,
+                  digests=None):
+    paths = list(dict.fromkeys(media_fields(media)[0] for media in playlist_data["files"]))
+    digests, sizes = hash_sources(paths, progress, workers, stat, digests)
+    entries, targets = build_export_entries(playlist_data, digests)
+    if not entries:
+        return []
+
+    progress.start_phase("zip", sum(sizes[src] for _, src in targets.values()), len(targets))
+    part_path = f"{zip_path}.part"
+    written = set()
+    # Áudio já comprimido (mp3/ogg) não ganha nada com deflate; grava direto no zip
+    with zipfile.ZipFile(part_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for digest, (relpath, src_path) in targets.items():
+            try:
+                with open(src_path, 'rb') as src, \
+                        archive.open(relpath, 'w', force_zip64=True) as dst:
+                    copy_stream(src, dst, progress, expected_digest=digest)
+                written.add(digest)
+            except Exception as e:
+                progress.error(src_path, e)
+            progress.file_done()
+        entries = [entry for entry in entries if entry["sha256"] in written]
+        playlist = playlist_settings(playlist_data)
+        playlist["files"] = entries
+        archive.writestr(CONFIG_NAME, json.dumps(
+            {"playlist": playlist, "metadata": export_metadata(playlist_name)}, indent=4))
+    if entries:
+        os.replace(part_path, zip_path)
+    else:
+        os.remove(part_path)
+    return entries
+
+
+def validate_import_data(import_data):
+    if "playlist" not in import_data or "files" not in import_data["playlist"]:
+        raise ValueError("Formato de arquivo inválido!")
+
+
+def resolve_import_files(import_data, base_dir, workers=4, stat=stat_path):
+    files = import_data["playlist"]["files"]
+
+    def task(media):
+        relpath = media["path"] if isinstance(media, dict) else media
+        file_path = os.path.join(base_dir, *relpath.replace("\\", "/").split("/"))
+        if not stat(file_path).exists:
+            return None
+        if not isinstance(media, dict):
+            return file_path
+        entry = {key: value for key, value in media.items() if key != "sha256"}
+        entry.update({"path": file_path, "time": media.get("time", "00:00"),
+                      "repeats": media.get("repeats", 1)})
+        return entry
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [entry for entry in pool.map(task, files) if entry is not None]
+
+
+def import_record(import_data, files):
+    # Configurações da playlist exportada (regra, prioridade, zona...) com as mídias já locais;
+    # o sync_id identifica a playlist de origem, a importada é outra playlist e entra ativa
+    record = playlist_settings(import_data["playlist"])
+    record.pop("sync_id", None)
+    record.setdefault("time", "00:00")
+    record.update(active=True, files=files)
+    return record
+
+
+def read_export_folder(folder_path, workers=4, stat=stat_path):
+    config_path = os.path.join(folder_path, CONFIG_NAME)
+    if not os.path.exists(config_path):
+        raise FileNotFoundError("Arquivo de configuração não encontrado!")
+    with open(config_path, 'r') as f:
+        import_data = json.load(f)
+    validate_import_data(import_data)
+    return import_data, resolve_import_files(import_data, folder_path, workers, stat)
+
+
+def import_from_zip(zip_path, library_dir, progress, stat=stat_path):
+    # Extrai para a biblioteca local; conteúdo já presente (mesmo caminho com o hash) não é regravado
+    library_dir = os.path.abspath(library_dir)
+    with zipfile.ZipFile(zip_path) as archive:
+        import_data = json.loads(archive.read(CONFIG_NAME))
+        validate_import_data(import_data)
+        names = [name for name in archive.namelist() if name != CONFIG_NAME and not name.endswith("/")]
+        progress.start_phase("extract", sum(archive.getinfo(name).file_size for name in names),
+                             len(names))
+        for name in names:
+            info = archive.getinfo(name)
+            dst_path = os.path.normpath(os.path.join(library_dir, *name.split("/")))
+            if not dst_path.startswith(os.path.normpath(library_dir) + os.sep):
+                progress.error(name, ValueError("Caminho inválido no arquivo zip"))
+                progress.file_done()
+                continue
+            if os.path.exists(dst_path) and os.path.getsize(dst_path) == info.file_size:
+                progress.advance(info.file_size)
+                progress.file_done(skipped=True)
+                continue
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            part_path = f"{dst_path}.part"
+            try:
+                with archive.open(info) as src, open(part_path, 'wb') as dst:
+                    copy_stream(src, dst, progress)
+                os.replace(part_path, dst_path)
+            except Exception as e:
+                progress.error(name, e)
+            progress.file_done()
+    return import_data, resolve_import_files(import_data, library_dir, stat=stat)
@@ -0,0 +1,330 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from storage import write_json_atomic
+
+READ_CHUNK = 1024 * 1024
+MAX_BODY = 64 * 1024
+
+
+def parse_trigger(data):
+    # {"playlist": "...", "clip": índice ou nome (opcional), "repeats": n, "priority": p, "id": "..."}
+    if not isinstance(data, dict) or not isinstance(data.get("playlist"), str):
+        raise ValueError("Gatilho sem playlist")
+    clip = data.get("clip")
+    if clip is not None and not isinstance(clip, (int, str)):
+        raise ValueError("Campo 'clip' inválido")
+    repeats = data.get("repeats")
+    if repeats is not None and (not isinstance(repeats, int) or repeats < 1):
+        raise ValueError("Repetições deve ser um número inteiro positivo")
+    priority = data.get("priority")
+    if priority is not None and not isinstance(priority, (int, float)):
+        raise ValueError("Campo 'priority' inválido")
+    return {"playlist": data["playlist"], "clip": clip, "repeats": repeats, "priority": priority,
+            "id": data.get("id"), "received_at": time.time()}
+
+
+def trigger_key(trigger):
+    # Dois gatilhos iguais ainda na fila viram um só (ex.: o mesmo botão apertado em dois caixas)
+    return trigger["playlist"], trigger["clip"]
+
+
+class TriggerQueue:
+    def __init__(self, dispatch, maxsize=100, batch_window=0.05):
+        self.dispatch = dispatch
+        self.maxsize = maxsize
+        self.batch_window = batch_window
+        self.coalesced = 0
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="triggers", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, trigger):
+        key = trigger_key(trigger)
+        with self._cond:
+            if key in self._pending:
+                self.coalesced += 1
+                return True
+            if len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                return False
+            self._pending[key] = trigger
+            self._cond.notify()
+        return True
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            # Espera um instante para juntar gatilhos que chegam em rajada num único lote
+            time.sleep(self.batch_window)
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending.clear()
+            try:
+                self.dispatch(batch)
+            except Exception as e:
+                print(f"Erro ao disparar gatilhos remotos: {e}")
+
+
+class TriggerTailer:
+    # Lê só o que foi acrescentado ao arquivo desde a última vez; a posição sobrevive a reinícios.
+    # O arquivo não fica aberto entre as leituras para não impedir a rotação no Windows.
+
+    def __init__(self, path, offset_file, on_trigger, poll_interval=0.2):
+        self.path = path
+        self.offset_file = offset_file
+        self.on_trigger = on_trigger
+        self.poll_interval = poll_interval
+        self.identity, self.offset = self._load_offset()
+        # Descartando o resto de uma linha maior que READ_CHUNK
+        self._oversized = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trigger-tail", daemon=True)
+
+    def _load_offset(self):
+        if not os.path.exists(self.offset_file):
+            return None, 0
+        try:
+            with open(self.offset_file, 'r') as f:
+                state = json.load(f)
+            return tuple(state["identity"]), state["offset"]
+        except Exception as e:
+            print(f"Erro ao carregar {self.offset_file}: {e}")
+            return None, 0
+
+    def _save_offset(self):
+        try:
+            write_json_atomic(self.offset_file, {"identity": list(self.identity), "offset": self.offset},
+                              indent=None)
+        except Exception as e:
+            print(f"Erro ao salvar {self.offset_file}: {e}")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Erro ao ler {self.path}: {e}")
+            self._stopped.wait(self.poll_interval)
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        identity = (st.st_dev, st.st_ino)
+        changed = False
+        if self.identity is None:
+            # Primeira execução: pedidos antigos já no arquivo não são disparados
+            self.identity, self.offset = identity, st.st_size
+            changed = True
+        elif identity != self.identity:
+            # Rotacionado: termina o que faltava do arquivo antigo, se ele ainda existir como .1
+            self._drain_rotated()
+            self.identity, self.offset = identity, 0
+            self._oversized = False
+            changed = True
+        elif st.st_size < self.offset:
+            print(f"Aviso: {self.path} foi truncado; lendo desde o início")
+            self.offset = 0
+            self._oversized = False
+            changed = True
+        if st.st_size > self.offset:
+            consumed = self._read_from(self.path, self.offset)
+            if consumed:
+                self.offset += consumed
+                changed = True
+        if changed:
+            self._save_offset()
+
+    def _drain_rotated(self):
+        rotated = f"{self.path}.1"
+        try:
+            st = os.stat(rotated)
+        except FileNotFoundError:
+            return
+        if (st.st_dev, st.st_ino) == self.identity and st.st_size > self.offset:
+            self._read_from(rotated, self.offset)
+
+    def _read_from(self, path, offset):
+        consumed = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                data = f.read(READ_CHUNK)
+                if self._oversized:
+                    # Pula até o fim da linha grande demais, mesmo que ela chegue aos poucos
+                    end = data.find(b"\n") + 1
+                    consumed += end or len(data)
+                    if not end:
+                        if len(data) < READ_CHUNK:
+                            return consumed
+                        continue
+                    self._oversized = False
+                    f.seek(offset + consumed)
+                    continue
+                end = data.rfind(b"\n") + 1
+                if not end:
+                    # Linha ainda incompleta: fica para a próxima leitura
+                    if len(data) < READ_CHUNK:
+                        return consumed
+                    # Sem quebra de linha num bloco inteiro: a linha nunca caberia, é descartada
+                    print(f"Aviso: linha com mais de {READ_CHUNK} bytes em {path}; descartada")
+                    self._oversized = True
+                    consumed += len(data)
+                    continue
+                for line in data[:end].splitlines(keepends=True):
+                    if not self._handle_line(line):
+                        return consumed
+                    consumed += len(line)
+                if end < len(data):
+                    f.seek(offset + consumed)
+
+    def _handle_line(self, line):
+        line = line.strip()
+        if not line:
+            return True
+        try:
+            trigger = parse_trigger(json.loads(line))
+        except ValueError as e:
+            print(f"Aviso: gatilho inválido em {self.path}: {e}")
+            return True
+        # Fila cheia: a linha não é consumida e volta a ser lida na próxima passada
+        return self.on_trigger(trigger)
+
+
+class TriggerServer:
+    # Endpoint HTTP mínimo (POST /trigger, GET /health e, com `metrics`, GET /metrics no formato
+    # do Prometheus) em TCP local e/ou socket Unix
+
+    def __init__(self, on_trigger, host="127.0.0.1", port=None, unix_path=None, metrics=None):
+        self.on_trigger = on_trigger
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trigger-server", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self, timeout=None):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        # asyncio só é importado com o servidor ligado: pesa na inicialização de quem não o usa
+        import asyncio
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            print(f"Erro no servidor de gatilhos: {e}")
+        finally:
+            self._ready.set()
+
+    async def _serve(self):
+        import asyncio
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        servers = []
+        try:
+            if self.port is not None:
+                servers.append(await asyncio.start_server(self._handle, self.host, self.port))
+            if self.unix_path:
+                if os.path.exists(self.unix_path):
+                    os.remove(self.unix_path)
+                servers.append(await asyncio.start_unix_server(self._handle, self.unix_path))
+        finally:
+            self._ready.set()
+        await self._stop.wait()
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        try:
+            status, payload = await asyncio.wait_for(self._read_request(reader), 5)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            status, payload = 408, {"error": "Requisição incompleta"}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        content_type = "application/json"
+        if isinstance(payload, str):
+            content_type, body = "text/plain; version=0.0.4", payload.encode('utf-8')
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                  408: "Request Timeout", 413: "Payload Too Large", 503: "Service Unavailable"}
+        writer.write(f"HTTP/1.1 {status} {reason.get(status, '')}\r\n"
+                     f"Content-Type: {content_type}; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        parts = (await reader.readline()).decode('latin-1').split()
+        if len(parts) < 2:
+            raise ValueError("Requisição inválida")
+        method, target = parts[0], parts[1]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            return 413, {"error": "Corpo muito grande"}
+        body = await reader.readexactly(length) if length else b""
+
+        if target == "/health":
+            return 200, {"ok": True}
+        if target == "/metrics" and self.metrics is not None:
+            return 200, self.metrics()
+        if target != "/trigger" or method != "POST":
+            return 404, {"error": "Não encontrado"}
+        data = json.loads(body or b"null")
+        triggers = [parse_trigger(item) for item in (data if isinstance(data, list) else [data])]
+        accepted = sum(1 for trigger in triggers if self.on_trigger(trigger))
+        if accepted < len(triggers):
+            return 503, {"accepted": accepted, "error": "Fila de gatilhos cheia"}
+        return 202, {"accepted": accepted}
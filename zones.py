@@ -0,0 +1,64 @@
+from pygame import mixer
+
+DEFAULT_ZONE = {"volume": 1.0, "pan": [1.0, 1.0], "duck": True}
+
+
+def zone_gains(config):
+    # Volume da zona aplicado a cada lado; com pan [1, 0] a zona só sai no canal esquerdo
+    volume = config.get("volume", 1.0)
+    left, right = config.get("pan", DEFAULT_ZONE["pan"])
+    return left * volume, right * volume
+
+
+class ZoneMixer:
+    # Um PlaybackWorker por zona, cada um com o seu mixer.Channel reservado, então zonas diferentes
+    # tocam ao mesmo tempo. Com uma zona só, o worker usa mixer.music como antes.
+
+    def __init__(self, zones, create_worker):
+        self.zones = {name: dict(DEFAULT_ZONE, **config) for name, config in zones.items()}
+        if not self.zones:
+            self.zones = {"principal": dict(DEFAULT_ZONE)}
+        self.default_zone = next(iter(self.zones))
+        self.workers = {}
+        if len(self.zones) == 1:
+            config = self.zones[self.default_zone]
+            self.workers[self.default_zone] = create_worker(self.default_zone, None, zone_gains(config))
+            return
+        mixer.set_num_channels(max(mixer.get_num_channels(), len(self.zones) + 8))
+        mixer.set_reserved(len(self.zones))
+        for channel_id, (name, config) in enumerate(self.zones.items()):
+            self.workers[name] = create_worker(name, mixer.Channel(channel_id), zone_gains(config))
+
+    def zone_for(self, zone):
+        if zone is not None and zone not in self.workers:
+            print(f"Aviso: zona '{zone}' não existe; usando '{self.default_zone}'")
+        return zone if zone in self.workers else self.default_zone
+
+    def start(self):
+        for worker in self.workers.values():
+            worker.start()
+
+    def play(self, path, repeats=1, priority=0, deadline=None, zone=None, **info):
+        zone = self.zone_for(zone)
+        self.workers[zone].play(path, repeats, priority, deadline, zone=zone, **info)
+
+    def enqueue(self, path, repeats=1, priority=0, deadline=None, zone=None, **info):
+        zone = self.zone_for(zone)
+        self.workers[zone].enqueue(path, repeats, priority, deadline, zone=zone, **info)
+
+    def stop(self, zone=None):
+        for name, worker in self.workers.items():
+            if zone is None or name == zone:
+                worker.stop()
+
+    def set_volume(self, zone, volume):
+        config = self.zones[zone]
+        config["volume"] = volume
+        self.workers[zone].set_gains(zone_gains(config))
+
+    def shutdown(self, timeout=None):
+        for worker in self.workers.values():
+            worker.commands.put(("shutdown", None))
+        for worker in self.workers.values():
+            if worker.is_alive():
+                worker.join(timeout)